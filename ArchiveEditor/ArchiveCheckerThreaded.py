@@ -28,6 +28,7 @@ import sys
 from copy import copy, deepcopy
 import math
 import os
+import multiprocessing
 
 # PyQt interface imports, Qt5
 from PyQt5.QtWidgets import *
@@ -37,6 +38,9 @@ import PyQt5.uic as uic
 
 # Archive modules
 from Utilities import *
+from archivecheck import check_archive_incremental, check_archive_clusters, default_processes
+from archiveindex import archive_index
+from editdistance import MAX_EDIT_DISTANCE
 import helpbrowser
 
 TITLE = 'Archive Checker 3.0'
@@ -91,12 +95,21 @@ class Engine(QObject):
     displayString = ''
     displayCount = 0
 
-    @pyqtSlot(str, bool)
-    def runEngine(self, TheArchiveFilename, similarLocatorsChecked):
+    @pyqtSlot(str, bool, int, bool, int)
+    def runEngine(self, TheArchiveFilename, similarLocatorsChecked, processes, clustersChecked, editDistance):
 
         """Thread method that runs when the MainApp emits the signal to
             run it.
 
+            The contacts are checked by a pool of `processes` processes
+            (in this thread if 1), the report is the same either way.
+
+            If clustersChecked the near matches are shown once for each
+            cluster of contacts that are probably the same station.
+
+            Callsigns up to editDistance characters inserted, dropped or
+            changed are shown as (edit distance) near matches, 0 for none.
+
             Emits the signal finishedSig when it has finished."""
 
         # Initialise Lists
@@ -109,38 +122,18 @@ class Engine(QObject):
         if warnings:
             self.warningDisplaySig.emit(warnings)
 
-        Keys = list(self.archiveDict.keys())
-
-        Keys.sort()
-
-        # iterate over the archiveList
-        for contact in Keys:
-
-            timesSeen, dates = self.archiveDict[contact]
+        if clustersChecked:
+            # compare each pair of contacts once and group the near matches
+            report = check_archive_clusters(self.archiveDict, similarLocatorsChecked, editDistance,
+                                            archive_index(TheArchiveFilename, self.archiveDict))
+        else:
+            # check each contact in sorted order, re-using the results
+            # of the last check for the contacts that can't have changed
+            report = check_archive_incremental(TheArchiveFilename, self.archiveDict, similarLocatorsChecked,
+                                               processes, editDistance)
 
-            # Display the contact
-            self.display('\n' + '  ' + contact[0] + ',' + contact[1] + ',' + contact[2])
-            if timesSeen == 1:
-                self.display('      worked once on ' + dates)
-            else:
-                self.display('      worked ' + str(timesSeen) + ' times on ' + dates)
-
-            # Get any fuzzy matches
-            matchesList = fuzzy_match(contact, similarLocatorsChecked, self.archiveDict)
-
-            # Display the fuzzy match list
-            if matchesList:
-                self.display('    Near Matches:')
-                for match in matchesList:
-                    self.display('    ' + match[0] + ',' + match[1] + ',' + match[2] + ' ' + match[4])
-                    if match[3] == 1:
-                        self.display('       worked once on ' + match[5])
-                    else:
-                        self.display('       worked ' + str(match[3]) + ' times on ' + match[5])
-
-            report = check_locator_is_in_correct_country(contact[0], contact[1])
-            if report:
-                self.display(report)
+        for text in report:
+            self.displayString += text
 
         self.sendDisplay('black')
 
@@ -191,7 +184,7 @@ class MainApp(QWidget):
     """Main Qt5 Window."""
 
     # signals emitted by the MainApp
-    runSig = pyqtSignal(str, bool)
+    runSig = pyqtSignal(str, bool, int, bool, int)
     canClose = True
 
     showDebug = False  # Indicates whether debug info is shown on the text display
@@ -236,6 +229,9 @@ class MainApp(QWidget):
 
         # 8 - restore window position etc. from saved settings
         self.restoreGeometry(self.settings.value('geometry', type=QByteArray))
+        self.spinBoxProcesses.setValue(self.settings.value('Processes', default_processes(), type=int))
+        self.spinBoxEditDistance.setMaximum(MAX_EDIT_DISTANCE)
+        self.spinBoxEditDistance.setValue(self.settings.value('EditDistance', EDIT_DISTANCE, type=int))
 
         # Set attribute so the window is deleted completely when closed
         self.setAttribute(Qt.WA_DeleteOnClose)
@@ -274,7 +270,7 @@ class MainApp(QWidget):
         file_name, _ = QFileDialog.getOpenFileName(self,
                                                    "Open csl file",
                                                    csl_dir,
-                                                   "csl Files (*.csl);;All Files (*)")  # ,
+                                                   "csl Files (*.csl);;Archive databases (*.csldb);;All Files (*)")  # ,
         # options = options)
 
         if file_name:
@@ -290,11 +286,19 @@ class MainApp(QWidget):
 
             self.checked = self.checkBoxSimilarLocators.isChecked()
 
+            processes = self.spinBoxProcesses.value()
+            self.settings.setValue('Processes', processes)
+
+            clustersChecked = self.checkBoxClusters.isChecked()
+
+            editDistance = self.spinBoxEditDistance.value()
+            self.settings.setValue('EditDistance', editDistance)
+
             qApp.setOverrideCursor(Qt.WaitCursor)
             qApp.processEvents(QEventLoop.AllEvents)
 
             self.canClose = False
-            self.runSig.emit(file_name, self.checked)
+            self.runSig.emit(file_name, self.checked, processes, clustersChecked, editDistance)
 
     @pyqtSlot()
     def onThreadFinished(self):
@@ -425,6 +429,7 @@ class MainApp(QWidget):
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     mainWindow = MainApp()
     sys.exit(app.exec_())
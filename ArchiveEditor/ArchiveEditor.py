@@ -37,11 +37,15 @@ import PyQt5.uic as uic
 # Archive Editor modules
 from Dialogues import EditDialogue, InsertDialogue
 from Utilities import *
+import archivejournal
 import helpbrowser
 
 
 TITLE = 'Archive Editor 3.0'
 
+# The rows of an archive (ArchiveRows) put back together into the lines shown in the list
+archive_lines = compile_pipeline(ArchiveRows.rows, row_line)
+
 class MainApp(QWidget):
 
     '''Main Qt5 Window.'''
@@ -109,19 +113,13 @@ class MainApp(QWidget):
 
         if self.fileName:    # fileName is empty if cancelled
 
-            warnings = ''
+            # read the current contents of the .csl file (or its .csl.cache) and journal
+            archiveRows = load_archive_rows(self.fileName)
 
-            # read the current contents of the .csl file
+            # each row of the file put back together into a line
+            self.listWidget.addItems(list(archive_lines(archiveRows)))
 
-            for row in csl_rows(csv_rows(self.fileName)):  # Cascaded generators
-                # iterate through each row in the file
-                try:
-                    # put line back together
-                    line = ",".join([f'"{f}"' if isinstance(f, str) else str(f) for f in row])
-                    checkformat.checkLine(line)
-                except checkformat.CheckFormatError as e:
-                    warnings += f'{e}\n'
-                self.listWidget.addItem(line)
+            warnings = archiveRows.warning_text()
 
             if warnings:
                 QMessageBox.warning(self, "File Format Warning!",
@@ -234,6 +232,8 @@ class MainApp(QWidget):
                 for i in range(self.listWidget.count()):
                     line = self.listWidget.item(i).text()
                     f.write(line + '\n')
+            # the rows of any journal were shown and are now in the file
+            archivejournal.remove(fileName)
             self.edited = False
             self.fileName = fileName
 
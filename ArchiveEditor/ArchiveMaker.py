@@ -29,6 +29,7 @@ from copy import copy, deepcopy
 import math
 import os
 from contextlib import contextmanager
+import multiprocessing
 
 import ArchiveUtilities3
 
@@ -40,6 +41,9 @@ import PyQt5.uic as uic
 
 # Archive modules
 from Utilities import *
+from ediimport import read_edi_files, add_edi_contacts
+from archivecheck import default_processes
+import archivedb
 import helpbrowser
 
 TITLE = 'Archive Maker 3.0'
@@ -105,6 +109,7 @@ class MainApp(QWidget):
 
     edited = False
     fileName = ''
+    canClose = True
 
     def __init__(self):
 
@@ -160,15 +165,18 @@ class MainApp(QWidget):
         fileName, _ = QFileDialog.getSaveFileName(self,
                                                   "New csl file",
                                                   defaultFile,
-                                                  "csl Files (*.csl);;All Files (*)",
+                                                  "csl Files (*.csl);;Archive databases (*.csldb);;All Files (*)",
                                                   options=options)
 
         if fileName:
             head, tail = os.path.split(fileName)
             self.settings.setValue('CslDir', head)
 
-            with open(fileName, 'w') as fs:
-                fs.write('\r\n')
+            if archivedb.is_database(fileName):
+                archivedb.create(fileName)
+            else:
+                with open(fileName, 'w') as fs:
+                    fs.write('\r\n')
 
             self.display(fileName, colour='darkgreen')
             self.display('Created.', colour='darkgreen')
@@ -190,7 +198,7 @@ class MainApp(QWidget):
         fileName, _ = QFileDialog.getOpenFileName(self,
                                                   "Open csl file",
                                                   cslDir,
-                                                  "csl Files (*.csl);;All Files (*)",
+                                                  "csl Files (*.csl);;Archive databases (*.csldb);;All Files (*)",
                                                   options=options)
 
         if fileName:  # fileName is empty if cancelled
@@ -203,9 +211,20 @@ class MainApp(QWidget):
 
             self.setWindowTitle(TITLE + ' - ' + tail)
 
+            # processEvents keeps the window up to date while the files are added,
+            # so stop another file being added or the window closed until they are
+            self.pushButtonCreate.setEnabled(False)
+            self.pushButtonAdd.setEnabled(False)
+            self.canClose = False
+
             self.progressBar.setMaximum(0)
-            with wait_cursor():
-                self.addEdiFiles(fileName, head, tail)
+            try:
+                with wait_cursor():
+                    self.addEdiFiles(fileName, head, tail)
+            finally:
+                self.pushButtonCreate.setEnabled(True)
+                self.pushButtonAdd.setEnabled(True)
+                self.canClose = True
             self.progressBar.setMaximum(1)
             self.progressBar.setValue(1)
 
@@ -231,77 +250,61 @@ class MainApp(QWidget):
             # initialise the dictionary
             self.archiveDict = dict()
 
-            warnings = read_archive_file(cslFile, self.archiveDict)
-            # check returned warnings and display any
-            if warnings:
-                QMessageBox.warning(self, "File Format Warning!",
-                                    warnings,
-                                    QMessageBox.Ok)
+            # an archive database is added to without reading it all
+            if not archivedb.is_database(cslFile):
+                warnings = read_archive_file(cslFile, self.archiveDict)
+                # check returned warnings and display any
+                if warnings:
+                    QMessageBox.warning(self, "File Format Warning!",
+                                        warnings,
+                                        QMessageBox.Ok)
 
             self.processAllEdiFiles(files, cslFile)
 
     def processAllEdiFiles(self, ediFileNames, cslFile):
-        """Process one or more files who's file names are in 'EdiFileNames' """
+        """Process one or more files who's file names are in 'EdiFileNames'
+
+            The files are read at the same time by a pool of processes,
+            and added to the archive in the order they were selected."""
+
+        self.changedContacts = set()
 
-        for ediFile in ediFileNames:
-            self.display(ediFile + ':')
+        for ediContacts in read_edi_files(ediFileNames, default_processes()):
+            self.display(ediContacts.file_name + ':')
             self.display('Contacts not already in Archive:')
             self.display()
-            self.addNewContacts(ediFile, self.archiveDict)
+            if archivedb.is_database(cslFile):
+                # add the file's contacts to the database in one transaction
+                for contact, date in archivedb.add_contacts(cslFile, ediContacts.contacts):
+                    self.display(contact[0] + ',' + contact[1] + ',' + contact[2] + ' on ' + date)
+            else:
+                self.addNewContacts(ediContacts, self.archiveDict)
             self.display()
 
-        # Re-write the processed archive
-        re_write_csl(cslFile, self.archiveDict)
-
-    def addNewContacts(self, FileName, archiveDict):
-
-        """Parses the .edi file and adds the contact details to the list."""
+            if ediContacts.error is not None:
+                raise ediContacts.error
 
-        # initialise
-        gettingData = False
+            # keep the window up to date while the other files are read
+            QApplication.processEvents()
 
-        # Open the input file
-        f = open(FileName, 'r')
+        if not archivedb.is_database(cslFile):
+            # append the new and changed contacts to the archive's journal first,
+            # so they are kept if re-writing the archive is interrupted
+            append_journal(cslFile, self.archiveDict, [contact for contact in self.archiveDict
+                                                       if contact in self.changedContacts])
 
-        try:
-            for line in f:  # iterate through all the lines in file 'f'
+            # Re-write the processed archive, which folds the journal into it, for Minos
+            re_write_csl(cslFile, self.archiveDict)
 
-                if gettingData:
+    def addNewContacts(self, ediContacts, archiveDict):
 
-                    # parameters in 'line' are separated by ';'
-                    # split the line and create a list of the parameters
-                    parameters = line.split(';')
+        """Adds the contact details read from an .edi file (an EdiContacts) to the archive."""
 
-                    if len(parameters) >= 10:  # check line contains 10 or more parameters
+        newContacts, changedContacts = add_edi_contacts(archiveDict, ediContacts)
+        self.changedContacts |= changedContacts
 
-                        # create a tuple (callsign,locator,exchange)
-                        contact = (parameters[2], parameters[9], parameters[8])
-                        date = format_date(parameters[0])
-
-                        if contact not in archiveDict:
-                            if contact[0] != '':  # ignore blank callsign entries
-                                # append the parameters to the list and text display
-                                timesSeen = 1
-                                archiveDict[contact] = [timesSeen, date + ';']
-                                self.display(contact[0] + ',' + contact[1] + ',' + contact[2] + ' on ' + date)
-                        else:
-                            # don't repeatedly add the same contact on the same date
-                            if date not in archiveDict[contact][1]:
-                                # increment times seen
-                                archiveDict[contact][0] += 1
-
-                                # add date to contact
-                                archiveDict[contact][1] += date + ';'
-
-                elif '[QSORecords' in line:
-                    # skip until the line contains [QSORecords
-                    gettingData = True
-        finally:
-            if not gettingData:
-                archiveDict[('', '', '')] = [0, ';']  # Create dummy entry if file does not contain [QSORecords
-
-            # close file at end of input
-            f.close()
+        for contact, date in newContacts:
+            self.display(contact[0] + ',' + contact[1] + ',' + contact[2] + ' on ' + date)
 
     def closeEvent(self, event):
 
@@ -309,9 +312,14 @@ class MainApp(QWidget):
 
             Do any cleanup actions before the application closes.
 
+            if self.canClose:
             Saves the application geometry.
             """
 
+        if not self.canClose:
+            event.ignore()
+            return
+
         self.settings.setValue("geometry", self.saveGeometry())
 
         event.accept()
@@ -363,6 +371,7 @@ class MainApp(QWidget):
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     mainWindow = MainApp()
     sys.exit(app.exec_())
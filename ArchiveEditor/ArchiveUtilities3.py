@@ -29,6 +29,7 @@
 # standard imports
 import sys
 import os
+import multiprocessing
 
 # PyQt interface imports, Qt5
 from PyQt5.QtWidgets import *
@@ -205,6 +206,9 @@ class MainApp(QMainWindow):
 
 if __name__ == "__main__":
 
+        # needed by the Archive Checker process pool in the frozen Windows build
+        multiprocessing.freeze_support()
+
         app = QApplication(sys.argv)
         mainWindow = MainApp()
         sys.exit(app.exec_())
@@ -37,6 +37,8 @@ import PyQt5.uic as uic
 
 # Archive modules
 from Utilities import *
+from archiveindex import archive_index, fuzzy_match_many
+from editdistance import MAX_EDIT_DISTANCE
 import helpbrowser
 
 TITLE = 'Contest Reporter 3.0'
@@ -102,6 +104,8 @@ class MainApp(QWidget):
 
         # Restore window position etc. from saved settings
         self.restoreGeometry(self.settings.value('geometry', type=QByteArray))
+        self.spinBoxEditDistance.setMaximum(MAX_EDIT_DISTANCE)
+        self.spinBoxEditDistance.setValue(self.settings.value('EditDistance', EDIT_DISTANCE, type=int))
 
         # Set attribute so the window is deleted completly when closed
         self.setAttribute(Qt.WA_DeleteOnClose)
@@ -156,7 +160,7 @@ class MainApp(QWidget):
             theArchiveFileName, _ = QFileDialog.getOpenFileName(self,
                     'Open the Archive file to check against',
                     cslDir,
-                    "csl Files (*.csl);;All Files (*)",
+                    "csl Files (*.csl);;Archive databases (*.csldb);;All Files (*)",
                     options = options)
 
             if theArchiveFileName:
@@ -177,10 +181,13 @@ class MainApp(QWidget):
 
                 similarLocatorsChecked = self.checkBoxSimilarLocators.isChecked()
 
+                editDistance = self.spinBoxEditDistance.value()
+                self.settings.setValue('EditDistance', editDistance)
+
                 #Create the report
                 QApplication.setOverrideCursor(Qt.WaitCursor)
                 self.repaint()
-                self.createReport(theArchiveFileName, theEntryFileName, similarLocatorsChecked)
+                self.createReport(theArchiveFileName, theEntryFileName, similarLocatorsChecked, editDistance)
                 QApplication.restoreOverrideCursor()
 
     def processUniques(self, similarLocatorsChecked):
@@ -194,7 +201,7 @@ class MainApp(QWidget):
             #Display the contact
             self.display('  '+contact[0]+','+contact[1]+','+contact[2])
             #Get any fuzzy matches
-            matchesList= fuzzy_match(contact, similarLocatorsChecked, self.archiveDict)
+            matchesList= self.nearMatches[contact]
             #Display the fuzzy matches list
             if matchesList!=[]:
                 self.display('    Near Matches:')
@@ -230,7 +237,7 @@ class MainApp(QWidget):
             else:
                 self.display('      worked '+str(seen[0])+' times on '+seen[1])
             #Get ant fuzzy matches
-            matchesList= fuzzy_match(contact, similarLocatorsChecked, self.archiveDict)
+            matchesList= self.nearMatches[contact]
             #Display the fuzzy match list
             if matchesList!=[]:
                 self.display('    Near Matches:')
@@ -244,7 +251,7 @@ class MainApp(QWidget):
             if report:
                 self.display(report, colour='red')
 
-    def createReport(self, theArchiveFileName, theEntryFileName, similarLocatorsChecked):
+    def createReport(self, theArchiveFileName, theEntryFileName, similarLocatorsChecked, editDistance=EDIT_DISTANCE):
 
         # Initialise Lists and dictionary
         self.entryList=[]
@@ -269,12 +276,20 @@ class MainApp(QWidget):
                 warnings,
                 QMessageBox.Ok)
 
+        # index the archive once so near matches are looked up, not searched for
+        # (the index is kept in the archive's .csl.cache for next time)
+        self.archiveIndex = archive_index(theArchiveFileName, self.archiveDict)
+
         for contact in self.entryList:
             if contact not in self.archiveDict:
                 self.uniqueList.append(contact)
             else:
                 self.workedBeforeList.append(contact)
 
+        # find the near matches of the whole entry in one sweep of the archive
+        self.nearMatches = fuzzy_match_many(self.entryList, self.archiveIndex, similarLocatorsChecked,
+                                            edit_distance=editDistance)
+
         self.processUniques(similarLocatorsChecked)
         self.processWorkedBefore(similarLocatorsChecked)
 
@@ -37,6 +37,8 @@ import PyQt5.uic as uic
 
 # Archive modules
 from Utilities import *
+from archivemerge import merge_archives
+from archivediff import diff_merge
 import helpbrowser
 
 TITLE = 'Merge Archives 3.0'
@@ -139,7 +141,7 @@ class MainApp(QWidget):
         self.archiveFirstFileName, _ = QFileDialog.getOpenFileName(self,
                 'Choose Archive file to merge from',
                 cslDir,
-                "csl Files (*.csl);;All Files (*)",
+                "csl Files (*.csl);;Archive databases (*.csldb);;All Files (*)",
                 options = options)
 
         if self.archiveFirstFileName:
@@ -152,7 +154,7 @@ class MainApp(QWidget):
             self.ArchiveSecondFile, _ = QFileDialog.getOpenFileName(self,
                     'Choose an Archive to merge contacts into',
                     cslDir,
-                    "csl Files (*.csl);;All Files (*)",
+                    "csl Files (*.csl);;Archive databases (*.csldb);;All Files (*)",
                     options = options)
 
             if self.ArchiveSecondFile:
@@ -164,45 +166,53 @@ class MainApp(QWidget):
                 self.settings.setValue('CslDir', head)
                 self.setWindowTitle(TITLE + ' - ' + tail)
 
+                # show what merging would change, before anything is written
+                QApplication.setOverrideCursor(Qt.WaitCursor)
+                self.Changes(self.archiveFirstFileName, self.ArchiveSecondFile)
+                QApplication.restoreOverrideCursor()
+
+                reply = QMessageBox.question(self, 'Merge Archives',
+                                             'Merge these changes into ' + tail + '?',
+                                             QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes)
+                if reply != QMessageBox.Yes:
+                    self.display('Not merged', colour='red')
+                    return
+
                 #Merge the archives
                 QApplication.setOverrideCursor(Qt.WaitCursor)
                 self.Merge(self.archiveFirstFileName, self.ArchiveSecondFile)
                 QApplication.restoreOverrideCursor()
 
-    def Merge(self, ArchiveFirstFileName, ArchiveSecondFileName):
+    def Changes(self, ArchiveFirstFileName, ArchiveSecondFileName):
+
+        # the two archives and the merged contacts are compared as sorted streams, nothing is written
+        stats = diff_merge([ArchiveSecondFileName, ArchiveFirstFileName], ArchiveSecondFileName)
 
-        #Initialise Lists and dictionary
+        self.display()
+        self.display('Changes merging would make')
+        for line in str(stats).split('\n'):
+            self.display(line, colour='darkgreen')
 
-        self.archiveFirstDict=dict()
-        self.archiveSecondDict=dict()
+    def Merge(self, ArchiveFirstFileName, ArchiveSecondFileName):
 
         self.display()
         self.display('Contacts added to Archive')
 
-        warnings = read_archive_file(ArchiveFirstFileName, self.archiveFirstDict)
-        # check returned warnings and display any
-        if warnings:
-            QMessageBox.warning(self, "First archive file Format Warning!",
-                                warnings,
-                                QMessageBox.Ok)
+        # the archives are read and written as sorted streams, a row at a time,
+        # the dates of a contact in both archives are merged once each and the times worked counted from them
+        stats = merge_archives([ArchiveSecondFileName, ArchiveFirstFileName], ArchiveSecondFileName,
+                               added=lambda contact: self.display(contact[0]+','+contact[1]+','+contact[2]))
+
+        self.display()
+        for line in str(stats).split('\n'):
+            self.display(line, colour='darkgreen')
 
-        warnings = read_archive_file(ArchiveSecondFileName, self.archiveSecondDict)
         # check returned warnings and display any
-        if warnings:
-            QMessageBox.warning(self, "Second archive file Format Warning!",
-                                warnings,
+        if stats.warnings:
+            QMessageBox.warning(self, "Archive file Format Warning!",
+                                stats.warnings,
                                 QMessageBox.Ok)
 
-        for contact in self.archiveFirstDict:
-            if contact not in self.archiveSecondDict:
-                self.archiveSecondDict[contact]=self.archiveFirstDict[contact]
-                self.display(contact[0]+','+contact[1]+','+contact[2])
-            else:
-                self.archiveSecondDict[contact][0]+=self.archiveFirstDict[contact][0]
-                self.archiveSecondDict[contact][1]+=self.archiveFirstDict[contact][1]
-
-        re_write_csl(ArchiveSecondFileName, self.archiveSecondDict)
-
     def closeEvent(self, event):
 
         '''Override inherited QMainWindow closeEvent.
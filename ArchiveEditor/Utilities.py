@@ -12,6 +12,22 @@
 #   Now needs Python >= 3.6
 # Version 3.0.3 - March 2018 - un_quote reinstated (still used!)
 # Version 3.0.4 - May 2018 - Added exception handling to csv_rows, convert_times_worked_to_int
+# Version 3.0.5 - October 2026 - fuzzy_match can look up candidates in an ArchiveIndex
+#   (archiveindex.py) instead of scanning the whole archive
+#   callsigns are parsed once into cached CallsignParts
+#   matches_of shared with archiveindex.fuzzy_match_many
+#   optional (edit distance) near matches
+#   near_match_pair compares a pair of contacts once, for the Archive Checker clusters
+#   read_entry_file uses the shared edireader.QSOReader
+#   read_archive_file reads the file in one block and checks the fields directly
+#   parsed archives are cached in a .csl.cache file (archivecache.py)
+#   archives can be kept in an SQLite database (archivedb.py) instead of a .csl file
+#   contacts can be appended to a .csl.journal (archivejournal.py) before re-writing the archive
+#   re_write_csl writes a temporary file and then replaces the archive with it
+#   .edi and .csl files are decoded a line at a time as UTF-8, cp1252 or latin-1 (decoding.py),
+#   rather than stopping at the first line that can't be decoded
+#   write_csl_rows writes rows as they come, so archives can be merged as sorted streams (archivemerge.py)
+#   compile_pipeline composes the row functions once, without a copy of each row; csl_rows and the Editor use it
 
 
 # Copyright (c) 2009-2018, S J Baugh, G4AUC
@@ -42,11 +58,25 @@
 
 import locsquares
 import checkformat
+import editdistance
+import archivecache
+import archivedb
+import archivejournal
+from edireader import QSOReader
+from decoding import decode_text, decode_lines
 import csv
-from itertools import zip_longest, repeat
+import os
+import inspect
+import tempfile
+from itertools import zip_longest, repeat, groupby
 from functools import partial
 from copy import copy, deepcopy
 
+# How fuzzy locator and callsign matches should be, 0=exact match
+LOCATOR_THRESHOLD = 1
+CALLSIGN_THRESHOLD = 1
+EDIT_DISTANCE = 0  # largest edit distance reported as an `(edit distance)` near match, 0 is off
+
 
 def read_entry_file(file_name: str, entryList: list)-> str:
     """Parses the .edi file and adds the contact details to the list.
@@ -55,38 +85,21 @@ def read_entry_file(file_name: str, entryList: list)-> str:
 
     warnings = ''
 
-    # Open the input file
-    with open(file_name, 'r') as f:
-
-        try:
-
-            for line in f:
-                if '[QSORecords' in line:
-                    # skip until the line contains [QSORecords
-                    break
-
-            for line in f:
-                # fields in 'line' are separated by ';'
-                # split the line and create a list of the fields
-                fields = line.split(';')
+    for qso in QSOReader(file_name, ('call', 'exchange', 'locator', 'line')):
 
-                if len(fields) >= 10:  # check >=10 fields (i.e. is a qso record)
+        # create a tuple: contact = (callsign, locator, exchange)
 
-                    # create a tuple: contact = (callsign, locator, exchange)
+        callsign, locator, exchange = qso.call, qso.locator, qso.exchange
 
-                    callsign, locator, exchange = fields[2], fields[9], fields[8]
+        if not checkformat.checkCallsign(callsign):
+            warnings += f'{qso.line.strip()}\n    Callsign: {callsign} does not appear to be a valid callsign.\n\n'
 
-                    if not checkformat.checkCallsign(callsign):
-                        warnings += f'{line.strip()}\n    Callsign: {callsign} does not appear to be a valid callsign.\n\n'
+        if not checkformat.checkLocator(locator):
+            warnings += f'{qso.line.strip()}\n    Locator: {locator} does not appear to be a valid locator.\n\n'
 
-                    if not checkformat.checkLocator(locator):
-                        warnings += f'{line.strip()}\n    Locator: {locator} does not appear to be a valid locator.\n\n'
-
-                    contact = (callsign, locator, exchange)
+        contact = (callsign, locator, exchange)
 
-                    entryList.append(contact)
-        except UnicodeDecodeError:
-            pass
+        entryList.append(contact)
 
     entryList.sort()
 
@@ -102,16 +115,15 @@ def un_quote(s):
 def csv_rows(filename: str, delimiter=',', quotechar='"') -> list:
     """Generator to yield the rows of csv file `filename`.
 
+        The file is decoded a line at a time (see decoding.py).
+
         Yields -> List of strings of the fields in the row
         """
 
-    with open(filename, newline='') as csvfile:
-        csvreader = csv.reader(csvfile, delimiter=delimiter, quotechar=quotechar)
-        try:
-            for row in csvreader:
-                yield row
-        except UnicodeDecodeError:
-            yield ''
+    with open(filename, 'rb') as csvfile:
+        csvreader = csv.reader(decode_lines(csvfile), delimiter=delimiter, quotechar=quotechar)
+        for row in csvreader:
+            yield row
 
 
 def pipeline(data, *funcs):
@@ -136,6 +148,91 @@ def pipeline(data, *funcs):
     return accumulator
 
 
+def compose(funcs: list):
+    """Return a single function calling each of `funcs` in turn, piping the output
+        from function to function."""
+
+    if len(funcs) == 1:
+        return funcs[0]
+
+    funcs = tuple(funcs)
+
+    def composed(data):
+        for func in funcs:
+            data = func(data)
+        return data
+
+    return composed
+
+
+def is_generator_stage(func)-> bool:
+    """Return True if `func` (or the function of a functools.partial) is a generator function."""
+
+    while isinstance(func, partial):
+        func = func.func
+
+    return inspect.isgeneratorfunction(func)
+
+
+def compile_pipeline(*funcs, copier=None):
+    """Compose the functions once into a single callable, to call on many rows
+        without the work pipeline does for each (and without its deepcopy).
+
+        Use:
+        process = compile_pipeline(f1[, f2, f3, ... fn])
+        process(data)
+
+        Normal functions are called in turn on the data, as pipeline does.
+        A generator function takes the data so far as an iterable of items, the
+        normal functions after it are fused into one function mapped over the
+        items it yields, and a generator function after those takes the items
+        that come out, so generator stages are chained without lists between them.
+
+        copier -> if not None, called on the data before the first function,
+            e.g. copy.deepcopy if a function would change the data in place
+
+        Return -> the callable, giving f3(f2(f1(data))) etc., or an iterator
+            of the items if there is a generator function
+        """
+
+    steps = [] if copier is None else [copier]
+    after_generator = False
+
+    for generator, group in groupby(funcs, key=is_generator_stage):
+        if generator:
+            steps.extend(group)
+            after_generator = True
+        elif after_generator:
+            steps.append(partial(map, compose(list(group))))
+        else:
+            steps.append(compose(list(group)))
+
+    if not steps:
+        return lambda data: data
+
+    return compose(steps)
+
+
+def skip_title_row(rows):
+    """Generator to yield the rows of a csl file, skipping any title row (of less than two fields) at beginning."""
+
+    for i, row in enumerate(rows):
+        if not (i == 0 and len(row) < 2):
+            yield row
+
+
+def strip_row_fields(row: list)-> list:
+    """Return a list of the fields of the row, stripped of white space."""
+
+    return [f.strip() for f in row]
+
+
+def row_line(row: list)-> str:
+    """Return the fields of a row put back together into a line, with quotes around the text fields."""
+
+    return ",".join([f'"{f}"' if isinstance(f, str) else str(f) for f in row])
+
+
 def csl_rows(csv_rows) -> list:
     """Generator to yield the rows of csl file.
 
@@ -145,20 +242,8 @@ def csl_rows(csv_rows) -> list:
             [callsign: str, locator: str, exchange: str, timesWorked: int, dates: str]
         """
 
-    defaults = ['', '', '', 1, '']
-
-    # row processing functions
-    pad_the_row = partial(pad_list_with_defaults, padding=defaults)  # make into a single arg func
-
-    def strip_row_fields(row):
-        return [f.strip() for f in row]
-
-    for i, row in enumerate(csv_rows):
-
-        # Skip any title row at beginning
-        if i == 0 and len(row) >= 2:
-            # Equivalent to: yield convert_times_worked_to_int( pad_the_row( strip_row_fields(row)))
-            yield pipeline(row, strip_row_fields, pad_the_row, convert_times_worked_to_int)
+    # Equivalent to: convert_times_worked_to_int( pad_the_row( strip_row_fields(row))) for each row after the title
+    yield from csl_row_pipeline(csv_rows)
 
 
 def pad_list_with_defaults(in_seq, padding) -> list:
@@ -184,32 +269,333 @@ def convert_times_worked_to_int(padded_row: list) -> list:
     return padded_row
 
 
-def read_archive_file(file_name: str, archiveDict: dict)-> str:
-    """Reads an existing .csl file and appends the contents
-        to the archiveDict Dictionary.
+# Default values of the fields missing from a short csl row
+CSL_ROW_DEFAULTS = ['', '', '', 1, '']
 
-        Assume the file exists, read the current contents.
+# The fields of a csl row read from a file as they are kept: stripped, padded with the defaults,
+# with the times worked as an int
+normalised_csl_row = compile_pipeline(strip_row_fields, partial(pad_list_with_defaults, padding=CSL_ROW_DEFAULTS),
+                                      convert_times_worked_to_int)
 
-        Returns a string containing any format warnings."""
+# The rows of a csl file read by the csv module, as csl_rows yields them
+csl_row_pipeline = compile_pipeline(skip_title_row, normalised_csl_row)
 
-    warnings = ''
+
+class ArchiveRows:
+    """The rows of a csl file, held column by column, as parsed from
+        the file or loaded from its .csl.cache.
+
+        callsigns, locators, exchanges, times, dates -> lists of the first five fields of each row
+        extras -> {row number: [fields after the dates]} for the few rows that have more
+        warnings -> list of (line number, warning) for the rows that are not correctly formatted,
+            the line number is 0 if not known
+        """
+
+    __slots__ = ('callsigns', 'locators', 'exchanges', 'times', 'dates', 'extras', 'warnings')
+
+    def __init__(self, columns: tuple = None):
+
+        if columns is None:
+            columns = ([], [], [], [], [], {}, [])
+
+        self.callsigns, self.locators, self.exchanges, self.times, self.dates, self.extras, self.warnings = columns
+
+    def columns(self)-> tuple:
+        """Return the columns as a tuple, as given to ArchiveRows() to make a copy."""
+
+        return self.callsigns, self.locators, self.exchanges, self.times, self.dates, self.extras, self.warnings
+
+    def append(self, row: list, line_number: int = 0, warning: str = '')-> None:
+        """Add a row, padded to at least five fields, and its warning if any."""
+
+        if len(row) > 5:
+            self.extras[len(self.callsigns)] = row[5:]
+
+        self.callsigns.append(row[0])
+        self.locators.append(row[1])
+        self.exchanges.append(row[2])
+        self.times.append(row[3])
+        self.dates.append(row[4])
+
+        if warning:
+            self.warnings.append((line_number, warning))
+
+    def rows(self):
+        """Generator to yield each row as a list of all its fields, as csl_rows would."""
+
+        extras = self.extras
+        for posn, row in enumerate(zip(self.callsigns, self.locators, self.exchanges, self.times, self.dates)):
+            yield list(row) + extras.get(posn, [])
+
+    def update_dict(self, archiveDict: dict)-> None:
+        """Add the rows to the archive dictionary, later rows replacing earlier ones with the same contact."""
+
+        archiveDict.update(zip(zip(self.callsigns, self.locators, self.exchanges),
+                               map(list, zip(self.times, self.dates))))
+
+    def replayed(self, journal_rows)-> 'ArchiveRows':
+        """Return a copy of the rows with the rows of a journal (ArchiveRows) replayed over them.
+
+            A journal row replaces the last row of the same contact, or is added at the end."""
+
+        archive_rows = ArchiveRows(tuple(list(column) for column in self.columns()[:5])
+                                   + (dict(self.extras), list(self.warnings)))
+
+        posns = {contact: posn for posn, contact in enumerate(zip(self.callsigns, self.locators, self.exchanges))}
+
+        for row in journal_rows.rows():
+            posn = posns.get(tuple(row[:3]))
+            if posn is None:
+                posns[tuple(row[:3])] = len(archive_rows.callsigns)
+                archive_rows.append(row)
+            else:
+                archive_rows.times[posn], archive_rows.dates[posn] = row[3:5]
+
+        return archive_rows
+
+    def warning_text(self, line_numbers: bool = False)-> str:
+        """Return the warnings as one string, optionally starting each with its line number."""
+
+        if line_numbers:
+            return ''.join(f'Line {line_number}: {warning}' if line_number else warning
+                           for line_number, warning in self.warnings)
+
+        return ''.join(warning for line_number, warning in self.warnings)
+
+
+def csv_archive_rows(file_name: str)-> ArchiveRows:
+    """Parse an existing .csl file a row at a time with the csv module.
+
+        Used for files that can't be read in one block."""
+
+    archive_rows = ArchiveRows()
 
     # read the current contents of the .csl file
     for row in csl_rows(csv_rows(file_name)):  # iterate through each row in the file
+        warning = ''
         try:
-            line = ",".join([f'"{f}"' if isinstance(f, str) else str(f) for f in row])  # put line back together
-            checkformat.checkLine(line)
+            checkformat.checkLine(row_line(row))
         except checkformat.CheckFormatError as e:
-            warnings += f'{e}\n'
+            warning = f'{e}\n'
 
-        callsign, locator, exchange, timesSeen, dates = row[:5]  # ignore extra fields
+        archive_rows.append(row, 0, warning)
 
-        contact = (callsign, locator, exchange)
+    return archive_rows
 
-        # add timesSeen and dates to the dictionary with contact as key
-        archiveDict[contact] = [timesSeen, dates]
 
-    return warnings
+def read_archive_rows(file_name: str, archiveDict: dict)-> str:
+    """Reads an existing .csl file a row at a time with the csv module and
+        appends the contents to the archiveDict Dictionary.
+
+        Returns a string containing any format warnings."""
+
+    archive_rows = csv_archive_rows(file_name)
+    archive_rows.update_dict(archiveDict)
+
+    return archive_rows.warning_text()
+
+
+def split_csl_text(text: str, line_end: str):
+    """Generator to yield the rows of the text of a csl file.
+
+        line_end -> the line ending used throughout the text, '\\n' or '\\r\\n'
+
+        Correctly formatted plain lines (checkformat.PLAIN_LINE_PATTERN) are split
+        by the pattern, rows of plain or simply quoted fields are split directly,
+        any others (quotes inside fields, commas in quoted fields, fields over
+        several lines) are parsed by csv.reader exactly as csv_rows would.
+
+        Yields -> (line_number, fields, correct) the line number the row starts on,
+            a list of strings of the fields in the row and True if the row is known
+            to be correctly formatted"""
+
+    plain_line = checkformat.PLAIN_LINE_PATTERN.fullmatch
+
+    lines = text.split(line_end)
+    ended = not lines[-1]
+    if ended:
+        lines.pop()  # nothing after the last line ending
+
+    def lines_from(start):
+        # the lines from `start` on with their line endings, as a file would give them
+        for posn in range(start, len(lines)):
+            yield lines[posn] + line_end if ended or posn < len(lines) - 1 else lines[posn]
+
+    posn = 0
+    while posn < len(lines):
+        line = lines[posn]
+        posn += 1
+
+        match = plain_line(line)
+        if match:
+            yield posn, [match[2], match[4], match[6], match[8], match[10]], True
+            continue
+
+        if not line:
+            yield posn, [], False  # a blank line is a row without any fields to csv.reader
+            continue
+
+        fields = line.split(',')
+
+        if '"' in line:
+            fields = [f[1:-1] if len(f) > 1 and f[0] == '"' and f[-1] == '"' else f for f in fields]
+
+            if '"' in ''.join(fields):
+                # let the csv module read the row, and any following lines it runs on to
+                reader = csv.reader(lines_from(posn - 1))
+                yield posn, next(reader, []), False
+                posn += reader.line_num - 1
+                continue
+
+        yield posn, fields, False
+
+
+def check_csl_row(row: list, checked: dict)-> str:
+    """Check the format of the first five fields of a csl row, as checkformat.checkLine
+        does when they are joined back into a line.
+
+        checked -> {(check function, value): result} of the callsign and locator checks,
+            re-used as callsigns and locators are repeated in an archive
+
+        Return -> the checkLine warning, or '' if the row is correctly formatted."""
+
+    callsign, locator, exchange, timesSeen, dates = row[:5]
+
+    fields = callsign + locator + exchange + dates + (timesSeen if isinstance(timesSeen, str) else '')
+
+    if ',' in fields or '"' in fields:
+        correct = False  # the line would split differently, let checkLine decide
+    else:
+        correct = True
+        for check, value in ((checkformat.checkCallsign, callsign), (checkformat.checkLocator, locator)):
+            result = checked.get((check, value))
+            if result is None:
+                result = checked[(check, value)] = check(value)
+            correct = correct and result
+
+        if isinstance(timesSeen, str) or timesSeen < 0:
+            correct = correct and checkformat.checkTimesWorked(str(timesSeen))
+
+        correct = correct and checkformat.checkDates(dates)
+
+    if correct:
+        return ''
+
+    try:
+        checkformat.checkLine(row_line(row))
+    except checkformat.CheckFormatError as e:
+        return f'{e}\n'
+
+    return ''
+
+
+def text_archive_rows(text: str)-> ArchiveRows:
+    """Parse the text of a .csl file, in one block.
+
+        Return -> the ArchiveRows, or None if the text needs to be parsed
+            by csv_archive_rows (mixed or old Mac line endings, NUL characters)."""
+
+    if '\r' not in text:
+        line_end = '\n'
+    elif text.count('\r\n') == text.count('\r') == text.count('\n'):
+        line_end = '\r\n'
+    else:
+        return None  # mixed or old Mac line endings
+
+    if '\0' in text:
+        return None  # let the csv module report it
+
+    archive_rows = ArchiveRows()
+    append = archive_rows.append
+    checked = {}
+
+    for i, (line_number, row, correct) in enumerate(split_csl_text(text, line_end)):
+
+        if correct:
+            row[3] = int(row[3])
+            append(row)
+            continue
+
+        # Skip any title row at beginning
+        if i == 0 and len(row) < 2:
+            continue
+
+        row = normalised_csl_row(row)
+        append(row, line_number, check_csl_row(row, checked))
+
+    return archive_rows
+
+
+def load_archive_rows(file_name: str, use_cache: bool = True)-> ArchiveRows:
+    """Parse an existing .csl file, or load it from its .csl.cache if the file hasn't changed.
+
+        The file is read in one block and each field is checked directly,
+        giving the same rows and warnings as csv_archive_rows.
+
+        use_cache -> if False ignore and don't write the cache.
+
+        The rows of the archive's journal (.csl.journal), if any, are replayed over the file's rows.
+
+        Return -> the ArchiveRows of the file"""
+
+    archive_rows = file_archive_rows(file_name, use_cache)
+
+    journal = archivejournal.read_text(file_name)
+    if journal:
+        # written by append_journal, so it can always be parsed in one block
+        archive_rows = archive_rows.replayed(text_archive_rows(journal))
+
+    return archive_rows
+
+
+def file_archive_rows(file_name: str, use_cache: bool = True)-> ArchiveRows:
+    """Parse an existing .csl file (without its journal), or load it from its .csl.cache."""
+
+    data, signature = archivecache.read_source(file_name)
+
+    if use_cache:
+        cache = archivecache.load(file_name, signature)
+        if cache is not None:
+            return ArchiveRows(cache['rows'])
+
+    archive_rows = text_archive_rows(decode_text(data))
+
+    if archive_rows is None:
+        archive_rows = csv_archive_rows(file_name)
+
+    if use_cache:
+        archivecache.save(file_name, signature, {'rows': archive_rows.columns()})
+
+    return archive_rows
+
+
+def read_archive_file(file_name: str, archiveDict: dict, line_numbers: bool = False, use_cache: bool = True)-> str:
+    """Reads an existing .csl file and appends the contents
+        to the archiveDict Dictionary.
+
+        Assume the file exists, read the current contents.
+
+        The parsed file is cached in a .csl.cache file next to it (see archivecache.py),
+        which is used instead of parsing the file again until the file is changed.
+
+        Contacts appended to the file's .csl.journal (see archivejournal.py) are included.
+
+        line_numbers -> if True start each warning with the number of the line in the file
+            (not for files that have mixed line endings).
+
+        use_cache -> if False ignore and don't write the cache.
+
+        An archive database (.csldb) is read with archivedb.read_archive.
+
+        Returns a string containing any format warnings."""
+
+    if archivedb.is_database(file_name):
+        return archivedb.read_archive(file_name, archiveDict)
+
+    archive_rows = load_archive_rows(file_name, use_cache)
+    archive_rows.update_dict(archiveDict)
+
+    return archive_rows.warning_text(line_numbers)
 
 
 def similarity(s1: str, s2: str)-> int:
@@ -222,8 +608,8 @@ def similarity(s1: str, s2: str)-> int:
     return same
 
 
-def remove_prefix(callsign: str)-> str:
-    """Return a string consisting of a callsign with its prefix removed."""
+def prefix_end(callsign: str)-> int:
+    """Return the position in `callsign` just after its prefix (letters and numbers)."""
 
     posn = 0
     clen = len(callsign)
@@ -239,49 +625,203 @@ def remove_prefix(callsign: str)-> str:
         while (posn < clen) and callsign[posn].isnumeric():
             posn += 1  # skip past prefix numbers
 
-        # posn now points to rest of callsign after the prefix
+    # posn now points to rest of callsign after the prefix
+    return posn
 
-        return callsign[posn:]  # return rest of callsign
-    else:
-        return ''
 
+# Suffixes that are portable (or mobile etc.) designators
+PORTABLE_DESIGNATORS = ('P', 'M', 'MM', 'A', 'AM')
 
-def get_prefix(callsign: str)-> str:
-    """Return a string consisting of the callsign prefix without the last number."""
 
-    posn = 0
-    clen = len(callsign)
+class CallsignParts:
+    """The parts of a callsign, parsed once and then shared.
 
-    if callsign != '':
-        if callsign[0].isnumeric():
-            # callsign starts with a number
-            posn += 1  # skip past it
+        Use callsign_parts(callsign) to get one from the cache rather than
+        making a new one.
 
-        while (posn < clen) and (not callsign[posn].isnumeric()):
-            posn += 1  # skip past prefix letters
+        e.g. for 'G4AUC/P'
+            callsign -> 'G4AUC/P'
+            base -> 'G4AUC' (callsign with its suffix removed)
+            body -> 'AUC/P' (callsign with its prefix removed)
+            prefix -> 'G' (prefix without the last number)
+            suffix -> 'P' (after the last '/', or '')
+            portable -> 'P' (the suffix if it is a portable designator, or '')
+            main_prefix -> 'G' (main prefix of the country, from prefixes.json)
+        """
 
-        while (posn < clen) and (callsign[posn].isnumeric()):
-            posn += 1  # skip past prefix numbers
+    __slots__ = ('callsign', 'base', 'body', 'prefix', 'suffix', 'portable', '_main_prefix')
 
-        # `posn` now points to rest of callsign after the prefix
+    def __init__(self, callsign: str):
 
-        # return prefix of callsign, less last number
-        return callsign[:posn - 1]
-    else:
-        return ''
+        self.callsign = callsign
+
+        posn = prefix_end(callsign)
+        self.body = callsign[posn:]
+        self.prefix = callsign[:posn - 1] if callsign else ''
+
+        slashPosn = callsign.rfind('/')
+        if slashPosn != -1:
+            self.base = callsign[:slashPosn]
+            self.suffix = callsign[slashPosn + 1:]
+        else:
+            self.base = callsign
+            self.suffix = ''
+
+        self.portable = self.suffix if self.suffix in PORTABLE_DESIGNATORS else ''
+
+        self._main_prefix = None  # looked up when first needed
+
+    @property
+    def main_prefix(self)-> str:
+        """The main prefix of the country of the callsign, '' if not known."""
+
+        if self._main_prefix is None:
+            # Initialise the module if not already done
+            if locsquares.locatorsquares is None:
+                locsquares.initModule()
+
+            self._main_prefix = locsquares.LookUpCall(self.callsign)
+
+        return self._main_prefix
+
+    def __repr__(self):
+
+        return f'CallsignParts({self.callsign!r})'
+
+# Interned CallsignParts, callsign -> CallsignParts
+_callsign_parts = {}
+
+
+def callsign_parts(callsign: str)-> CallsignParts:
+    """Return the (cached) CallsignParts of `callsign`."""
+
+    try:
+        return _callsign_parts[callsign]
+    except KeyError:
+        parts = _callsign_parts[callsign] = CallsignParts(callsign)
+        return parts
+
+
+def remove_prefix(callsign: str)-> str:
+    """Return a string consisting of a callsign with its prefix removed."""
+
+    return callsign_parts(callsign).body
+
+
+def get_prefix(callsign: str)-> str:
+    """Return a string consisting of the callsign prefix without the last number."""
+
+    return callsign_parts(callsign).prefix
 
 
 def remove_suffix(callsign: str)-> str:
     """Return a string consisting of a callsign with its suffix removed."""
 
-    slashPosn = callsign.rfind('/')
-    if slashPosn != -1:
-        return callsign[:slashPosn]
-    else:
-        return callsign
+    return callsign_parts(callsign).base
 
 
-def fuzzy_match(contact: tuple, similar_locators_checked: bool, archive_dict: dict) -> list:
+def match_labels(contact: tuple, archive_contact: tuple, similar_locators_checked: bool,
+                 callsign_threshold: int = CALLSIGN_THRESHOLD, edit_distance: int = EDIT_DISTANCE) -> list:
+    """Return the ways in which `archive_contact` is a near match of `contact`.
+
+        contact, archive_contact -> (callsign: str, locator: str, exchange: str)
+
+        The rules are not symmetric, swapping the contacts may give different labels.
+
+        edit_distance -> if not 0, callsigns within this many inserted, deleted or changed
+            characters that no other callsign rule found are labelled `(edit distance)`
+
+        Return -> a list of labels in report order e.g. ['(same locator)', '(similar callsign)'],
+            empty if not a near match or if the contacts are the same."""
+
+    locator_threshold = LOCATOR_THRESHOLD
+
+    labels = []
+
+    if not (contact == archive_contact):
+
+        # similar locators (performed ONLY if similar_locators_checked is True)
+        if similar_locators_checked and (contact[1]):
+            if similarity(contact[1], archive_contact[1]) >= len(contact[1]) - locator_threshold:
+                labels.append('(similar locator)')
+
+        # Same locator
+        if contact[1] == archive_contact[1]:
+            labels.append('(same locator)')
+
+        # Different locators
+        if (contact[0] == archive_contact[0]) and (contact[1] != archive_contact[1]):
+            labels.append('(different locator)')
+
+        # check callsigns
+        sameness = similarity(contact[0], archive_contact[0])
+        if (sameness >= len(contact[0]) - callsign_threshold) and (sameness != len(contact[0])):
+            labels.append('(similar callsign)')
+
+        if contact[0] != archive_contact[0]:
+
+            parts, archive_parts = callsign_parts(contact[0]), callsign_parts(archive_contact[0])
+
+            # different prefix
+            if parts.base == archive_parts.base:
+                labels.append('(different suffix)')
+
+            # different suffix
+            if parts.body == archive_parts.body:
+                labels.append('(different prefix)')
+
+            # inserted or dropped characters, only if no other callsign rule found them
+            if edit_distance and contact[0] and '(similar callsign)' not in labels \
+                    and parts.base != archive_parts.base and parts.body != archive_parts.body:
+                if editdistance.within(contact[0], archive_contact[0], edit_distance):
+                    labels.append('(edit distance)')
+
+    return labels
+
+
+def near_match_pair(contact: tuple, other: tuple, similar_locators_checked: bool,
+                    callsign_threshold: int = CALLSIGN_THRESHOLD, edit_distance: int = EDIT_DISTANCE) -> bool:
+    """Return True if either contact is a near match of the other, as
+        bool(match_labels(contact, other) or match_labels(other, contact)),
+        comparing the two only once.
+
+        Only the similar callsign and similar locator rules depend on which way
+        round the contacts are, and those from the lengths of each."""
+
+    if contact == other:
+        return False
+
+    callsign, locator = contact[0], contact[1]
+    other_callsign, other_locator = other[0], other[1]
+
+    if locator == other_locator:
+        return True
+
+    if similar_locators_checked and (locator or other_locator):
+        sameness = similarity(locator, other_locator)
+        if (locator and sameness >= len(locator) - LOCATOR_THRESHOLD) or \
+                (other_locator and sameness >= len(other_locator) - LOCATOR_THRESHOLD):
+            return True
+
+    if callsign == other_callsign:
+        return True  # (different locator)
+
+    sameness = similarity(callsign, other_callsign)
+    if (len(callsign) - callsign_threshold <= sameness != len(callsign)) or \
+            (len(other_callsign) - callsign_threshold <= sameness != len(other_callsign)):
+        return True
+
+    parts, other_parts = callsign_parts(callsign), callsign_parts(other_callsign)
+    if parts.base == other_parts.base or parts.body == other_parts.body:
+        return True
+
+    # neither way round was a similar callsign, so either way round may be an edit distance
+    return bool(edit_distance and (callsign or other_callsign)
+                and editdistance.within(callsign, other_callsign, edit_distance))
+
+
+def fuzzy_match(contact: tuple, similar_locators_checked: bool, archive_dict: dict, index=None,
+                callsign_threshold: int = CALLSIGN_THRESHOLD, edit_distance: int = EDIT_DISTANCE) -> list:
     """Find matches of `contact` in the archive_dict in a fuzzy manner.
 
         contact -> (callsign: str, locator: str, exchange: str)
@@ -290,55 +830,41 @@ def fuzzy_match(contact: tuple, similar_locators_checked: bool, archive_dict: di
                              ('G1KAW', 'IO91RH', ''): [1, '2017/03/07;']
                              }
 
-        Return a list of matching contacts which is a list of tuples like:
-            ('G4AUC', 'IO91OJ', 'RG', 1, '(same locator)', 'dates')"""
+        index -> optional archiveindex.ArchiveIndex built from archive_dict.
+            If given only the index candidates are checked, not the whole archive.
 
-    # How fuzzy locator and callsign matches should be, 0=exact match
-    locator_threshold = 1
-    callsign_threshold = 1
+        callsign_threshold -> number of places that may differ in a `(similar callsign)`
 
-    fuzzy_matches_list = []  # Contents eg: ('G4AUC', 'IO91OJ', 'RG', 1, '(same locator)', 'dates')
+        edit_distance -> number of edits allowed in an `(edit distance)`, 0 doesn't look for them
 
-    for archive_contact, when_worked in archive_dict.items():
+        Return a list of matching contacts which is a list of tuples like:
+            ('G4AUC', 'IO91OJ', 'RG', 1, '(same locator)', 'dates')"""
 
-        # when_worked e.g. [1, '2018/1/2;']
-        # archive_contact = (callsign, locator, exchange)
+    if index is None:
+        archive_contacts = archive_dict.items()
+    else:
+        archive_contacts = index.candidates(contact, similar_locators_checked, callsign_threshold, edit_distance)
 
-        if not (contact == archive_contact):
+    return matches_of(contact, archive_contacts, similar_locators_checked, callsign_threshold, edit_distance)
 
-            # similar locators (performed ONLY if similar_locators_checked is True)
-            if similar_locators_checked and (contact[1]):
-                if similarity(contact[1], archive_contact[1]) >= len(contact[1]) - locator_threshold:
-                    fuzzy_matches_list.append((archive_contact[0], archive_contact[1], archive_contact[2], when_worked[0],
-                                             '(similar locator)', when_worked[1]))
 
-            # Same locator
-            if contact[1] == archive_contact[1]:
-                fuzzy_matches_list.append((archive_contact[0], archive_contact[1], archive_contact[2], when_worked[0],
-                                         '(same locator)', when_worked[1]))
+def matches_of(contact: tuple, archive_contacts, similar_locators_checked: bool,
+               callsign_threshold: int = CALLSIGN_THRESHOLD, edit_distance: int = EDIT_DISTANCE) -> list:
+    """Return the fuzzy matches list of `contact` among the archive_contacts.
 
-            # Different locators
-            if (contact[0] == archive_contact[0]) and (contact[1] != archive_contact[1]):
-                fuzzy_matches_list.append((archive_contact[0], archive_contact[1], archive_contact[2], when_worked[0],
-                                         '(different locator)', when_worked[1]))
+        archive_contacts -> iterable of (archive_contact, when_worked), e.g. archive_dict.items()"""
 
-            # check callsigns
-            sameness = similarity(contact[0], archive_contact[0])
-            if (sameness >= len(contact[0]) - callsign_threshold) and (sameness != len(contact[0])):
-                fuzzy_matches_list.append((archive_contact[0], archive_contact[1], archive_contact[2], when_worked[0],
-                                         '(similar callsign)', when_worked[1]))
+    fuzzy_matches_list = []  # Contents eg: ('G4AUC', 'IO91OJ', 'RG', 1, '(same locator)', 'dates')
 
-            if contact[0] != archive_contact[0]:
+    for archive_contact, when_worked in archive_contacts:
 
-                # different prefix
-                if remove_suffix(contact[0]) == remove_suffix(archive_contact[0]):
-                    fuzzy_matches_list.append((archive_contact[0], archive_contact[1], archive_contact[2], when_worked[0],
-                                             '(different suffix)', when_worked[1]))
+        # when_worked e.g. [1, '2018/1/2;']
+        # archive_contact = (callsign, locator, exchange)
 
-                # different suffix
-                if remove_prefix(contact[0]) == remove_prefix(archive_contact[0]):
-                    fuzzy_matches_list.append((archive_contact[0], archive_contact[1], archive_contact[2], when_worked[0],
-                                             '(different prefix)', when_worked[1]))
+        for label in match_labels(contact, archive_contact, similar_locators_checked, callsign_threshold,
+                                  edit_distance):
+            fuzzy_matches_list.append((archive_contact[0], archive_contact[1], archive_contact[2], when_worked[0],
+                                       label, when_worked[1]))
 
     return fuzzy_matches_list
 
@@ -351,7 +877,7 @@ def check_locator_is_in_correct_country(callsign: str, locator: str)-> str:
     if locsquares.locatorsquares is None:
         locsquares.initModule()
 
-    if not locsquares.isLocInCountry(callsign, locator):
+    if not locsquares.isLocInCountry(callsign, locator, callsign_parts(callsign).main_prefix):
         report = f'    Prefix of {callsign} is not in Locator Square {locator}'
     else:
         report = None
@@ -382,23 +908,96 @@ def sort_dates(dates: str)-> str:
 def re_write_csl(file_name: str, archive_dict: dict)-> None:
     """Re-writes (or creates) the .csl file from the archive_dict.
 
-        always include times_seen and quotes in this version."""
+        always include times_seen and quotes in this version.
+
+        An archive database (.csldb) is updated with archivedb.write_archive.
+
+        Any journal of the file is removed, as archive_dict was read with it replayed."""
+
+    if archivedb.is_database(file_name):
+        archivedb.write_archive(file_name, archive_dict)
+        return
+
+    key_list = list(archive_dict.keys())
+    key_list.sort()  # Sort the keys so that the Dict can be written in callsign order
+
+    write_csl_rows(file_name, ((p, archive_dict[p]) for p in key_list))
+
+
+def write_csl_rows(file_name: str, items)-> None:
+    """Write (or replace) the .csl file `file_name` with the rows of `items`, as re_write_csl does.
+
+        items -> iterable of (contact, [times_seen, dates]) in the order to write them,
+            each written as it comes, so it can be a generator
+
+        Any journal of the file is removed."""
+
+    # write a temporary file next to the csl file, which then replaces it,
+    # so the archive is never left half written
+    head, tail = os.path.split(os.path.abspath(file_name))
+    fd, temp_name = tempfile.mkstemp(prefix=tail + '.', suffix='.tmp', dir=head)
+    try:
+        with open(fd, 'w') as fs:
+
+            for p, when_worked in items:
+                callsign_out, locator_out, exchange_out = p
+
+                if callsign_out or exchange_out:  # ignore blank callsign entries unless title
+                    times_seen, dates = when_worked
+                    # a single date ending with ';' (most contacts) is already sorted
+                    if dates.find(';') != len(dates) - 1 or dates == ';':
+                        dates = sort_dates(dates)
+                    fs.write(csl_line(callsign_out, locator_out, exchange_out, times_seen, dates))
+
+            fs.flush()
+            os.fsync(fs.fileno())
+
+        copy_mode(file_name, temp_name)
+        os.replace(temp_name, file_name)
+    except BaseException:
+        os.remove(temp_name)
+        raise
+
+    archivejournal.remove(file_name)
+
+
+def copy_mode(file_name: str, temp_name: str)-> None:
+    """Give the temporary file that will replace `file_name` the permissions of
+        `file_name`, or those of a new file if it doesn't exist."""
+
+    try:
+        mode = os.stat(file_name).st_mode & 0o7777
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        mode = 0o666 & ~umask
+
+    os.chmod(temp_name, mode)
+
+
+def csl_line(callsign: str, locator: str, exchange: str, times_seen: int, dates: str)-> str:
+    """Return the line of a .csl file for a contact, with quotes around the text fields."""
+
+    return '"{:s}","{:s}","{:s}","{:d}","{:s}"\n'.format(callsign, locator, exchange, times_seen, dates)
+
+
+def append_journal(file_name: str, archive_dict: dict, contacts)-> None:
+    """Append the rows of `contacts` (keys of archive_dict, as it is now) to the journal
+        of the .csl file `file_name`, instead of re-writing the whole file."""
+
+    archivejournal.append(file_name, [csl_line(*contact, *archive_dict[contact]) for contact in contacts
+                                      if contact[0] or contact[2]])
 
-    # re-open the csl file, for write this time
-    with open(file_name, 'w') as fs:
 
-        key_list = list(archive_dict.keys())
-        key_list.sort()  # Sort the keys so that the Dict can be written in callsign order
+def compact_journal(file_name: str)-> None:
+    """Fold the journal of the .csl file `file_name`, if it has one, into the file."""
 
-        # re-write the list
-        for p in key_list:
-            callsign_out, locator_out, exchange_out = p
-            times_seen, dates = archive_dict[p]
-            dates_sorted = sort_dates(dates)
+    if archivejournal.read_text(file_name) is None:
+        return
 
-            if callsign_out or exchange_out:  # ignore blank callsign entries unless title
-                fs.write('"{:s}","{:s}","{:s}","{:d}","{:s}"\n'.format(callsign_out, locator_out,
-                                                                       exchange_out, times_seen, dates_sorted))
+    archive_dict = {}
+    read_archive_file(file_name, archive_dict)
+    re_write_csl(file_name, archive_dict)
 
 
 def format_date(date_in: str)-> str:
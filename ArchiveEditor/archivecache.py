@@ -0,0 +1,105 @@
+"""Binary sidecar cache (.csl.cache) of a parsed archive file and its lookup indexes.
+
+    The cache is only used if the size, modification time and content hash
+    of the .csl file are the same as when it was written, otherwise it is
+    ignored and written again. Any problem reading or writing it is not an
+    error, the archive is just parsed from the .csl file.
+
+    Uses only the standard library (marshal, hashlib) so it can be imported by Utilities."""
+
+# Version 1.0, October 2026
+
+import os
+import sys
+import marshal
+import hashlib
+import struct
+from array import array
+
+MAGIC = b'CSLCACHE'
+
+# Version of the layout of the cache, change it if the parsed contents change
+# 2 - the file is decoded a line at a time, not in the locale encoding
+CACHE_VERSION = 2
+
+# magic, cache version, Python major and minor version (the marshal format can change between them),
+# byte order and int size (the indexes are saved as arrays of unsigned ints)
+HEADER = struct.Struct('<8sIBBcB')
+
+
+def cache_name(file_name: str)-> str:
+    """Return the name of the cache file kept next to the archive `file_name`."""
+
+    return file_name + '.cache'
+
+
+def read_source(file_name: str):
+    """Read the archive `file_name` as bytes.
+
+        Return -> (data, signature) the contents of the file and its signature,
+            which is None if the file changed while it was read."""
+
+    stat = os.stat(file_name)
+
+    with open(file_name, 'rb') as f:
+        data = f.read()
+
+    if len(data) != stat.st_size:
+        return data, None
+
+    return data, (stat.st_size, stat.st_mtime_ns, hashlib.sha256(data).hexdigest())
+
+
+def header()-> bytes:
+    """Return the header of a cache written by this version on this computer."""
+
+    return HEADER.pack(MAGIC, CACHE_VERSION, *sys.version_info[:2], sys.byteorder[0].encode(),
+                       array('I').itemsize)
+
+
+def load(file_name: str, signature: tuple):
+    """Load the cache of the archive `file_name`.
+
+        Return -> the cached contents (a dictionary), or None if there
+            is no cache, it can't be read or its signature is different."""
+
+    if signature is None:
+        return None
+
+    try:
+        with open(cache_name(file_name), 'rb') as f:
+            data = f.read()
+        if data[:HEADER.size] != header():
+            return None
+        contents = marshal.loads(data[HEADER.size:])
+    except (OSError, ValueError, EOFError, TypeError):
+        return None
+
+    if not isinstance(contents, dict) or contents.get('signature') != signature:
+        return None
+
+    return contents
+
+
+def save(file_name: str, signature: tuple, contents: dict)-> None:
+    """Save `contents` (a dictionary of marshal-able values) as the cache of the archive `file_name`.
+
+        The cache is written to a temporary file which then replaces the old one,
+        so a cache is never left half written."""
+
+    if signature is None:
+        return
+
+    contents = dict(contents, signature=signature)
+
+    temp_name = cache_name(file_name) + '.tmp'
+    try:
+        with open(temp_name, 'wb') as f:
+            f.write(header())
+            marshal.dump(contents, f)
+        os.replace(temp_name, cache_name(file_name))
+    except (OSError, ValueError):
+        try:
+            os.remove(temp_name)
+        except OSError:
+            pass
@@ -0,0 +1,439 @@
+"""The checks made by the Archive Checker, without any Qt,
+    so that they can be shared out across a pool of processes.
+
+    Also finds the near matching pairs of contacts in the archive, comparing each
+    pair once, and groups them into clusters of probably the same station."""
+
+# Version 1.0, October 2026
+
+import os
+import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+
+from Utilities import near_match_pair, check_locator_is_in_correct_country, EDIT_DISTANCE
+from archiveindex import ArchiveIndex, fuzzy_match_many, archive_index
+
+# Number of chunks given to each process, more chunks balance the load better
+CHUNKS_PER_PROCESS = 8
+
+# Fewest contacts in a chunk, each worker process pickles the archive and indexes it
+# before it can start, so a few contacts are checked sooner in this process
+MIN_CHUNK_SIZE = 250
+
+# Number of archive contacts whose candidates are looked up together when finding near matching pairs
+PAIR_BATCH_SIZE = 1000
+
+# Version of the layout of the results cache (.csl.check) file
+RESULTS_CACHE_VERSION = 2
+
+# The labels Utilities.match_labels gives, a near match is kept as
+# position of the archive contact * len(MATCH_LABELS) + position of its label here
+MATCH_LABELS = ('(similar locator)', '(same locator)', '(different locator)', '(similar callsign)',
+                '(different suffix)', '(different prefix)', '(edit distance)')
+
+
+def default_processes()-> int:
+    """Return the default size of the process pool, the number of CPUs."""
+
+    return os.cpu_count() or 1
+
+
+def display_line(text: str)-> str:
+    """Return `text` as a line of the report, as Engine.display formats it."""
+
+    return f'{text} \n'
+
+
+def contact_report(contact: tuple, when_worked: list, matches_list: list, report)-> str:
+    """Return the text the Archive Checker displays for one archive contact.
+
+        contact -> (callsign, locator, exchange)
+        when_worked -> [timesSeen, dates]
+        matches_list -> the near matches from fuzzy_match
+        report -> the locator/country report or None"""
+
+    timesSeen, dates = when_worked
+
+    # Display the contact
+    text = display_line('\n' + '  ' + contact[0] + ',' + contact[1] + ',' + contact[2])
+    if timesSeen == 1:
+        text += display_line('      worked once on ' + dates)
+    else:
+        text += display_line('      worked ' + str(timesSeen) + ' times on ' + dates)
+
+    # Display the fuzzy match list
+    if matches_list:
+        text += display_line('    Near Matches:')
+        for match in matches_list:
+            text += display_line('    ' + match[0] + ',' + match[1] + ',' + match[2] + ' ' + match[4])
+            if match[3] == 1:
+                text += display_line('       worked once on ' + match[5])
+            else:
+                text += display_line('       worked ' + str(match[3]) + ' times on ' + match[5])
+
+    if report:
+        text += display_line(report)
+
+    return text
+
+
+def check_contacts(contacts: list, archive_dict: dict, similar_locators_checked: bool, index: ArchiveIndex,
+                   edit_distance: int = EDIT_DISTANCE)-> list:
+    """Find the near matches of each of the contacts in the archive.
+
+        edit_distance -> largest `(edit distance)` near match reported, 0 for none
+
+        Return -> a list of the near matches of each contact, in the same order,
+            each a list of numbers made from the position of the archive contact
+            in the archive and the label, as MATCH_LABELS describes."""
+
+    matches = fuzzy_match_many(contacts, index, similar_locators_checked, edit_distance=edit_distance)
+
+    order = index.order
+    label_code = {label: code for code, label in enumerate(MATCH_LABELS)}
+    labels = len(MATCH_LABELS)
+
+    return [[order[match[:3]] * labels + label_code[match[4]] for match in matches[contact]] for contact in contacts]
+
+
+def render_report(contact: tuple, archive_dict: dict, archive_contacts: list, matches: list)-> str:
+    """Return the report text of an archive contact from its near matches.
+
+        archive_contacts -> the contacts of archive_dict in archive order
+        matches -> the near matches as check_contacts gives them"""
+
+    matches_list = []
+    for match in matches:
+        posn, code = divmod(match, len(MATCH_LABELS))
+        archive_contact = archive_contacts[posn]
+        when_worked = archive_dict[archive_contact]
+        matches_list.append((archive_contact[0], archive_contact[1], archive_contact[2], when_worked[0],
+                             MATCH_LABELS[code], when_worked[1]))
+
+    report = check_locator_is_in_correct_country(contact[0], contact[1])
+
+    return contact_report(contact, archive_dict[contact], matches_list, report)
+
+
+# Archive state of a worker process, set up once by init_worker
+_worker = {}
+
+
+def init_worker(archive_dict: dict, similar_locators_checked: bool, edit_distance: int = EDIT_DISTANCE)-> None:
+    """Process pool initializer: index the archive once in each worker process."""
+
+    _worker['archive_dict'] = archive_dict
+    _worker['similar_locators_checked'] = similar_locators_checked
+    _worker['edit_distance'] = edit_distance
+    _worker['index'] = ArchiveIndex(archive_dict)
+
+
+def check_chunk(contacts: list)-> list:
+    """Check a chunk of contacts in a worker process."""
+
+    return check_contacts(contacts, _worker['archive_dict'], _worker['similar_locators_checked'], _worker['index'],
+                          _worker['edit_distance'])
+
+
+def check_archive_matches(archive_dict: dict, similar_locators_checked: bool, processes: int = 1,
+                          contacts: list = None, edit_distance: int = EDIT_DISTANCE, index: ArchiveIndex = None):
+    """Generator to find the near matches of every contact in the archive, in sorted order.
+
+        processes -> largest number of worker processes, 1 checks in this process. Fewer are used
+            if there are not CHUNKS_PER_PROCESS * MIN_CHUNK_SIZE contacts to check for each one.
+        contacts -> the contacts to check, in the order to check them (default every contact, sorted).
+        edit_distance -> largest `(edit distance)` near match reported, 0 for none
+        index -> ArchiveIndex of archive_dict if already made, for checking in this process
+
+        Yields -> the near matches of each contact as check_contacts gives them,
+            in the same order whatever the number of processes."""
+
+    keys = sorted(archive_dict) if contacts is None else contacts
+
+    # no more processes than there are contacts to keep them busy
+    processes = min(processes, len(keys) // (CHUNKS_PER_PROCESS * MIN_CHUNK_SIZE))
+
+    if processes <= 1:
+        if index is None:
+            index = ArchiveIndex(archive_dict)
+        for contact in keys:
+            yield from check_contacts([contact], archive_dict, similar_locators_checked, index, edit_distance)
+        return
+
+    chunk_size = max(1, -(-len(keys) // (processes * CHUNKS_PER_PROCESS)))
+    chunks = [keys[i:i + chunk_size] for i in range(0, len(keys), chunk_size)]
+
+    with ProcessPoolExecutor(max_workers=processes, initializer=init_worker,
+                             initargs=(archive_dict, similar_locators_checked, edit_distance)) as executor:
+        # map returns the chunks in the order they were submitted
+        for matches in executor.map(check_chunk, chunks):
+            yield from matches
+
+
+def check_archive(archive_dict: dict, similar_locators_checked: bool, processes: int = 1, contacts: list = None,
+                  edit_distance: int = EDIT_DISTANCE, index: ArchiveIndex = None):
+    """Generator to check every contact in the archive, in sorted order.
+
+        The arguments are as check_archive_matches.
+
+        Yields -> the report text for each contact, in the same order
+            whatever the number of processes."""
+
+    keys = sorted(archive_dict) if contacts is None else contacts
+    archive_contacts = list(archive_dict)
+
+    for contact, matches in zip(keys, check_archive_matches(archive_dict, similar_locators_checked, processes, keys,
+                                                            edit_distance, index)):
+        yield render_report(contact, archive_dict, archive_contacts, matches)
+
+
+class DisjointSet:
+    """Union-find of hashable items, used to group near matches into clusters."""
+
+    def __init__(self):
+
+        self.parent = {}
+        self.size = {}
+
+    def find(self, item):
+        """Return the representative item of the group containing `item`."""
+
+        parent = self.parent
+        if item not in parent:
+            parent[item] = item
+            self.size[item] = 1
+            return item
+
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]  # path halving
+            item = parent[item]
+
+        return item
+
+    def union(self, a, b)-> None:
+        """Join the groups containing `a` and `b`."""
+
+        a, b = self.find(a), self.find(b)
+        if a != b:
+            if self.size[a] < self.size[b]:
+                a, b = b, a
+            self.parent[b] = a
+            self.size[a] += self.size[b]
+
+    def groups(self)-> list:
+        """Return a list of the groups, each a list of items."""
+
+        groups = {}
+        for item in self.parent:
+            groups.setdefault(self.find(item), []).append(item)
+
+        return list(groups.values())
+
+
+def near_match_pairs(archive_dict: dict, similar_locators_checked: bool, index: ArchiveIndex = None,
+                     edit_distance: int = EDIT_DISTANCE):
+    """Generator to yield each near matching pair of contacts in the archive once.
+
+        A pair is a near match if either contact is a near match of the other,
+        each pair is compared once with Utilities.near_match_pair.
+
+        Yields -> (contact_a, contact_b), contact_a comes before contact_b in archive_dict."""
+
+    if index is None:
+        index = ArchiveIndex(archive_dict)
+
+    order = index.order
+
+    # {posn: positions of the earlier contacts it has already been compared with}
+    compared = {}
+
+    contacts = list(archive_dict)
+    for start in range(0, len(contacts), PAIR_BATCH_SIZE):
+        candidates = index.candidates_many(contacts[start:start + PAIR_BATCH_SIZE], similar_locators_checked,
+                                           edit_distance=edit_distance)
+
+        for contact, archive_contacts in candidates.items():
+            posn = order[contact]
+            earlier = compared.pop(posn, ())
+
+            for archive_contact, when_worked in archive_contacts:
+                other = order[archive_contact]
+
+                if other > posn:
+                    compared.setdefault(other, set()).add(posn)
+                    a, b = contact, archive_contact
+                elif other < posn and other not in earlier:
+                    a, b = archive_contact, contact
+                else:
+                    continue  # itself, or the pair was compared when archive_contact was visited
+
+                if near_match_pair(a, b, similar_locators_checked, edit_distance=edit_distance):
+                    yield a, b
+
+
+def near_match_clusters(archive_dict: dict, similar_locators_checked: bool, index: ArchiveIndex = None,
+                        edit_distance: int = EDIT_DISTANCE)-> list:
+    """Group the archive contacts that are near matches of each other, directly or through other contacts.
+
+        Return -> a sorted list of the clusters (of 2 or more contacts), each a sorted list of contacts."""
+
+    clusters = DisjointSet()
+    for a, b in near_match_pairs(archive_dict, similar_locators_checked, index, edit_distance):
+        clusters.union(a, b)
+
+    return sorted(sorted(group) for group in clusters.groups())
+
+
+def check_archive_clusters(archive_dict: dict, similar_locators_checked: bool, edit_distance: int = EDIT_DISTANCE,
+                           index: ArchiveIndex = None):
+    """Generator to check the archive, reporting near matches as clusters
+        of contacts that are probably the same station.
+
+        index -> ArchiveIndex of archive_dict if already made
+
+        Yields -> the report text for each cluster, in sorted order, then the
+            locator/country report for each contact that has one."""
+
+    for cluster in near_match_clusters(archive_dict, similar_locators_checked, index, edit_distance):
+        text = display_line('\n' + f'  These {len(cluster)} entries are probably the same station:')
+        for contact in cluster:
+            timesSeen, dates = archive_dict[contact]
+            text += display_line('    ' + contact[0] + ',' + contact[1] + ',' + contact[2])
+            if timesSeen == 1:
+                text += display_line('       worked once on ' + dates)
+            else:
+                text += display_line('       worked ' + str(timesSeen) + ' times on ' + dates)
+        yield text
+
+    for contact in sorted(archive_dict):
+        report = check_locator_is_in_correct_country(contact[0], contact[1])
+        if report:
+            yield display_line('\n' + '  ' + contact[0] + ',' + contact[1] + ',' + contact[2]) + display_line(report)
+
+
+def results_cache_name(file_name: str)-> str:
+    """Return the name of the results cache file kept next to the archive `file_name`."""
+
+    return file_name + '.check'
+
+
+def archive_hash(rows: list)-> str:
+    """Return a hash of the contents of the archive rows."""
+
+    return hashlib.sha256(json.dumps(rows).encode('utf-8')).hexdigest()
+
+
+def load_results(file_name: str, options: dict)-> dict:
+    """Load the results cache of the archive `file_name`.
+
+        Return -> the cache contents, or None if there is no cache,
+            or it is unreadable, or it was made with different options."""
+
+    try:
+        with open(results_cache_name(file_name), 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if not isinstance(cache, dict) or cache.get('version') != RESULTS_CACHE_VERSION \
+            or cache.get('options') != options:
+        return None
+
+    return cache
+
+
+def save_results(file_name: str, options: dict, rows: list, matches: dict)-> None:
+    """Save the results cache of the archive `file_name`.
+
+        rows -> [callsign, locator, exchange, timesSeen, dates] in archive order
+        matches -> {contact: near matches as check_contacts gives them}, the
+            report text is made from these when it is displayed
+
+        A cache that can't be written is not an error, the next check just takes longer."""
+
+    cache = {
+        'version': RESULTS_CACHE_VERSION,
+        'options': options,
+        'hash': archive_hash(rows),
+        'rows': [row + [matches[tuple(row[:3])]] for row in rows],
+        }
+
+    try:
+        with open(results_cache_name(file_name), 'w', encoding='utf-8') as f:
+            json.dump(cache, f, separators=(',', ':'))
+    except OSError:
+        pass
+
+
+def check_archive_incremental(file_name: str, archive_dict: dict, similar_locators_checked: bool,
+                              processes: int = 1, edit_distance: int = EDIT_DISTANCE):
+    """Generator to check every contact in the archive, in sorted order,
+        re-using the results of the last check of `file_name` where they can't have changed.
+
+        A contact is checked again if its own row changed, or a row that was
+        or is now one of its near match candidates was added, removed or changed.
+
+        Yields -> the report text for each contact, the same as check_archive."""
+
+    options = {'similar_locators_checked': similar_locators_checked, 'edit_distance': edit_distance}
+
+    # rows in archive order, [callsign, locator, exchange, timesSeen, dates]
+    rows = [list(contact) + list(when_worked) for contact, when_worked in archive_dict.items()]
+    archive_contacts = list(archive_dict)
+
+    cache = load_results(file_name, options)
+
+    if cache is not None and cache.get('hash') == archive_hash(rows):
+        # nothing has changed, so the positions of the near matches haven't either
+        matches = {tuple(row[:3]): row[5] for row in cache['rows']}
+        for contact in sorted(archive_dict):
+            yield render_report(contact, archive_dict, archive_contacts, matches[contact])
+        return
+
+    keys = sorted(archive_dict)
+    matches = {}
+
+    # from the .csl.cache if archive_dict is as read from the file
+    index = archive_index(file_name, archive_dict)
+
+    if cache is None:
+        to_check = keys
+    else:
+        cached_rows = {tuple(row[:3]): row for row in cache['rows']}
+
+        # near matches are listed in archive order, so if rows have moved start again
+        old_order = [contact for contact in cached_rows if contact in archive_dict]
+        new_order = [contact for contact in archive_dict if contact in cached_rows]
+
+        if old_order != new_order:
+            to_check = keys
+        else:
+            changed = [contact for contact, row in cached_rows.items()
+                       if contact not in archive_dict or row[3:5] != list(archive_dict[contact])]
+            changed += [contact for contact in archive_dict if contact not in cached_rows]
+
+            affected = {contact for contact in changed if contact in archive_dict}
+            for contact in changed:
+                affected.update(index.reverse_candidates(contact, similar_locators_checked,
+                                                         edit_distance=edit_distance))
+
+            to_check = [contact for contact in keys if contact in affected]
+
+            # the near matches of the unaffected contacts are unchanged, but rows may have
+            # been added or removed before them, so move them to their new positions
+            old_contacts = list(cached_rows)
+            order = index.order
+            labels = len(MATCH_LABELS)
+            for contact in keys:
+                if contact not in affected:
+                    matches[contact] = [order[old_contacts[match // labels]] * labels + match % labels
+                                        for match in cached_rows[contact][5]]
+
+    matches.update(zip(to_check, check_archive_matches(archive_dict, similar_locators_checked, processes, to_check,
+                                                       edit_distance, index)))
+
+    for contact in keys:
+        yield render_report(contact, archive_dict, archive_contacts, matches[contact])
+
+    save_results(file_name, options, rows, matches)
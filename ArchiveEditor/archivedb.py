@@ -0,0 +1,386 @@
+"""SQLite archive store (.csldb), an alternative to a .csl file for large archives.
+
+    Holds the same contacts as a .csl file, with indexes on the callsign,
+    base callsign, locator, locator square and the dates worked, so single
+    contacts can be looked up without reading the whole archive.
+
+    Utilities.read_archive_file and Utilities.re_write_csl use it for any file
+    with a DATABASE_EXTENSIONS extension, so the programs read and write
+    either kind of archive. A re-write only changes the contacts that differ.
+
+    Uses only the standard library (sqlite3)."""
+
+# Version 1.0, October 2026
+
+import os
+import sqlite3
+
+import Utilities
+
+DATABASE_EXTENSIONS = ('.csldb',)
+
+# Version of the database layout, kept in PRAGMA user_version
+SCHEMA_VERSION = 1
+
+# Contacts inserted or updated at a time
+BATCH_SIZE = 10000
+
+# times_seen has no type so that it is stored exactly as it was read, even if it is not a number
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS contacts (
+    id INTEGER PRIMARY KEY,
+    callsign TEXT NOT NULL,
+    locator TEXT NOT NULL,
+    exchange TEXT NOT NULL,
+    times_seen,
+    dates TEXT NOT NULL,
+    base_callsign TEXT NOT NULL,
+    square TEXT NOT NULL,
+    UNIQUE (callsign, locator, exchange)
+);
+CREATE INDEX IF NOT EXISTS contacts_base_callsign ON contacts (base_callsign);
+CREATE INDEX IF NOT EXISTS contacts_locator ON contacts (locator);
+CREATE INDEX IF NOT EXISTS contacts_square ON contacts (square);
+CREATE TABLE IF NOT EXISTS dates_worked (
+    contact INTEGER NOT NULL REFERENCES contacts (id) ON DELETE CASCADE,
+    date TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS dates_worked_date ON dates_worked (date);
+CREATE INDEX IF NOT EXISTS dates_worked_contact ON dates_worked (contact);
+"""
+
+
+class ArchiveDatabaseError(Exception):
+    """The file is not an archive database this version can read."""
+
+
+def is_database(file_name: str)-> bool:
+    """Return True if `file_name` is an archive database (by its extension), not a .csl file."""
+
+    return os.path.splitext(file_name)[1].lower() in DATABASE_EXTENSIONS
+
+
+def connect(file_name: str)-> sqlite3.Connection:
+    """Open (or create) the archive database `file_name`, in WAL mode.
+
+        Raises ArchiveDatabaseError if it was made by a later version."""
+
+    connection = sqlite3.connect(file_name)
+    try:
+        version = connection.execute('PRAGMA user_version').fetchone()[0]
+        if version > SCHEMA_VERSION:
+            raise ArchiveDatabaseError(f'{file_name} is an archive database version {version}, '
+                                       f'this program reads up to version {SCHEMA_VERSION}')
+
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA foreign_keys=ON')
+        with connection:
+            connection.executescript(SCHEMA)
+            connection.execute(f'PRAGMA user_version={SCHEMA_VERSION}')
+    except (sqlite3.Error, ArchiveDatabaseError):
+        connection.close()
+        raise
+
+    return connection
+
+
+def create(file_name: str)-> None:
+    """Create an empty archive database `file_name`, replacing any existing file."""
+
+    for name in (file_name, file_name + '-wal', file_name + '-shm'):
+        if os.path.exists(name):
+            os.remove(name)
+
+    connect(file_name).close()
+
+
+def contact_row(contact: tuple, when_worked: list)-> tuple:
+    """Return the values of the contacts table columns (after id) for an archive dictionary item.
+
+        The callsign's parts aren't kept (Utilities.callsign_parts), as each contact is written once."""
+
+    callsign, locator, exchange = contact
+    times_seen, dates = when_worked
+
+    return callsign, locator, exchange, times_seen, dates, Utilities.CallsignParts(callsign).base, locator[:4]
+
+
+def batches(items, size: int = BATCH_SIZE):
+    """Generator to yield lists of up to `size` of `items`."""
+
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+def insert_dates(connection: sqlite3.Connection, ids_and_dates)-> None:
+    """Index the dates of the contacts given as (id, dates string)."""
+
+    connection.executemany('INSERT INTO dates_worked (contact, date) VALUES (?, ?)',
+                           ((contact_id, date) for contact_id, dates in ids_and_dates
+                            for date in set(dates.split(';')) if date))
+
+
+def write_archive(file_name: str, archive_dict: dict)-> None:
+    """Write `archive_dict` to the archive database `file_name`, creating it if needed.
+
+        Only the contacts added, changed or removed since it was last written are
+        written, in one transaction, so the database is either all old or all new.
+        New contacts are added after the existing ones, in dictionary order.
+        As in a .csl file, contacts with no callsign or exchange are not kept."""
+
+    archive_dict = {contact: when_worked for contact, when_worked in archive_dict.items()
+                    if contact[0] or contact[2]}
+
+    connection = connect(file_name)
+    try:
+        with connection:
+            existing = {(callsign, locator, exchange): (contact_id, [times_seen, dates])
+                        for contact_id, callsign, locator, exchange, times_seen, dates
+                        in connection.execute('SELECT id, callsign, locator, exchange, times_seen, dates '
+                                              'FROM contacts')}
+
+            removed = [(existing[contact][0],) for contact in existing.keys() - archive_dict.keys()]
+            changed = [(existing[contact][0], when_worked) for contact, when_worked in archive_dict.items()
+                       if contact in existing and existing[contact][1] != when_worked]
+            added = [contact for contact in archive_dict if contact not in existing]
+
+            connection.executemany('DELETE FROM contacts WHERE id = ?', removed)
+
+            for batch in batches(changed):
+                connection.executemany('UPDATE contacts SET times_seen = ?, dates = ? WHERE id = ?',
+                                       ((times_seen, dates, contact_id)
+                                        for contact_id, (times_seen, dates) in batch))
+                connection.executemany('DELETE FROM dates_worked WHERE contact = ?',
+                                       ((contact_id,) for contact_id, when_worked in batch))
+                insert_dates(connection, ((contact_id, dates) for contact_id, (times_seen, dates) in batch))
+
+            for batch in batches(added):
+                first_id = connection.execute('SELECT IFNULL(MAX(id), 0) + 1 FROM contacts').fetchone()[0]
+                connection.executemany('INSERT INTO contacts (id, callsign, locator, exchange, times_seen, dates, '
+                                       'base_callsign, square) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                                       ((contact_id,) + contact_row(contact, archive_dict[contact])
+                                        for contact_id, contact in enumerate(batch, first_id)))
+                insert_dates(connection, ((contact_id, archive_dict[contact][1])
+                                          for contact_id, contact in enumerate(batch, first_id)))
+    finally:
+        connection.close()
+
+
+def write_rows(file_name: str, items)-> None:
+    """Write the archive database `file_name` to hold the contacts of `items`, creating it if needed,
+        as write_archive writes an archive dictionary, a batch of items at a time.
+
+        items -> iterable of (contact, [times_seen, dates]), each contact once,
+            taken as it comes, so it can be a generator
+
+        The contacts written are kept in a temporary table, not in memory, and those
+        not in `items` are removed at the end, all in one transaction. The database
+        is in WAL mode, so `items` can be reading it (sorted_contacts) while it is written."""
+
+    connection = connect(file_name)
+    try:
+        connection.execute('CREATE TEMP TABLE written (id INTEGER PRIMARY KEY)')
+        with connection:
+            for batch in batches((contact, when_worked) for contact, when_worked in items
+                                 if contact[0] or contact[2]):
+                written, changed, added = [], [], []
+                for contact, when_worked in batch:
+                    row = connection.execute('SELECT id, times_seen, dates FROM contacts '
+                                             'WHERE callsign = ? AND locator = ? AND exchange = ?',
+                                             contact).fetchone()
+                    if row is None:
+                        added.append((contact, when_worked))
+                    else:
+                        written.append(row[0])
+                        if [row[1], row[2]] != when_worked:
+                            changed.append((row[0], when_worked))
+
+                connection.executemany('UPDATE contacts SET times_seen = ?, dates = ? WHERE id = ?',
+                                       ((times_seen, dates, contact_id) for contact_id, (times_seen, dates) in changed))
+                connection.executemany('DELETE FROM dates_worked WHERE contact = ?',
+                                       ((contact_id,) for contact_id, when_worked in changed))
+                insert_dates(connection, ((contact_id, dates) for contact_id, (times_seen, dates) in changed))
+
+                first_id = connection.execute('SELECT IFNULL(MAX(id), 0) + 1 FROM contacts').fetchone()[0]
+                connection.executemany('INSERT INTO contacts (id, callsign, locator, exchange, times_seen, dates, '
+                                       'base_callsign, square) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                                       ((contact_id,) + contact_row(contact, when_worked)
+                                        for contact_id, (contact, when_worked) in enumerate(added, first_id)))
+                insert_dates(connection, ((contact_id, dates)
+                                          for contact_id, (contact, (times_seen, dates)) in enumerate(added, first_id)))
+
+                written.extend(range(first_id, first_id + len(added)))
+                connection.executemany('INSERT INTO written (id) VALUES (?)', ((contact_id,) for contact_id in written))
+
+            connection.execute('DELETE FROM contacts WHERE id NOT IN (SELECT id FROM written)')
+    finally:
+        connection.close()
+
+
+def add_contacts(file_name: str, contacts)-> list:
+    """Add contacts worked to the archive database `file_name`, as the Archive Maker adds them
+        to an archive dictionary, without reading the whole archive.
+
+        contacts -> (contact, date) for each QSO, contact is (callsign, locator, exchange)
+            and date is 'yyyy/mm/dd'
+
+        A new contact (with a callsign) is added as seen once on `date`, a contact already in
+        the archive has `date` added and its times seen increased, unless it was already
+        seen on that date. All are written in one transaction.
+
+        Return -> list of the (contact, date) that were not already in the archive"""
+
+    connection = connect(file_name)
+    try:
+        with connection:
+            found = {}  # contact -> [id or None if new, times_seen, dates]
+            new_contacts = []
+
+            for contact, date in contacts:
+                if contact not in found:
+                    row = connection.execute('SELECT id, times_seen, dates FROM contacts '
+                                             'WHERE callsign = ? AND locator = ? AND exchange = ?',
+                                             contact).fetchone()
+                    if row is None:
+                        if not contact[0]:  # ignore blank callsign entries
+                            continue
+                        found[contact] = [None, 1, date + ';']
+                        new_contacts.append((contact, date))
+                        continue
+                    found[contact] = list(row)
+
+                when_worked = found[contact]
+                # don't repeatedly add the same contact on the same date
+                if date not in when_worked[2]:
+                    when_worked[1] += 1
+                    when_worked[2] += date + ';'
+
+            old = {contact: when_worked for contact, when_worked in found.items() if when_worked[0] is not None}
+            new = {contact: when_worked[1:] for contact, when_worked in found.items() if when_worked[0] is None}
+
+            connection.executemany('UPDATE contacts SET times_seen = ?, dates = ? WHERE id = ?',
+                                   ((times_seen, dates, contact_id)
+                                    for contact_id, times_seen, dates in old.values()))
+            connection.executemany('DELETE FROM dates_worked WHERE contact = ?',
+                                   ((contact_id,) for contact_id, times_seen, dates in old.values()))
+            insert_dates(connection, ((contact_id, dates) for contact_id, times_seen, dates in old.values()))
+
+            first_id = connection.execute('SELECT IFNULL(MAX(id), 0) + 1 FROM contacts').fetchone()[0]
+            connection.executemany('INSERT INTO contacts (id, callsign, locator, exchange, times_seen, dates, '
+                                   'base_callsign, square) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                                   ((contact_id,) + contact_row(contact, when_worked)
+                                    for contact_id, (contact, when_worked) in enumerate(new.items(), first_id)))
+            insert_dates(connection, ((contact_id, when_worked[1])
+                                      for contact_id, when_worked in enumerate(new.values(), first_id)))
+    finally:
+        connection.close()
+
+    return new_contacts
+
+
+def read_archive(file_name: str, archiveDict: dict)-> str:
+    """Add the contacts of the archive database `file_name` to archiveDict, in the order they were added.
+
+        Returns a string of warnings, as Utilities.read_archive_file does,
+        which is empty as the contacts were checked when imported."""
+
+    select_contacts(file_name, '', (), archiveDict)
+
+    return ''
+
+
+def select_contacts(file_name: str, where: str, parameters: tuple, archiveDict: dict = None)-> dict:
+    """Return archiveDict (a new dictionary if None) with the contacts selected by the SQL `where` clause added."""
+
+    if archiveDict is None:
+        archiveDict = {}
+
+    connection = connect(file_name)
+    try:
+        archiveDict.update(((callsign, locator, exchange), [times_seen, dates])
+                           for callsign, locator, exchange, times_seen, dates
+                           in connection.execute('SELECT callsign, locator, exchange, times_seen, dates '
+                                                 f'FROM contacts {where} ORDER BY id', parameters))
+    finally:
+        connection.close()
+
+    return archiveDict
+
+
+def sorted_contacts(file_name: str):
+    """Generator to yield (contact, [times_seen, dates]) for the contacts of the archive
+        database `file_name`, in sorted order of the contacts, as re_write_csl writes them.
+
+        Read a row at a time, in the order of the UNIQUE index (SQLite compares text as
+        UTF-8 bytes, which is the order Python compares strings)."""
+
+    connection = connect(file_name)
+    try:
+        for callsign, locator, exchange, times_seen, dates in connection.execute(
+                'SELECT callsign, locator, exchange, times_seen, dates FROM contacts '
+                'ORDER BY callsign, locator, exchange'):
+            yield (callsign, locator, exchange), [times_seen, dates]
+    finally:
+        connection.close()
+
+
+def find_contacts(file_name: str, callsign: str = None, base_callsign: str = None, locator: str = None,
+                  square: str = None, worked_from: str = None, worked_to: str = None)-> dict:
+    """Look up contacts in the archive database `file_name` using its indexes.
+
+        Only the contacts matching all the arguments given are returned, e.g.
+        find_contacts(file_name, base_callsign='G4AUC', worked_from='2017/01/01')
+
+        base_callsign -> the callsign without any suffix, to find G4AUC, G4AUC/P, G4AUC/M
+        square -> the first four characters of the locator, e.g. 'IO91'
+        worked_from, worked_to -> 'yyyy/mm/dd', contacts worked on or between these dates
+
+        Return -> {(callsign, locator, exchange): [timesSeen, dates]} in archive dictionary form"""
+
+    conditions = []
+    parameters = []
+
+    for column, value in (('callsign', callsign), ('base_callsign', base_callsign),
+                          ('locator', locator), ('square', square)):
+        if value is not None:
+            conditions.append(f'{column} = ?')
+            parameters.append(value)
+
+    if worked_from is not None or worked_to is not None:
+        conditions.append('id IN (SELECT contact FROM dates_worked WHERE date BETWEEN ? AND ?)')
+        parameters += [worked_from or '', worked_to or '\uffff']
+
+    where = 'WHERE ' + ' AND '.join(conditions) if conditions else ''
+
+    return select_contacts(file_name, where, tuple(parameters))
+
+
+def import_csl(csl_file_name: str, file_name: str)-> str:
+    """Import the .csl file `csl_file_name` into a new archive database `file_name`.
+
+        Returns the format warnings from reading the .csl file."""
+
+    archive_dict = {}
+    warnings = Utilities.read_archive_file(csl_file_name, archive_dict)
+
+    create(file_name)
+    write_archive(file_name, archive_dict)
+
+    return warnings
+
+
+def export_csl(file_name: str, csl_file_name: str)-> None:
+    """Export the archive database `file_name` to the .csl file `csl_file_name`,
+        exactly as Utilities.re_write_csl writes the same archive."""
+
+    archive_dict = {}
+    read_archive(file_name, archive_dict)
+
+    Utilities.re_write_csl(csl_file_name, archive_dict)
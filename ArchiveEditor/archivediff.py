@@ -0,0 +1,309 @@
+"""The differences between two archives, and delta files of them.
+
+    The two archives are walked side by side as sorted streams (archivemerge.read_sorted),
+    so the time taken is linear and only the contacts of one callsign are held
+    in memory. The differences found are:
+
+        new contacts, not in the old archive
+        removed contacts, not in the new archive
+        contacts with new dates, and no other change
+        changed contacts, any other change to the times worked or dates
+        callsigns whose locators changed, in both archives with different locators
+
+    A delta file (.csldelta) has a line for each new, removed or changed contact,
+    in sorted order: '+', '-', '>' or '=' and a comma, then the row as a .csl file
+    has it. A '>' row has only the new dates. apply_delta applies a delta file to
+    an archive: '+' and '>' rows are merged with the archive's row as Merge Archives
+    merges them, '=' rows replace it, and '-' rows remove it, so applying the delta
+    to the old archive gives the new one.
+
+    Use:
+    python archivediff.py old.csl new.csl [changes.csldelta]  -- show (and save) the differences
+    python archivediff.py --apply changes.csldelta archive.csl  -- apply a delta file"""
+
+# Version 1.0, October 2026
+
+import os
+import csv
+import heapq
+import sys
+from itertools import groupby
+from operator import itemgetter
+
+from Utilities import csl_line, write_csl_rows, sort_dates
+from archivemerge import read_sorted, merged_items, combined, tagged
+from decoding import decode_line
+import archivedb
+
+# Extension of delta files
+DELTA_EXTENSION = '.csldelta'
+
+# The changes of each kind in a delta file
+NEW, REMOVED, NEW_DATES, CHANGED = '+', '-', '>', '='
+
+# Callsigns with changed locators listed in the summary
+LISTED_LOCATOR_CHANGES = 20
+
+
+class DiffStats:
+    """Counts of the differences between two archives.
+
+        new -> contacts not in the old archive
+        removed -> contacts not in the new archive
+        new_dates -> contacts with new dates and no other change
+        dates_added -> new dates of those contacts
+        changed -> contacts with any other change
+        unchanged -> contacts the same in both
+        locator_changes -> callsigns in both with different locators
+        listed -> (callsign, old locators, new locators) of the first LISTED_LOCATOR_CHANGES of them
+        warnings -> format warnings of each archive that has them
+        """
+
+    __slots__ = ('new', 'removed', 'new_dates', 'dates_added', 'changed', 'unchanged',
+                 'locator_changes', 'listed', 'warnings')
+
+    def __init__(self):
+
+        self.new = 0
+        self.removed = 0
+        self.new_dates = 0
+        self.dates_added = 0
+        self.changed = 0
+        self.unchanged = 0
+        self.locator_changes = 0
+        self.listed = []
+        self.warnings = ''
+
+    def __str__(self):
+
+        lines = [f'{self.new} new contacts, {self.removed} removed, '
+                 f'{self.new_dates} with {self.dates_added} new dates, {self.changed} changed, '
+                 f'{self.unchanged} unchanged',
+                 f'{self.locator_changes} callsigns with changed locators']
+        lines += [f'    {callsign}: {" ".join(old)} to {" ".join(new)}' for callsign, old, new in self.listed]
+        if self.locator_changes > len(self.listed):
+            lines.append(f'    and {self.locator_changes - len(self.listed)} more')
+
+        return '\n'.join(lines)
+
+
+def dates_of(dates: str)-> set:
+    """Return the set of the dates of a string of dates."""
+
+    return set(dates.split(';')) - {''}
+
+
+def difference(old: list, new: list):
+    """Return the change from the [times_seen, dates] `old` of a contact to `new`,
+        as (change, [times_seen, dates]) for a delta file, or None if they are the same.
+
+        The change is NEW_DATES, with only the new dates, when merging those into
+        `old` gives `new`, otherwise CHANGED with the whole of `new`."""
+
+    if old == new or (old[0] == new[0] and sort_dates(old[1]) == sort_dates(new[1])):
+        return None
+
+    added = dates_of(new[1]) - dates_of(old[1])
+    if added:
+        when_worked = [len(added), sort_dates(';'.join(added) + ';')]
+        if combined([old, when_worked])[0] == [new[0], sort_dates(new[1])]:
+            return NEW_DATES, when_worked
+
+    return CHANGED, new
+
+
+def differences(old_items, new_items, stats: DiffStats):
+    """Generator to walk the sorted (contact, [times_seen, dates]) items of two archives.
+
+        Yields -> (change, contact, [times_seen, dates]) for each new, removed or
+            changed contact, in sorted order, as a delta file has them"""
+
+    callsign = None
+    old_locators, new_locators = set(), set()
+
+    def locators_changed():
+        # a blank callsign is a title row, not a station
+        if callsign and old_locators and new_locators and old_locators != new_locators:
+            stats.locator_changes += 1
+            if len(stats.listed) < LISTED_LOCATOR_CHANGES:
+                stats.listed.append((callsign, sorted(old_locators), sorted(new_locators)))
+
+    streams = [tagged(old_items, 0), tagged(new_items, 1)]
+
+    for contact, rows in groupby(heapq.merge(*streams, key=itemgetter(0)), key=itemgetter(0)):
+        rows = list(rows)
+
+        if contact[0] != callsign:
+            locators_changed()
+            callsign = contact[0]
+            old_locators, new_locators = set(), set()
+
+        if len(rows) == 2:
+            old_locators.add(contact[1])
+            new_locators.add(contact[1])
+            change = difference(rows[0][2], rows[1][2])
+            if change is None:
+                stats.unchanged += 1
+            else:
+                if change[0] == NEW_DATES:
+                    stats.new_dates += 1
+                    stats.dates_added += change[1][0]
+                else:
+                    stats.changed += 1
+                yield change[0], contact, change[1]
+        elif rows[0][1] == 0:
+            old_locators.add(contact[1])
+            stats.removed += 1
+            yield REMOVED, contact, rows[0][2]
+        else:
+            new_locators.add(contact[1])
+            stats.new += 1
+            yield NEW, contact, rows[0][2]
+
+    locators_changed()
+
+
+def write_differences(changes, delta_file: str = None)-> None:
+    """Consume the (change, contact, [times_seen, dates]) of `changes`, writing them
+        to the delta file `delta_file` if it isn't None."""
+
+    if delta_file is None:
+        for change in changes:
+            pass
+        return
+
+    with open(delta_file, 'w') as f:
+        for change, contact, (times_seen, dates) in changes:
+            f.write(change + ',' + csl_line(*contact, times_seen, dates))
+
+
+def diff_archives(old_file: str, new_file: str, delta_file: str = None)-> DiffStats:
+    """Find the differences between the archives `old_file` and `new_file`,
+        writing them to the delta file `delta_file` if it isn't None.
+
+        Return -> the DiffStats of the differences, with any format warnings"""
+
+    def diff(archives):
+        stats = DiffStats()
+        write_differences(differences(archives[0], archives[1], stats), delta_file)
+        return stats
+
+    stats, warnings = read_sorted([old_file, new_file], diff)
+    stats.warnings = warnings
+
+    return stats
+
+
+def diff_merge(file_names: list, output: str, delta_file: str = None)-> DiffStats:
+    """Find the differences archivemerge.merge_archives(file_names, output) would make
+        to the archive `output`, which needn't exist yet, without writing it.
+
+        Return -> the DiffStats of the differences, with any format warnings"""
+
+    existing = [output] if os.path.exists(output) else []
+
+    def diff(archives):
+        stats = DiffStats()
+        merged = ((contact, when_worked) for contact, when_worked, sources in merged_items(archives[len(existing):]))
+        write_differences(differences(archives[0] if existing else (), merged, stats), delta_file)
+        return stats
+
+    stats, warnings = read_sorted(existing + list(file_names), diff)
+    stats.warnings = warnings
+
+    return stats
+
+
+def read_delta(delta_file: str)-> list:
+    """Return the (contact, change, [times_seen, dates]) of the lines of a delta file,
+        sorted by contact.
+
+        Raises ValueError if a line isn't a change and a row."""
+
+    delta = []
+
+    with open(delta_file, 'rb') as f:
+        for line_number, line in enumerate(f, 1):
+            text = decode_line(line).rstrip('\r\n')
+            if not text:
+                continue
+
+            row = next(csv.reader([text]))
+            if len(row) != 6 or row[0] not in (NEW, REMOVED, NEW_DATES, CHANGED):
+                raise ValueError(f'{delta_file} line {line_number} is not a change: {text}')
+
+            try:
+                times_seen = int(row[4])
+            except ValueError:
+                times_seen = row[4]
+
+            delta.append(((row[1], row[2], row[3]), row[0], [times_seen, row[5]]))
+
+    delta.sort(key=itemgetter(0))
+
+    return delta
+
+
+def applied(items, delta: list):
+    """Generator to apply the sorted changes of a delta file (read_delta) to the
+        sorted (contact, [times_seen, dates]) items of an archive.
+
+        Yields -> (contact, [times_seen, dates]) of the changed archive, in sorted order"""
+
+    streams = [tagged(items, 0), ((contact, 1, (change, when_worked)) for contact, change, when_worked in delta)]
+
+    for contact, rows in groupby(heapq.merge(*streams, key=itemgetter(0)), key=itemgetter(0)):
+        when_worked = None
+        for c, source, row in rows:
+            if source == 0:
+                when_worked = row
+                continue
+
+            change, delta_when_worked = row
+            if change == REMOVED:
+                when_worked = None
+            elif change == CHANGED or when_worked is None:
+                when_worked = list(delta_when_worked)
+            else:
+                when_worked = combined([when_worked, delta_when_worked])[0]
+
+        if when_worked is not None:
+            yield contact, when_worked
+
+
+def apply_delta(delta_file: str, file_name: str)-> str:
+    """Apply the changes of the delta file `delta_file` to the archive `file_name`,
+        a row at a time, as archivemerge.merge_archives writes a merged archive.
+
+        Return -> a string containing any format warnings of the archive"""
+
+    delta = read_delta(delta_file)
+
+    def apply(archives):
+        rows = applied(archives[0], delta)
+        if archivedb.is_database(file_name):
+            archivedb.write_rows(file_name, rows)
+        else:
+            write_csl_rows(file_name, rows)
+
+    result, warnings = read_sorted([file_name], apply)
+
+    return warnings
+
+
+if __name__ == '__main__':
+
+    if len(sys.argv) == 4 and sys.argv[1] == '--apply':
+        text = apply_delta(sys.argv[2], sys.argv[3])
+        if text:
+            print(text, file=sys.stderr)
+        print(f'Applied {sys.argv[2]} to {sys.argv[3]}')
+
+    elif len(sys.argv) in (3, 4):
+        diff_stats = diff_archives(*sys.argv[1:])
+        if diff_stats.warnings:
+            print(diff_stats.warnings, file=sys.stderr)
+        print(diff_stats)
+
+    else:
+        sys.exit(__doc__)
@@ -0,0 +1,444 @@
+"""Lookup indexes over an archive dictionary, used to find near matches
+    without scanning the whole archive for every contact."""
+
+# Version 1.0, October 2026
+
+from collections import defaultdict
+from itertools import accumulate
+from array import array
+
+from Utilities import similarity, callsign_parts, matches_of, LOCATOR_THRESHOLD, CALLSIGN_THRESHOLD, EDIT_DISTANCE
+import similaritykernel
+import editdistance
+import archivecache
+
+MASK = '\x01'  # replaces the masked positions in a MaskIndex key
+PAD = '\x00'  # pads a string that is shorter than the window being indexed
+
+# Callsign thresholds from which a SimilarityKernel (if NumPy is installed)
+# is used instead of a MaskIndex, whose pigeonhole parts become too short to be selective
+KERNEL_THRESHOLD = 3
+
+
+class MaskIndex:
+    """Wildcard index of strings that answers "which strings differ
+        from this one in at most `threshold` places".
+
+        Places are compared as in `Utilities.similarity`: only the first len(probe)
+        characters of an indexed string are compared and any characters
+        missing from a shorter string count as different.
+
+        With threshold 1 each string is stored under one key for each
+        position, with that position masked, so a query is len(probe) dictionary
+        look ups. Larger thresholds split the string into threshold + 1 parts
+        (at least one part must be identical) to keep the number of keys small.
+
+        The keys for a probe length are built the first time a probe
+        of that length is queried.
+        """
+
+    def __init__(self, strings, threshold: int = 1):
+
+        self.strings = list(strings)
+        self.threshold = threshold
+        self.buckets = {}  # probe length -> {key: [strings]}
+
+    def keys(self, s: str, length: int) -> list:
+        """Return the keys of `s` for probes of `length` characters."""
+
+        threshold = self.threshold
+
+        window = (s + PAD * threshold)[:length]
+
+        if threshold == 0 or not length:
+            return [window]
+        elif threshold == 1:
+            # mask each position in turn
+            return [window[:posn] + MASK + window[posn + 1:] for posn in range(length)]
+        else:
+            # pigeonhole, split into threshold + 1 numbered parts
+            parts = threshold + 1
+            bounds = [length * i // parts for i in range(parts + 1)]
+            return [f'{i}{MASK}{window[bounds[i]:bounds[i + 1]]}' for i in range(parts)]
+
+    def build(self, length: int) -> dict:
+        """Build (and keep) the keys of all the strings for probes of `length` characters."""
+
+        buckets = defaultdict(list)
+        for s in self.strings:
+            if len(s) + self.threshold >= length:  # else too many places missing
+                for key in self.keys(s, length):
+                    buckets[key].append(s)
+
+        self.buckets[length] = buckets
+
+        return buckets
+
+    def query(self, probe: str) -> list:
+        """Return the indexed strings that differ from `probe` in at most threshold places.
+
+            Includes strings that are the same as `probe` in every place."""
+
+        length = len(probe)
+
+        buckets = self.buckets.get(length)
+        if buckets is None:
+            buckets = self.build(length)
+
+        found = set()
+        for key in self.keys(probe, length):
+            found.update(buckets.get(key, ()))
+
+        # the pigeonhole keys only find candidates, so check every one
+        return [s for s in found if similarity(probe, s) >= length - self.threshold]
+
+
+class ArchiveIndex:
+    """Hash indexes over the contacts of an archive dictionary.
+
+        Build one of these once after the archive has been loaded and pass it
+        to `fuzzy_match`, which then only looks at the few archive entries
+        that could possibly match instead of every entry in the archive.
+
+        The index is a snapshot of the archive when it was built;
+        build a new one if the archive dictionary is changed.
+
+        state -> optional ArchiveIndex.state() of an index of the same archive
+            (e.g. from the .csl.cache), used instead of indexing it again
+        """
+
+    def __init__(self, archive_dict: dict, state: dict = None):
+
+        self.archive_dict = archive_dict
+
+        # position of each contact in archive_dict, so candidates can be
+        # returned in the same order as a full scan would find them
+        self.order = {}
+
+        self.by_locator = defaultdict(list)  # locator -> [archive contacts]
+        self.by_callsign = defaultdict(list)  # callsign -> [archive contacts]
+        self.by_base_callsign = defaultdict(list)  # CallsignParts.base -> [archive contacts]
+        self.by_callsign_body = defaultdict(list)  # CallsignParts.body -> [archive contacts]
+
+        self.callsign_masks = {}  # callsign threshold -> MaskIndex of the archive callsigns
+        self.callsign_kernel = None  # SimilarityKernel of the archive callsigns, for wide thresholds
+        self.callsign_deletions = {}  # edit distance -> DeletionIndex of the archive callsigns
+
+        if state is not None:
+            self.set_state(state)
+        else:
+            for posn, archive_contact in enumerate(archive_dict):
+                callsign, locator, exchange = archive_contact
+
+                self.order[archive_contact] = posn
+                self.by_locator[locator].append(archive_contact)
+                self.by_callsign[callsign].append(archive_contact)
+
+            # the callsign is parsed once for each distinct callsign, not once for each row
+            for callsign, archive_contacts in self.by_callsign.items():
+                parts = callsign_parts(callsign)
+                self.by_base_callsign[parts.base].extend(archive_contacts)
+                self.by_callsign_body[parts.body].extend(archive_contacts)
+
+        # MaskIndex of the archive locators, 6 and 8 characters mixed
+        # keys for 6 and 8 character probes are built on the first similar locator query
+        self.locator_masks = MaskIndex(self.by_locator, LOCATOR_THRESHOLD)
+
+    def state(self)-> dict:
+        """Return the lookup indexes in a form that can be saved with marshal
+            and quickly loaded again.
+
+            Return -> {index name: (keys, counts, positions)}, the keys of the index,
+                the number of contacts for each key and the positions of the contacts
+                in the archive (both as the bytes of an array of unsigned ints)."""
+
+        order = self.order
+
+        state = {}
+        for name in ('by_locator', 'by_callsign', 'by_base_callsign', 'by_callsign_body'):
+            index = getattr(self, name)
+            counts = array('I', map(len, index.values()))
+            positions = array('I', (order[archive_contact] for archive_contacts in index.values()
+                                    for archive_contact in archive_contacts))
+            state[name] = (list(index), counts.tobytes(), positions.tobytes())
+
+        return state
+
+    def set_state(self, state: dict)-> None:
+        """Set the lookup indexes from a state() of an index of the same archive."""
+
+        contacts = list(self.archive_dict)
+        self.order = dict(zip(contacts, range(len(contacts))))
+
+        for name, (keys, counts_bytes, positions_bytes) in state.items():
+            counts, positions = array('I'), array('I')
+            counts.frombytes(counts_bytes)
+            positions.frombytes(positions_bytes)
+
+            found = list(map(contacts.__getitem__, positions))
+            ends = list(accumulate(counts))
+            slices = map(slice, [0] + ends[:-1], ends)
+
+            setattr(self, name, defaultdict(list, zip(keys, map(found.__getitem__, slices))))
+
+    def callsign_mask_index(self, callsign_threshold: int)-> MaskIndex:
+        """Return the MaskIndex of the archive callsigns for `callsign_threshold`, made when first needed."""
+
+        masks = self.callsign_masks.get(callsign_threshold)
+        if masks is None:
+            masks = self.callsign_masks[callsign_threshold] = MaskIndex(self.by_callsign, callsign_threshold)
+
+        return masks
+
+    def callsign_deletion_index(self, edit_distance: int)-> editdistance.DeletionIndex:
+        """Return the DeletionIndex of the archive callsigns for `edit_distance`, made when first needed."""
+
+        deletions = self.callsign_deletions.get(edit_distance)
+        if deletions is None:
+            deletions = self.callsign_deletions[edit_distance] = editdistance.DeletionIndex(self.by_callsign,
+                                                                                            edit_distance)
+
+        return deletions
+
+    def edited_callsigns(self, callsign: str, edit_distance: int)-> list:
+        """Return the archive callsigns within `edit_distance` edits of `callsign`, other than itself.
+
+            Edit distance is the same both ways round, so these are also the archive
+            callsigns that have `callsign` within `edit_distance` edits."""
+
+        if not edit_distance:
+            return []
+
+        return [archive_callsign for archive_callsign in self.callsign_deletion_index(edit_distance).query(callsign)
+                if archive_callsign != callsign]
+
+    def similar_callsigns(self, callsign: str, callsign_threshold: int = CALLSIGN_THRESHOLD)-> list:
+        """Return the archive callsigns that fuzzy_match would report as a similar callsign."""
+
+        length = len(callsign)
+
+        if callsign_threshold >= KERNEL_THRESHOLD and similaritykernel.numpy is not None:
+            if self.callsign_kernel is None:
+                self.callsign_kernel = similaritykernel.SimilarityKernel(self.by_callsign)
+            found = self.callsign_kernel.within(callsign, callsign_threshold)
+        else:
+            found = self.callsign_mask_index(callsign_threshold).query(callsign)
+
+        return [archive_callsign for archive_callsign in found
+                if similarity(callsign, archive_callsign) != length]
+
+    def similar_callsigns_many(self, callsigns, callsign_threshold: int = CALLSIGN_THRESHOLD)-> dict:
+        """Return the similar archive callsigns of each of the callsigns, looked up together.
+
+            Return -> {callsign: [similar archive callsigns]}, one entry for each distinct callsign."""
+
+        callsigns = list(dict.fromkeys(callsigns))
+
+        if callsign_threshold >= KERNEL_THRESHOLD and similaritykernel.numpy is not None:
+            if self.callsign_kernel is None:
+                self.callsign_kernel = similaritykernel.SimilarityKernel(self.by_callsign)
+            # one pass of the kernel over the archive for all the callsigns
+            found_many = self.callsign_kernel.within_many(callsigns, callsign_threshold)
+        else:
+            masks = self.callsign_mask_index(callsign_threshold)
+            found_many = [masks.query(callsign) for callsign in callsigns]
+
+        return {callsign: [archive_callsign for archive_callsign in found
+                           if similarity(callsign, archive_callsign) != len(callsign)]
+                for callsign, found in zip(callsigns, found_many)}
+
+    def similar_locators(self, locator: str)-> list:
+        """Return the archive locators that fuzzy_match would report as a similar locator."""
+
+        return self.locator_masks.query(locator)
+
+    def is_candidate(self, contact: tuple, archive_contact: tuple, similar_locators_checked: bool,
+                     callsign_threshold: int = CALLSIGN_THRESHOLD, edit_distance: int = EDIT_DISTANCE)-> bool:
+        """Return True if `archive_contact` is one of the candidates of `contact`,
+            without looking up all the candidates."""
+
+        callsign, locator, exchange = contact
+        archive_callsign, archive_locator, archive_exchange = archive_contact
+
+        if locator == archive_locator or callsign == archive_callsign:
+            return True
+
+        parts, archive_parts = callsign_parts(callsign), callsign_parts(archive_callsign)
+        if parts.base == archive_parts.base or parts.body == archive_parts.body:
+            return True
+
+        sameness = similarity(callsign, archive_callsign)
+        if (sameness >= len(callsign) - callsign_threshold) and (sameness != len(callsign)):
+            return True
+
+        if edit_distance and editdistance.within(callsign, archive_callsign, edit_distance):
+            return True
+
+        return bool(similar_locators_checked and locator
+                    and similarity(locator, archive_locator) >= len(locator) - LOCATOR_THRESHOLD)
+
+    def reverse_candidates(self, contact: tuple, similar_locators_checked: bool,
+                           callsign_threshold: int = CALLSIGN_THRESHOLD, edit_distance: int = EDIT_DISTANCE)-> list:
+        """Return the archive contacts that have `contact` as one of their candidates.
+
+            `contact` does not have to be in the archive, so this finds the archive
+            contacts whose near matches change when `contact` is added or removed.
+
+            Return -> a list of archive contacts in archive order."""
+
+        callsign, locator, exchange = contact
+        parts = callsign_parts(callsign)
+
+        # these indexes are the same both ways round
+        found = set(self.by_locator.get(locator, ()))
+        found.update(self.by_callsign.get(callsign, ()))
+        found.update(self.by_base_callsign.get(parts.base, ()))
+        found.update(self.by_callsign_body.get(parts.body, ()))
+
+        # similar is not the same both ways round when lengths differ, so look up
+        # each shorter start of the callsign and the callsign itself for longer ones
+        # (a blank one is looked up as it is)
+        masks = self.callsign_mask_index(callsign_threshold)
+        for length in range(min(1, len(callsign)), len(callsign) + 1):
+            for archive_callsign in masks.query(callsign[:length]):
+                if len(archive_callsign) == length or length == len(callsign):
+                    found.update(self.by_callsign[archive_callsign])
+
+        # edit distance is the same both ways round
+        for archive_callsign in self.edited_callsigns(callsign, edit_distance):
+            found.update(self.by_callsign[archive_callsign])
+
+        if similar_locators_checked:
+            for length in range(min(1, len(locator)), len(locator) + 1):
+                for archive_locator in self.locator_masks.query(locator[:length]):
+                    if len(archive_locator) == length or length == len(locator):
+                        found.update(self.by_locator[archive_locator])
+
+        return sorted((archive_contact for archive_contact in found
+                       if self.is_candidate(archive_contact, contact, similar_locators_checked, callsign_threshold,
+                                            edit_distance)),
+                      key=self.order.__getitem__)
+
+    def candidates_many(self, contacts, similar_locators_checked: bool,
+                        callsign_threshold: int = CALLSIGN_THRESHOLD, edit_distance: int = EDIT_DISTANCE)-> dict:
+        """Return the candidates of each of the contacts, as `candidates` would.
+
+            The similar callsign and similar locator look ups are made once
+            for each distinct callsign and locator, not once for each contact.
+
+            Return -> {contact: [(archive_contact, when_worked)]}, one entry for each distinct contact."""
+
+        contacts = list(dict.fromkeys(contacts))
+
+        similar_callsigns = self.similar_callsigns_many((callsign for callsign, locator, exchange in contacts),
+                                                        callsign_threshold)
+        if edit_distance:
+            for callsign in similar_callsigns:
+                similar_callsigns[callsign] = similar_callsigns[callsign] + self.edited_callsigns(callsign,
+                                                                                                  edit_distance)
+        similar_locators = {}
+        if similar_locators_checked:
+            for locator in {locator for callsign, locator, exchange in contacts if locator}:
+                similar_locators[locator] = self.similar_locators(locator)
+
+        return {contact: self.collect(contact, similar_callsigns[contact[0]], similar_locators.get(contact[1], ()))
+                for contact in contacts}
+
+    def collect(self, contact: tuple, similar_callsigns, similar_locators)-> list:
+        """Return the candidates of `contact` given its similar (or edited) archive callsigns and locators."""
+
+        callsign, locator, exchange = contact
+
+        parts = callsign_parts(callsign)
+
+        found = set(self.by_locator.get(locator, ()))
+        found.update(self.by_callsign.get(callsign, ()))
+        found.update(self.by_base_callsign.get(parts.base, ()))
+        found.update(self.by_callsign_body.get(parts.body, ()))
+
+        for archive_callsign in similar_callsigns:
+            found.update(self.by_callsign[archive_callsign])
+
+        for archive_locator in similar_locators:
+            found.update(self.by_locator[archive_locator])
+
+        archive_dict = self.archive_dict
+
+        return [(archive_contact, archive_dict[archive_contact])
+                for archive_contact in sorted(found, key=self.order.__getitem__)]
+
+    def candidates(self, contact: tuple, similar_locators_checked: bool,
+                   callsign_threshold: int = CALLSIGN_THRESHOLD, edit_distance: int = EDIT_DISTANCE)-> list:
+        """Return the archive entries that might be a near match for `contact`.
+
+            contact -> (callsign: str, locator: str, exchange: str)
+
+            callsign_threshold -> places that may differ in a similar callsign
+
+            edit_distance -> edits allowed in an edited callsign, 0 for none
+
+            Return -> a list of (archive_contact, when_worked) tuples in archive order,
+                a subset of archive_dict.items() that contains every near match."""
+
+        callsign, locator, exchange = contact
+
+        similar_locators = ()
+        if similar_locators_checked and locator:
+            similar_locators = self.similar_locators(locator)
+
+        similar_callsigns = self.similar_callsigns(callsign, callsign_threshold)
+        if edit_distance:
+            similar_callsigns += self.edited_callsigns(callsign, edit_distance)
+
+        return self.collect(contact, similar_callsigns, similar_locators)
+
+
+def fuzzy_match_many(contacts, archive, similar_locators_checked: bool,
+                     callsign_threshold: int = CALLSIGN_THRESHOLD, edit_distance: int = EDIT_DISTANCE)-> dict:
+    """Find the near matches of all the contacts in one sweep of the archive.
+
+        contacts -> iterable of (callsign, locator, exchange), repeats are only matched once
+
+        archive -> an archive dictionary, or an ArchiveIndex of one to save building it again
+
+        Return -> {contact: fuzzy matches list}, the same lists as
+            `Utilities.fuzzy_match` gives for each contact."""
+
+    index = archive if isinstance(archive, ArchiveIndex) else ArchiveIndex(archive)
+
+    return {contact: matches_of(contact, archive_contacts, similar_locators_checked, callsign_threshold, edit_distance)
+            for contact, archive_contacts
+            in index.candidates_many(contacts, similar_locators_checked, callsign_threshold, edit_distance).items()}
+
+
+def archive_index(file_name: str, archive_dict: dict)-> ArchiveIndex:
+    """Return an ArchiveIndex of archive_dict, which has just been read from the archive `file_name`.
+
+        The lookup indexes are taken from the .csl.cache of the file if they were saved
+        there for the same contents, otherwise they are built and saved in the cache."""
+
+    try:
+        data, signature = archivecache.read_source(file_name)
+    except OSError:
+        return ArchiveIndex(archive_dict)
+
+    cache = archivecache.load(file_name, signature)
+
+    if cache is None:
+        return ArchiveIndex(archive_dict)
+
+    # only if archive_dict is exactly what was read from the file, in the same order
+    contacts = list(zip(*cache['rows'][:3]))
+    if len(contacts) != len(archive_dict):
+        contacts = list(dict.fromkeys(contacts))  # rows repeating a contact
+    if contacts != list(archive_dict):
+        return ArchiveIndex(archive_dict)
+
+    if 'index' in cache:
+        return ArchiveIndex(archive_dict, cache['index'])
+
+    index = ArchiveIndex(archive_dict)
+    cache['index'] = index.state()
+    archivecache.save(file_name, signature, cache)
+
+    return index
@@ -0,0 +1,90 @@
+"""Append-only journal (.csl.journal) of the rows added to or changed in a .csl archive.
+
+    The Archive Maker appends the new and changed rows of the contacts it adds
+    to the journal before re-writing the whole archive, so they are kept if the
+    re-write is interrupted. The journal is in the same format as a .csl file;
+    when the archive is read its rows replace the archive rows of the same
+    contacts, or are added after them.
+
+    Utilities.re_write_csl folds the journal into the .csl file and removes it.
+
+    Use:
+    python archivejournal.py archive.csl    -- fold the journal into archive.csl now"""
+
+# Version 1.0, October 2026
+
+import os
+import sys
+import locale
+
+from decoding import decode_text
+
+
+def journal_name(file_name: str)-> str:
+    """Return the name of the journal kept next to the archive `file_name`."""
+
+    return file_name + '.journal'
+
+
+def append(file_name: str, lines)-> None:
+    """Append `lines` (each ending with a new line) to the journal of the archive `file_name`.
+
+        The lines are flushed to the disc before returning. Any part line left
+        at the end of the journal by an interrupted append is removed first.
+        No journal is made for no lines."""
+
+    lines = list(lines)
+    if not lines:
+        return
+
+    name = journal_name(file_name)
+
+    try:
+        with open(name, 'r+b') as f:
+            size = f.seek(0, os.SEEK_END)
+            if size:
+                f.seek(size - 1)
+                if f.read(1) != b'\n':
+                    f.seek(0)
+                    f.truncate(f.read().rfind(b'\n') + 1)
+    except FileNotFoundError:
+        pass
+
+    # in the locale encoding, as re_write_csl writes the archive
+    with open(name, 'ab') as f:
+        f.write(''.join(lines).encode(locale.getpreferredencoding(False)))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def read_text(file_name: str):
+    """Return the text of the whole lines of the journal of the archive `file_name`,
+        or None if there is no journal."""
+
+    try:
+        with open(journal_name(file_name), 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+
+    # ignore a part line left by an interrupted append
+    data = data[:data.rfind(b'\n') + 1]
+
+    return decode_text(data)
+
+
+def remove(file_name: str)-> None:
+    """Remove the journal of the archive `file_name`, if there is one."""
+
+    try:
+        os.remove(journal_name(file_name))
+    except FileNotFoundError:
+        pass
+
+
+if __name__ == '__main__':
+
+    import Utilities
+
+    for name in sys.argv[1:]:
+        Utilities.compact_journal(name)
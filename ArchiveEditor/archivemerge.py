@@ -0,0 +1,409 @@
+"""Merging archives as sorted streams, a row at a time.
+
+    re_write_csl writes the rows of a .csl file in sorted order of the contacts
+    (callsign, locator, exchange), so any number of archives can be merged by
+    reading them side by side with heapq.merge, in one pass, combining the rows
+    of the same contact and writing each merged row as soon as it is known.
+    Only a block of merged rows is held in memory, however large the archives are.
+
+    The archives of a club's members share contest history, so a contact's dates
+    are the union of its dates in each archive, each date once, and the times
+    worked are counted again from those dates, as the Archive Maker counts them.
+    A contact in only one archive is written as it is.
+
+    A .csl file that turns out not to be sorted (not written by re_write_csl),
+    or has a journal, is read into memory and sorted instead. An archive database
+    is read in order from its index.
+
+    Use:
+    python archivemerge.py merged.csl archive.csl archive.csl [archive.csl ...]"""
+
+# Version 1.0, October 2026
+
+import os
+import re
+import sys
+import time
+import heapq
+import pickle
+import tempfile
+from itertools import groupby
+from operator import itemgetter
+
+from Utilities import read_archive_file, write_csl_rows, check_csl_row, sort_dates
+from decoding import decode_line
+import archivedb
+import archivejournal
+import checkformat
+
+# A row as re_write_csl writes it, or without the quotes
+STREAM_LINE_PATTERN = re.compile(r'("?)([^",]*)\1,("?)([^",]*)\3,("?)([^",]*)\5,("?)([0-9]+)\7,("?)([^",]*)\9')
+
+# Dates whose union can be taken, 'yyyy/mm/dd;' repeated
+DATES_PATTERN = re.compile(r'(?:[0-9]{4}/[0-9]{2}/[0-9]{2};)*\Z')
+
+# Callsign and locator check results kept while checking a streamed archive
+CHECKED_SIZE = 10000
+
+
+class NotStreamable(Exception):
+    """Raised reading a .csl file as a sorted stream when a row is out of order,
+        or isn't a STREAM_LINE_PATTERN line.
+
+        source -> position of the archive in those being merged"""
+
+    def __init__(self, file_name: str, source: int = 0):
+
+        super().__init__(f'{file_name} is not a sorted archive')
+        self.source = source
+
+
+class SourceStats:
+    """What one archive contributed to a merge.
+
+        contacts -> contacts read from it
+        only_here -> contacts in no other of the archives
+        dates -> dates of its contacts
+        new_dates -> dates of its contacts that no other of the archives had for the contact
+        """
+
+    __slots__ = ('file_name', 'contacts', 'only_here', 'dates', 'new_dates')
+
+    def __init__(self, file_name: str):
+
+        self.file_name = file_name
+        self.contacts = 0
+        self.only_here = 0
+        self.dates = 0
+        self.new_dates = 0
+
+    def __str__(self):
+
+        return (f'{self.file_name}: {self.contacts} contacts, {self.only_here} only in this archive, '
+                f'{self.dates} dates, {self.new_dates} in no other archive')
+
+
+class MergeStats:
+    """Counts of a merge of archives, and how long it took.
+
+        sources -> SourceStats of each archive, in the order given
+        contacts -> contacts written to the merged archive
+        duplicate_dates -> dates of a contact in more than one archive (or twice in one),
+            written once
+        recounted -> contacts whose times worked, counted again from their dates,
+            aren't the total of the archives
+        warnings -> format warnings of each archive that has them
+        """
+
+    __slots__ = ('sources', 'contacts', 'duplicate_dates', 'recounted', 'warnings', 'start')
+
+    def __init__(self, file_names: list):
+
+        self.sources = [SourceStats(file_name) for file_name in file_names]
+        self.contacts = 0
+        self.duplicate_dates = 0
+        self.recounted = 0
+        self.warnings = ''
+        self.start = time.perf_counter()
+
+    def elapsed(self)-> float:
+        """Return the seconds since the merge started."""
+
+        return time.perf_counter() - self.start
+
+    def __str__(self):
+
+        return '\n'.join([f'{len(self.sources)} archives merged into {self.contacts} contacts '
+                          f'in {self.elapsed():.1f}s, {self.duplicate_dates} duplicate dates removed, '
+                          f'{self.recounted} times worked counted again']
+                         + [str(source) for source in self.sources])
+
+
+def csl_lines(file_name: str):
+    """Generator to yield the rows of a .csl file, a line at a time.
+
+        A correctly formatted plain line (checkformat.PLAIN_LINE_PATTERN) is split
+        by that pattern, with the same groups as STREAM_LINE_PATTERN.
+
+        Yields -> (contact, [times_seen, dates], correct) for each STREAM_LINE_PATTERN line,
+            correct being True for a PLAIN_LINE_PATTERN line, or None for any other line,
+            after a title row"""
+
+    plain_line = checkformat.PLAIN_LINE_PATTERN.fullmatch
+    stream_line = STREAM_LINE_PATTERN.fullmatch
+
+    with open(file_name, 'rb') as f:
+        for line_number, line in enumerate(f):
+            line = line.rstrip(b'\r\n')
+            try:
+                text = line.decode('utf-8')
+            except UnicodeDecodeError:
+                text = decode_line(line)
+
+            match = plain_line(text)
+            if match:
+                yield (match[2], match[4], match[6]), [int(match[8]), match[10]], True
+                continue
+
+            match = stream_line(text)
+            if match:
+                yield (match[2].strip(), match[4].strip(), match[6].strip()), [int(match[8]), match[10].strip()], False
+            elif not (line_number == 0 and ',' not in text):  # Skip any title row at beginning
+                yield None
+
+
+def streamed_lines(file_name: str, warnings: list, source: int = 0):
+    """Generator to yield the rows of a .csl file as a sorted stream, adding the format
+        warnings read_archive_file would give to `warnings`.
+
+        Raises NotStreamable, when it gets to it, if a row is out of order or isn't
+        a STREAM_LINE_PATTERN line."""
+
+    checked = {}
+    last = None
+    for row in csl_lines(file_name):
+        if row is None:
+            raise NotStreamable(file_name, source)
+
+        contact, when_worked, correct = row
+        if last is not None and contact <= last:
+            raise NotStreamable(file_name, source)
+        last = contact
+
+        if not correct:
+            warning = check_csl_row([*contact, *when_worked], checked)
+            if warning:
+                warnings.append(warning)
+            if len(checked) > CHECKED_SIZE:
+                checked.clear()
+
+        yield contact, when_worked
+
+
+def is_streamable(file_name: str)-> bool:
+    """Return True if the .csl file can be read as a sorted stream by streamed_lines:
+        every row is a STREAM_LINE_PATTERN line, in sorted order of the contacts,
+        with no contact twice, and there is no journal."""
+
+    if os.path.exists(archivejournal.journal_name(file_name)):
+        return False
+
+    try:
+        for row in streamed_lines(file_name, []):
+            pass
+    except NotStreamable:
+        return False
+
+    return True
+
+
+def archive_items(file_name: str, warnings: list, source: int = 0, in_memory: bool = False):
+    """Return an iterable of the (contact, [times_seen, dates]) of the archive `file_name`
+        in sorted order of the contacts, adding any format warnings to `warnings`.
+
+        in_memory -> True to read a .csl file into memory and sort it, rather than
+            reading it as a sorted stream, which is done anyway if it has a journal"""
+
+    if archivedb.is_database(file_name):
+        return archivedb.sorted_contacts(file_name)
+
+    if not (in_memory or os.path.exists(archivejournal.journal_name(file_name))):
+        return streamed_lines(file_name, warnings, source)
+
+    archive_dict = {}
+    warnings.append(read_archive_file(file_name, archive_dict))
+
+    return sorted(archive_dict.items(), key=itemgetter(0))
+
+
+def tagged(items, source: int):
+    """Generator to yield (contact, source, when_worked) for the items of one archive."""
+
+    for contact, when_worked in items:
+        yield contact, source, when_worked
+
+
+def total_times(times_list: list):
+    """Return the total of the times seen of a contact in each archive, ignoring any
+        that aren't a number, unless none are."""
+
+    numbers = [times_seen for times_seen in times_list if isinstance(times_seen, int)]
+
+    return sum(numbers) if numbers else times_list[0]
+
+
+def dates_of(dates: str)-> set:
+    """Return the set of the dates of a string of 'yyyy/mm/dd;' dates."""
+
+    return set(dates[:-1].split(';')) if dates else set()
+
+
+def combined(when_worked_list: list)-> tuple:
+    """Return the [times_seen, dates] of a contact from its [times_seen, dates] in each archive,
+        and the set of dates of each, or None if they aren't all 'yyyy/mm/dd;'.
+
+        A contact in only one archive is left as it is. Otherwise the dates are the union
+        of the dates of each, newest first, and the times seen the number of those dates.
+        Dates that aren't all 'yyyy/mm/dd;' can't be compared, so are put together,
+        and the times seen added, as Merge Archives always did."""
+
+    if len(when_worked_list) == 1:
+        return list(when_worked_list[0]), None
+
+    dates_list = [dates for times_seen, dates in when_worked_list]
+
+    if not all(DATES_PATTERN.match(dates) for dates in dates_list):
+        return [total_times([times_seen for times_seen, dates in when_worked_list]),
+                sort_dates(''.join(dates_list))], None
+
+    date_sets = [dates_of(dates) for dates in dates_list]
+    union = date_sets[0].union(*date_sets[1:])
+    if union:
+        return [len(union), ''.join([f'{d};' for d in sorted(union, reverse=True)])], date_sets
+
+    # no dates to count, the most times seen in any archive
+    numbers = [times_seen for times_seen, dates in when_worked_list if isinstance(times_seen, int)]
+    return [max(numbers) if numbers else when_worked_list[0][0], ''], date_sets
+
+
+def add_stats(stats: MergeStats, rows: list, when_worked: list, date_sets)-> None:
+    """Add a merged contact to the stats of the merge.
+
+        rows -> the (contact, source, [times_seen, dates]) of the contact in each archive
+        when_worked -> the combined [times_seen, dates]
+        date_sets -> the set of dates of each, or None if they aren't all 'yyyy/mm/dd;'"""
+
+    stats.contacts += 1
+    if when_worked[0] != total_times([row[2][0] for row in rows]):
+        stats.recounted += 1
+
+    if date_sets is None and len(rows) > 1:
+        date_sets_read = [set(row[2][1].split(';')) - {''} for row in rows]
+    else:
+        date_sets_read = date_sets
+
+    dates_read = 0
+    for posn, row in enumerate(rows):
+        source_stats = stats.sources[row[1]]
+        source_stats.contacts += 1
+        count = row[2][1].count(';')
+        source_stats.dates += count
+        dates_read += count
+
+        if len(rows) == 1:
+            source_stats.only_here += 1
+            source_stats.new_dates += when_worked[1].count(';')
+        else:
+            source_stats.new_dates += len(date_sets_read[posn].difference(*date_sets_read[:posn],
+                                                                          *date_sets_read[posn + 1:]))
+
+    if date_sets is not None:
+        stats.duplicate_dates += dates_read - when_worked[1].count(';')
+
+
+def merged_items(archives: list, stats: MergeStats = None):
+    """Generator to merge the sorted (contact, [times_seen, dates]) items of several archives,
+        combining the rows of a contact in more than one archive (combined).
+
+        stats -> if not None, the MergeStats the counts are added to
+
+        Yields -> (contact, [times_seen, dates], sources) in sorted order of the contacts,
+            sources being the positions in `archives` of those the contact was in"""
+
+    streams = [tagged(items, source) for source, items in enumerate(archives)]
+
+    for contact, rows in groupby(heapq.merge(*streams, key=itemgetter(0)), key=itemgetter(0)):
+        rows = list(rows)
+        when_worked, date_sets = combined([row[2] for row in rows])
+        if stats is not None:
+            add_stats(stats, rows, when_worked, date_sets)
+
+        yield contact, when_worked, tuple([row[1] for row in rows])
+
+
+def read_sorted(file_names: list, func)-> tuple:
+    """Call func(archives) with the sorted items of each of the archives `file_names`
+        (archive_items). A .csl file found not to be sorted part way through is read
+        into memory and func is called again.
+
+        Return -> (what func returned, a string of the format warnings of each archive that has them)"""
+
+    in_memory = set()
+
+    while True:
+        warnings = [[] for file_name in file_names]
+        archives = [archive_items(file_name, warnings[source], source, source in in_memory)
+                    for source, file_name in enumerate(file_names)]
+        try:
+            result = func(archives)
+            break
+        except NotStreamable as e:
+            in_memory.add(e.source)
+
+    return result, ''.join(f'{file_name}:\n' + ''.join(file_warnings)
+                           for file_name, file_warnings in zip(file_names, warnings) if ''.join(file_warnings))
+
+
+def merge_archives(file_names: list, output: str, added=None)-> MergeStats:
+    """Merge the archives `file_names` into the archive `output`, which can be one of them.
+
+        The archives are read side by side in one pass (read_sorted), and the merged
+        rows written as they are merged, by Utilities.write_csl_rows, to a temporary
+        file that replaces `output` when they have all been written. An archive
+        database output is written a batch of rows at a time, by archivedb.write_rows.
+
+        added -> if not None, called with each contact that was not in `output`,
+            in sorted order, once the merged archive has been written. Until then
+            they are kept in a temporary file, not in memory, as the merge can
+            start again (read_sorted) and find that some of them were in `output`.
+
+        Return -> the MergeStats of the merge, with any format warnings"""
+
+    paths = [os.path.abspath(file_name) for file_name in file_names]
+    base = paths.index(os.path.abspath(output)) if os.path.abspath(output) in paths else None
+
+    with tempfile.TemporaryFile() as new:
+
+        def merge(archives):
+            stats = MergeStats(file_names)
+            new.seek(0)
+            new.truncate()
+
+            def rows():
+                for contact, when_worked, sources in merged_items(archives, stats):
+                    if added is not None and base not in sources and (contact[0] or contact[2]):
+                        pickle.dump(contact, new)
+                    yield contact, when_worked
+
+            if archivedb.is_database(output):
+                archivedb.write_rows(output, rows())
+            else:
+                write_csl_rows(output, rows())
+
+            return stats
+
+        stats, warnings = read_sorted(file_names, merge)
+        stats.warnings = warnings
+
+        if added is not None:
+            new.seek(0)
+            while True:
+                try:
+                    contact = pickle.load(new)
+                except EOFError:
+                    break
+                added(contact)
+
+    return stats
+
+
+if __name__ == '__main__':
+
+    if len(sys.argv) < 4:
+        sys.exit(__doc__)
+
+    merge_stats = merge_archives(sys.argv[2:], sys.argv[1])
+    if merge_stats.warnings:
+        print(merge_stats.warnings, file=sys.stderr)
+
+    print(merge_stats)
@@ -0,0 +1,52 @@
+"""Fixture shared by the test modules that read and write archive files, using unittest."""
+
+# Version 1.0, October 2026
+
+import os
+import shutil
+import tempfile
+import unittest
+import Utilities
+
+
+class ArchiveTestCase(unittest.TestCase):
+    """A TestCase with a temporary directory, removed after each test, to keep archives in."""
+
+    def setUp(self):
+
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def path(self, name: str)-> str:
+        """Return the path of the file `name` in the temporary directory."""
+
+        return os.path.join(self.directory, name)
+
+    def copy_archive(self, source: str, name: str = 'archive.csl')-> str:
+        """Copy the archive `source` to the temporary directory as `name`, and return its path."""
+
+        file_name = self.path(name)
+        shutil.copyfile(source, file_name)
+
+        return file_name
+
+    def write_archive(self, name: str, archive_dict: dict)-> str:
+        """Write archive_dict (re_write_csl) to `name` in the temporary directory, and return its path."""
+
+        file_name = self.path(name)
+        Utilities.re_write_csl(file_name, archive_dict)
+
+        return file_name
+
+    def read_archive(self, file_name: str, **kwargs)-> dict:
+        """Return the archive dictionary read (read_archive_file) from `file_name`."""
+
+        archive_dict = {}
+        Utilities.read_archive_file(file_name, archive_dict, **kwargs)
+
+        return archive_dict
+
+    def assertSameFile(self, first: str, second: str):
+
+        with open(first, 'rb') as f1, open(second, 'rb') as f2:
+            self.assertEqual(f1.read(), f2.read())
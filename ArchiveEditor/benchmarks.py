@@ -0,0 +1,397 @@
+"""Benchmarks for the Archive Utilities on large synthetic archives.
+
+    Use:
+    python benchmarks.py checker [rows] [processes]
+    python benchmarks.py loader [rows]
+    python benchmarks.py cache [rows]
+    python benchmarks.py database [rows] [added]
+    python benchmarks.py writer [rows]
+    python benchmarks.py edi [files] [qsos] [processes]
+    python benchmarks.py merge [rows] [archives]
+    python benchmarks.py diff [rows]
+    python benchmarks.py pipeline [rows]
+    """
+
+# Version 1.0, October 2026
+
+import os
+import sys
+import random
+import shutil
+import tempfile
+import time
+import tracemalloc
+from functools import partial
+
+from Utilities import re_write_csl, read_archive_file, read_archive_rows, append_journal, sort_dates
+from Utilities import pipeline, csl_rows, strip_row_fields, pad_list_with_defaults, convert_times_worked_to_int, \
+    CSL_ROW_DEFAULTS
+from archiveindex import archive_index
+import archivecache
+import archivedb
+import archivecheck
+from ediimport import read_edi_files, add_edi_contacts
+from archivemerge import merge_archives
+from archivediff import diff_archives, apply_delta
+
+PREFIXES = ['G', 'M', '2E0', 'G0', 'M0', 'GW', 'GM', 'GI', 'EI', 'F', 'DL', 'PA', 'ON', 'OZ', 'SM', 'HB9']
+SUFFIXES = ['', '', '', '', '/P', '/M', '/A']
+LETTERS = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+
+def make_archive(rows: int, seed: int = 0)-> dict:
+    """Return a synthetic archive dictionary of about `rows` contacts.
+
+        The callsigns, locators and dates look like those in a real archive,
+        with enough near matches to exercise the Archive Checker."""
+
+    rng = random.Random(seed)
+
+    archive_dict = {}
+    while len(archive_dict) < rows:
+        prefix = rng.choice(PREFIXES)
+        digit = '' if prefix[-1].isdigit() else str(rng.randint(0, 9))
+        body = ''.join(rng.choice(LETTERS) for i in range(rng.randint(2, 3)))
+        callsign = prefix + digit + body + rng.choice(SUFFIXES)
+
+        locator = (rng.choice('IJ') + rng.choice('NO') + str(rng.randint(0, 9)) + str(rng.randint(0, 9))
+                   + rng.choice(LETTERS[:24]) + rng.choice(LETTERS[:24]))
+
+        dates = sorted({f'{rng.randint(2000, 2026)}/{rng.randint(1, 12):02d}/{rng.randint(1, 28):02d}'
+                        for i in range(rng.randint(1, 4))}, reverse=True)
+
+        archive_dict[(callsign, locator, '')] = [len(dates), ''.join(f'{d};' for d in dates)]
+
+    return archive_dict
+
+
+def write_archive(file_name: str, rows: int, seed: int = 0)-> None:
+    """Write a synthetic archive of about `rows` contacts to `file_name`."""
+
+    re_write_csl(file_name, make_archive(rows, seed))
+
+
+def timed(func, *args, **kwargs)-> float:
+    """Return the time in seconds taken by func(*args, **kwargs)."""
+
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def bench_checker(rows: int = 50000, processes: int = None)-> None:
+    """Time the Archive Checker on one process and on a process pool."""
+
+    if processes is None:
+        processes = archivecheck.default_processes()
+
+    archive_dict = make_archive(rows)
+
+    def check(n):
+        for text in archivecheck.check_archive(archive_dict, True, n):
+            pass
+
+    serial = timed(check, 1)
+    print(f'Archive Checker, {len(archive_dict)} rows, 1 process: {serial:.2f}s')
+
+    parallel = timed(check, processes)
+    print(f'Archive Checker, {len(archive_dict)} rows, {processes} processes: {parallel:.2f}s'
+          f' ({serial / parallel:.1f}x)')
+
+
+def bench_loader(rows: int = 100000)-> None:
+    """Time the bulk .csl loader against the csv module loader."""
+
+    fd, file_name = tempfile.mkstemp(suffix='.csl')
+    os.close(fd)
+
+    try:
+        write_archive(file_name, rows)
+
+        by_rows = timed(read_archive_rows, file_name, {})
+        print(f'csv module loader, {rows} rows: {by_rows:.2f}s')
+
+        bulk = timed(read_archive_file, file_name, {}, use_cache=False)
+        print(f'Bulk loader, {rows} rows: {bulk:.2f}s ({by_rows / bulk:.1f}x)')
+    finally:
+        os.remove(file_name)
+
+
+def bench_cache(rows: int = 100000)-> None:
+    """Time reading an archive and building its index with and without the .csl.cache."""
+
+    fd, file_name = tempfile.mkstemp(suffix='.csl')
+    os.close(fd)
+
+    try:
+        write_archive(file_name, rows)
+
+        def read_and_index():
+            archive_dict = {}
+            read_archive_file(file_name, archive_dict)
+            archive_index(file_name, archive_dict)
+
+        cold = timed(read_and_index)
+        warm = timed(read_and_index)
+        print(f'Read and index {rows} rows, no cache: {cold:.2f}s, from the cache: {warm:.2f}s ({cold / warm:.1f}x)')
+    finally:
+        for name in (file_name, archivecache.cache_name(file_name)):
+            if os.path.exists(name):
+                os.remove(name)
+
+
+def bench_database(rows: int = 100000, added: int = 1000)-> None:
+    """Time adding contacts to a large .csl archive, to its journal and to the same archive database."""
+
+    directory = tempfile.mkdtemp()
+
+    try:
+        archive_dict = make_archive(rows)
+        new_contacts = make_archive(rows + added, seed=1)
+
+        contacts = [(contact, '2026/10/18') for contact in list(new_contacts)[:added]]
+
+        csl_file = os.path.join(directory, 'archive.csl')
+        re_write_csl(csl_file, archive_dict)
+
+        def add_to_csl():
+            # as the Archive Maker does for a .csl file
+            archive = {}
+            read_archive_file(csl_file, archive, use_cache=False)
+            for contact, date in contacts:
+                archive.setdefault(contact, [1, date + ';'])
+            re_write_csl(csl_file, archive)
+
+        print(f'Add {added} contacts to {rows} rows in a .csl archive: {timed(add_to_csl):.2f}s')
+
+        archive = {}
+        read_archive_file(csl_file, archive)
+        journal_contacts = [contact for contact, date in contacts]
+        for contact in journal_contacts:
+            archive[contact] = [2, '2026/10/19;2026/10/18;']
+
+        journal = timed(append_journal, csl_file, archive, journal_contacts)
+        print(f'Add {added} contacts to {rows} rows in the .csl.journal: {journal:.3f}s')
+
+        database_file = os.path.join(directory, 'archive.csldb')
+        re_write_csl(database_file, archive_dict)
+
+        database = timed(archivedb.add_contacts, database_file, contacts)
+        print(f'Add {added} contacts to {rows} rows in a .csldb archive: {database:.2f}s')
+    finally:
+        shutil.rmtree(directory)
+
+
+def re_write_csl_by_rows(file_name: str, archive_dict: dict)-> None:
+    """re_write_csl as it was, writing straight over the file a row at a time, to compare against."""
+
+    with open(file_name, 'w') as fs:
+        for p in sorted(archive_dict):
+            callsign_out, locator_out, exchange_out = p
+            times_seen, dates = archive_dict[p]
+            dates_sorted = sort_dates(dates)
+
+            if callsign_out or exchange_out:
+                fs.write('"{:s}","{:s}","{:s}","{:d}","{:s}"\n'.format(callsign_out, locator_out,
+                                                                       exchange_out, times_seen, dates_sorted))
+
+
+def bench_writer(rows: int = 100000)-> None:
+    """Time re_write_csl against writing the file a row at a time."""
+
+    directory = tempfile.mkdtemp()
+
+    try:
+        archive_dict = make_archive(rows)
+        file_name = os.path.join(directory, 'archive.csl')
+
+        by_rows = timed(re_write_csl_by_rows, file_name, archive_dict)
+        print(f'Write {rows} rows a row at a time: {by_rows:.2f}s')
+
+        atomic = timed(re_write_csl, file_name, archive_dict)
+        print(f'Write {rows} rows to a temporary file, fsync and replace: {atomic:.2f}s '
+              f'({by_rows / atomic:.1f}x)')
+    finally:
+        shutil.rmtree(directory)
+
+
+def bench_edi(files: int = 40, qsos: int = 2000, processes: int = None)-> None:
+    """Time reading a season of .edi files one after another and in a pool of processes."""
+
+    if processes is None:
+        processes = archivecheck.default_processes()
+
+    directory = tempfile.mkdtemp()
+
+    try:
+        rng = random.Random(0)
+        file_names = []
+        for posn in range(files):
+            lines = ['[REG1TEST;1]', '[QSORecords;{}]'.format(qsos)]
+            for serial, (callsign, locator, exchange) in enumerate(rng.sample(list(make_archive(qsos * 2)), qsos)):
+                lines.append(f'17{posn % 12 + 1:02d}06;1904;{callsign};1;59;{serial:03d};59;005;{exchange};{locator};29;;;;')
+            file_names.append(os.path.join(directory, f'log{posn}.edi'))
+            with open(file_names[-1], 'w') as f:
+                f.write('\n'.join(lines) + '\n')
+
+        def add_files(processes):
+            archive = {}
+            for edi_contacts in read_edi_files(file_names, processes):
+                add_edi_contacts(archive, edi_contacts)
+
+        sequential = timed(add_files, 1)
+        print(f'{files} files of {qsos} QSOs one after another: {sequential:.2f}s')
+
+        pooled = timed(add_files, processes)
+        print(f'{files} files of {qsos} QSOs, {processes} processes: {pooled:.2f}s ({sequential / pooled:.1f}x)')
+    finally:
+        shutil.rmtree(directory)
+
+
+def peak_memory(func, *args)-> int:
+    """Return the most bytes func(*args) had allocated at once."""
+
+    tracemalloc.start()
+    try:
+        func(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def merge_in_memory(file_names: list, output: str)-> None:
+    """Merge archives by reading each into a dictionary of the set of dates of each contact."""
+
+    merged = {}
+    for file_name in file_names:
+        archive_dict = {}
+        read_archive_file(file_name, archive_dict, use_cache=False)
+        for contact, (times_seen, dates) in archive_dict.items():
+            merged.setdefault(contact, set()).update(dates.split(';'))
+
+    re_write_csl(output, {contact: [len(dates - {''}), ';'.join(dates - {''}) + ';'] for contact, dates in merged.items()})
+
+
+def write_members(directory: str, rows: int, archives: int)-> list:
+    """Write the archives of club members who have worked many of the same contests,
+        about `rows` contacts each, and return their file names."""
+
+    rng = random.Random(0)
+    club = make_archive(rows * 2)
+
+    file_names = []
+    for member in range(archives):
+        archive_dict = {}
+        for contact, (times_seen, dates) in club.items():
+            if rng.random() < 0.5:
+                if rng.random() < 0.2:  # a contest only this member worked
+                    dates = f'{rng.randint(2000, 2026)}/{rng.randint(1, 12):02d}/{rng.randint(1, 28):02d};' + dates
+                archive_dict[contact] = [dates.count(';'), dates]
+
+        file_names.append(os.path.join(directory, f'member{member}.csl'))
+        re_write_csl(file_names[-1], archive_dict)
+
+    return file_names
+
+
+def bench_merge(rows: int = 100000, archives: int = 4)-> None:
+    """Compare the time and peak memory of merging the overlapping archives of several
+        club members in dictionaries and as sorted streams."""
+
+    directory = tempfile.mkdtemp()
+
+    try:
+        file_names = write_members(directory, rows, archives)
+
+        output = os.path.join(directory, 'merged.csl')
+        in_memory = timed(merge_in_memory, file_names, output)
+        streamed = timed(merge_archives, file_names, output)
+        in_memory_peak = peak_memory(merge_in_memory, file_names, output)
+        streamed_peak = peak_memory(merge_archives, file_names, output)
+
+        print(f'Merge {archives} archives of {rows} rows: dictionary {in_memory:.2f}s {in_memory_peak / 1e6:.1f}MB, '
+              f'streamed {streamed:.2f}s {streamed_peak / 1e6:.1f}MB ({in_memory_peak / streamed_peak:.0f}x less memory)')
+        print(merge_archives(file_names, output))
+    finally:
+        shutil.rmtree(directory)
+
+
+def bench_diff(rows: int = 100000)-> None:
+    """Time, and find the peak memory of, finding the differences between an archive and
+        the same archive a season later, writing them to a delta file and applying that."""
+
+    directory = tempfile.mkdtemp()
+
+    try:
+        rng = random.Random(0)
+        old = make_archive(rows)
+        new = {contact: list(when_worked) for contact, when_worked in old.items()}
+        for contact in list(old):
+            chance = rng.random()
+            if chance < 0.01:
+                del new[contact]
+            elif chance < 0.06:
+                new[contact] = [new[contact][0] + 1, '2026/10/18;' + new[contact][1]]
+        new.update(make_archive(rows // 50, seed=1))
+
+        old_file, new_file = os.path.join(directory, 'old.csl'), os.path.join(directory, 'new.csl')
+        re_write_csl(old_file, old)
+        re_write_csl(new_file, new)
+        delta_file = os.path.join(directory, 'changes.csldelta')
+
+        by_stream = timed(diff_archives, old_file, new_file, delta_file)
+        peak = peak_memory(diff_archives, old_file, new_file, delta_file)
+        print(f'Diff of archives of {rows} rows: {by_stream:.2f}s {peak / 1e6:.1f}MB, '
+              f'delta file {os.path.getsize(delta_file) / os.path.getsize(new_file):.1%} of the archive')
+        print(diff_archives(old_file, new_file))
+
+        applying = timed(apply_delta, delta_file, old_file)
+        left = diff_archives(old_file, new_file)
+        print(f'Delta applied in {applying:.2f}s, {left.new + left.removed + left.new_dates + left.changed} differences left')
+    finally:
+        shutil.rmtree(directory)
+
+
+def csl_rows_by_pipeline(csv_rows):
+    """csl_rows as it was, calling pipeline, with its deepcopy, on each row."""
+
+    for i, row in enumerate(csv_rows):
+        if not (i == 0 and len(row) < 2):
+                yield pipeline(row, strip_row_fields, partial(pad_list_with_defaults, padding=CSL_ROW_DEFAULTS),
+                           convert_times_worked_to_int)
+
+
+def bench_pipeline(rows: int = 100000)-> None:
+    """Time csl_rows, composed once, against calling pipeline on each row."""
+
+    archive = make_archive(rows)
+    csv_rows = [['Callsign']]
+    csv_rows += [[f' {callsign}', locator, exchange, str(times_seen), dates]
+                 for (callsign, locator, exchange), (times_seen, dates) in archive.items()]
+
+    by_pipeline = timed(list, csl_rows_by_pipeline(csv_rows))
+    print(f'pipeline on each row, {rows} rows: {by_pipeline:.2f}s')
+
+    composed = timed(list, csl_rows(csv_rows))
+    print(f'Composed csl_rows, {rows} rows: {composed:.2f}s ({by_pipeline / composed:.1f}x)')
+
+    assert list(csl_rows(csv_rows)) == list(csl_rows_by_pipeline(csv_rows))
+
+
+BENCHMARKS = {
+    'checker': bench_checker,
+    'loader': bench_loader,
+    'cache': bench_cache,
+    'database': bench_database,
+    'writer': bench_writer,
+    'edi': bench_edi,
+    'merge': bench_merge,
+    'diff': bench_diff,
+    'pipeline': bench_pipeline,
+    }
+
+
+if __name__ == '__main__':
+
+    name = sys.argv[1] if len(sys.argv) > 1 else 'checker'
+    BENCHMARKS[name](*(int(arg) for arg in sys.argv[2:]))
@@ -0,0 +1,242 @@
+"""Build an archive from whole directories of .edi files, from the command line, without Qt.
+
+    The .edi files are found in the directories and all their sub-directories,
+    read (by a pool of processes), added to the archive (an existing archive is
+    added to, as by the Archive Maker) in one pass, in sorted
+    order of their paths, with the same rules as the Archive Maker, and the
+    archive is written once at the end.
+
+    The progress is saved every so many files in a checkpoint file next to the
+    archive (archive.csl.import), so an interrupted import can be carried on
+    with --resume. The checkpoint is removed when the archive has been written.
+
+    Use:
+    python bulkimport.py archive.csl directory [directory ...] [--processes N] [--resume] [--checkpoint FILES]
+
+    e.g.
+    python bulkimport.py G4AUC.csl C:/Minos/Logs --processes 4"""
+
+# Version 1.0, October 2026
+
+import os
+import sys
+import time
+import marshal
+import argparse
+
+from Utilities import read_archive_file, re_write_csl
+from ediimport import read_edi_files, add_edi_contacts
+from archivecheck import default_processes
+
+# Extension of the .edi files, in any case
+EDI_EXTENSION = '.edi'
+
+# Files added between saving checkpoints
+CHECKPOINT_FILES = 100
+
+# Version of the layout of the checkpoint file
+CHECKPOINT_VERSION = 1
+
+
+class BulkImportError(Exception):
+    """The import can't be carried on from its checkpoint."""
+
+
+class ImportStats:
+    """Counts of what has been imported so far, and how fast.
+
+        files -> .edi files added to the archive (including any before resuming)
+        qsos -> QSO records read from them
+        new_contacts -> contacts not already in the archive
+        errors -> list of (file name, error) for files that could not be read to the end
+        """
+
+    __slots__ = ('total_files', 'files', 'qsos', 'new_contacts', 'errors', 'start', 'resumed_files')
+
+    def __init__(self, total_files: int, resumed_files: int = 0):
+
+        self.total_files = total_files
+        self.files = resumed_files
+        self.resumed_files = resumed_files
+        self.qsos = 0
+        self.new_contacts = 0
+        self.errors = []
+        self.start = time.perf_counter()
+
+    def elapsed(self)-> float:
+        """Return the seconds since the import (or this part of it) started."""
+
+        return time.perf_counter() - self.start
+
+    def files_per_second(self)-> float:
+
+        return (self.files - self.resumed_files) / max(self.elapsed(), 1e-9)
+
+    def qsos_per_second(self)-> float:
+
+        return self.qsos / max(self.elapsed(), 1e-9)
+
+    def __str__(self):
+
+        return (f'{self.files}/{self.total_files} files, {self.qsos} QSOs, {self.new_contacts} new contacts '
+                f'in {self.elapsed():.1f}s ({self.files_per_second():.1f} files/s, '
+                f'{self.qsos_per_second():.0f} QSOs/s)')
+
+
+def find_edi_files(directories: list)-> list:
+    """Return the paths of all the .edi files in `directories` and their sub-directories, sorted."""
+
+    file_names = []
+    for directory in directories:
+        for path, sub_directories, names in os.walk(directory):
+            file_names += [os.path.join(path, name) for name in names
+                           if os.path.splitext(name)[1].lower() == EDI_EXTENSION]
+
+    return sorted(file_names)
+
+
+def checkpoint_name(file_name: str)-> str:
+    """Return the name of the checkpoint file of an import into the archive `file_name`."""
+
+    return file_name + '.import'
+
+
+def save_checkpoint(file_name: str, file_names: list, files_done: int, archive_dict: dict)-> None:
+    """Save the archive built from the first `files_done` of `file_names`, replacing the last checkpoint."""
+
+    temp_name = checkpoint_name(file_name) + '.tmp'
+    with open(temp_name, 'wb') as f:
+        marshal.dump({'version': CHECKPOINT_VERSION, 'files': file_names[:files_done],
+                      'contacts': list(archive_dict), 'when_worked': list(archive_dict.values())}, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_name, checkpoint_name(file_name))
+
+
+def load_checkpoint(file_name: str, file_names: list)-> tuple:
+    """Load the checkpoint of an import of `file_names` into the archive `file_name`.
+
+        Raises BulkImportError if there is none, or it was of other files.
+
+        Return -> (files done, archive dictionary)"""
+
+    try:
+        with open(checkpoint_name(file_name), 'rb') as f:
+            checkpoint = marshal.load(f)
+    except (OSError, ValueError, EOFError, TypeError) as e:
+        raise BulkImportError(f'No checkpoint to resume from: {e}')
+
+    if not isinstance(checkpoint, dict) or checkpoint.get('version') != CHECKPOINT_VERSION:
+        raise BulkImportError('The checkpoint was made by another version')
+
+    done = checkpoint['files']
+    if done != file_names[:len(done)]:
+        raise BulkImportError('The .edi files have changed since the checkpoint, start the import again')
+
+    return len(done), dict(zip(checkpoint['contacts'], checkpoint['when_worked']))
+
+
+def bulk_import(file_name: str, directories: list, processes: int = 1, resume: bool = False,
+                checkpoint_files: int = CHECKPOINT_FILES, progress=None)-> ImportStats:
+    """Add the .edi files in `directories` to the archive `file_name` (.csl or .csldb),
+        which is created if it doesn't exist.
+
+        processes -> number of worker processes reading the files, 1 reads them in this process
+        resume -> carry on from the checkpoint of an interrupted import
+        checkpoint_files -> files added between saving checkpoints, at least 1
+        progress -> called with the ImportStats after each file is added
+
+        A file that can't be read to the end is reported in the stats errors,
+        with the contacts read before the error added.
+
+        Raises ValueError if checkpoint_files is less than 1.
+
+        Return -> the ImportStats of the import"""
+
+    if checkpoint_files < 1:
+        raise ValueError(f'checkpoint_files must be at least 1, not {checkpoint_files}')
+
+    file_names = find_edi_files(directories)
+
+    if resume:
+        files_done, archive_dict = load_checkpoint(file_name, file_names)
+    else:
+        files_done, archive_dict = 0, {}
+        if os.path.exists(file_name):
+            read_archive_file(file_name, archive_dict)
+
+    stats = ImportStats(len(file_names), files_done)
+
+    for edi_contacts in read_edi_files(file_names[files_done:], processes):
+        new, changed = add_edi_contacts(archive_dict, edi_contacts)
+
+        stats.files += 1
+        stats.qsos += len(edi_contacts.contacts)
+        stats.new_contacts += len(new)
+        if edi_contacts.error is not None:
+            stats.errors.append((edi_contacts.file_name, edi_contacts.error))
+
+        if stats.files % checkpoint_files == 0 and stats.files < len(file_names):
+            save_checkpoint(file_name, file_names, stats.files, archive_dict)
+
+        if progress is not None:
+            progress(stats)
+
+    # written once, re_write_csl drops the dummy entry of files with no QSO records
+    re_write_csl(file_name, archive_dict)
+
+    if os.path.exists(checkpoint_name(file_name)):
+        os.remove(checkpoint_name(file_name))
+
+    return stats
+
+
+def positive_int(text: str)-> int:
+    """argparse type of a whole number of at least 1."""
+
+    try:
+        value = int(text)
+    except ValueError:
+        value = 0
+
+    if value < 1:
+        raise argparse.ArgumentTypeError(f'{text!r} is not a whole number of at least 1')
+
+    return value
+
+
+def main(arguments: list = None)-> int:
+
+    parser = argparse.ArgumentParser(description='Build an archive from directories of .edi files.')
+    parser.add_argument('archive', help='the archive to write, .csl or .csldb')
+    parser.add_argument('directories', nargs='+', help='directories to search for .edi files')
+    parser.add_argument('--processes', type=positive_int, default=default_processes(),
+                        help='number of processes reading the files (default: the number of processors)')
+    parser.add_argument('--resume', action='store_true', help='carry on an interrupted import from its checkpoint')
+    parser.add_argument('--checkpoint', type=positive_int, default=CHECKPOINT_FILES, metavar='FILES',
+                        help=f'files added between checkpoints (default: {CHECKPOINT_FILES})')
+    args = parser.parse_args(arguments)
+
+    def progress(stats):
+        if stats.files % args.checkpoint == 0 or stats.files == stats.total_files:
+            print(stats, file=sys.stderr)
+
+    try:
+        stats = bulk_import(args.archive, args.directories, args.processes, args.resume, args.checkpoint, progress)
+    except BulkImportError as e:
+        print(e, file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        print('Interrupted, carry on with --resume', file=sys.stderr)
+        return 1
+
+    for edi_file, error in stats.errors:
+        print(f'{edi_file}: {error}', file=sys.stderr)
+
+    print(stats)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,9 +1,32 @@
 """Routines to check the format of csl files."""
 
 # Version 1.0, February 2018
+# Version 1.1, October 2026 - patterns compiled once
 
 import re
 
+# Patterns compiled once, they are used for every line of an archive
+DATES_PATTERN = re.compile('([1-2][0,9][0-9][0-9][/][0-1][0-9][/][0-3][0-9][;])*')
+CALLSIGN_PREFIX_PATTERN = re.compile('(([1-9][A-Z])|([A-Z]){1,2}?)([0-9])*')
+CALLSIGN_BODY_PATTERN = re.compile('(([1-9][A-Z])|([A-Z]){1,2}?)([0-9])+([A-Z])*')
+CALLSIGN_SUFFIX_PATTERN = re.compile('(([0-9,A-Z])|([A-Z]){1,2}?)')  # /P, /MM, /3 etc
+LOCATOR_6_PATTERN = re.compile('[A-R][A-R][0-9][0-9][A-X][A-X]')
+LOCATOR_8_PATTERN = re.compile('[A-R][A-R][0-9][0-9][A-X][A-X][0-9][0-9]')
+
+# A whole csl line that checkLine would pass, in the plain form re_write_csl writes:
+# five fields, each may be quoted, with no spaces, commas or quotes inside them.
+# Groups 2, 4, 6, 8 and 10 are the callsign, locator, exchange, times worked and dates.
+# A line that doesn't match may still be correct, check it with checkLine.
+_BODY = '(?:[1-9][A-Z]|[A-Z]{1,2}?)[0-9]+[A-Z]*'
+_PREFIX = '(?:[1-9][A-Z]|[A-Z]{1,2}?)[0-9]*'
+_SUFFIX = '(?:[0-9A-Z]|[A-Z]{1,2}?)'
+PLAIN_LINE_PATTERN = re.compile(
+    f'("?)({_BODY}|{_BODY}/{_SUFFIX}|{_PREFIX}/{_BODY}|{_BODY}/{_PREFIX})\\1,'
+    '("?)([A-R][A-R][0-9][0-9][A-X][A-X](?:[0-9][0-9])?)\\3,'
+    '("?)([^,"\\s]*)\\5,'
+    '("?)([0-9]+)\\7,'
+    '("?)((?:[1-2][09][0-9][0-9]/[0-1][0-9]/[0-3][0-9];)+)\\9')
+
 class CheckFormatError(ValueError):
     """Raised when a format error is detected in the csv line."""
 
@@ -18,9 +41,7 @@ def checkDates(dates: str)-> bool:
         return False
 
     if dates:
-        pattern = '([1-2][0,9][0-9][0-9][/][0-1][0-9][/][0-3][0-9][;])*'
-
-        R = re.fullmatch(pattern, dates)
+        R = DATES_PATTERN.fullmatch(dates)
         correct = R is not None
     else:
         correct = False
@@ -34,13 +55,9 @@ def checkCallsign(callsign: str)-> bool:
     if not isinstance(callsign, str):
         return False
 
-    callsign_prefix_pattern = '(([1-9][A-Z])|([A-Z]){1,2}?)([0-9])*'
-    callsign_body_pattern = '(([1-9][A-Z])|([A-Z]){1,2}?)([0-9])+([A-Z])*'
-    callsign_suffix_pattern = '(([0-9,A-Z])|([A-Z]){1,2}?)' # /P, /MM, /3 etc
-
     if callsign:
         if '/' not in callsign:
-            body_match = re.fullmatch(callsign_body_pattern, callsign)
+            body_match = CALLSIGN_BODY_PATTERN.fullmatch(callsign)
             correct = body_match is not None
         else:
             strokes = callsign.count('/')
@@ -48,11 +65,11 @@ def checkCallsign(callsign: str)-> bool:
             if strokes == 1:
                 parts = callsign.split('/')
 
-                body_match_before_stroke = re.fullmatch(callsign_body_pattern, parts[0])
-                body_match_after_stroke = re.fullmatch(callsign_body_pattern, parts[1])
-                suffix_match = re.fullmatch(callsign_suffix_pattern, parts[1])
-                prefix_match_before_stroke = re.fullmatch(callsign_prefix_pattern, parts[0])
-                prefix_match_after_stroke = re.fullmatch(callsign_prefix_pattern, parts[1])
+                body_match_before_stroke = CALLSIGN_BODY_PATTERN.fullmatch(parts[0])
+                body_match_after_stroke = CALLSIGN_BODY_PATTERN.fullmatch(parts[1])
+                suffix_match = CALLSIGN_SUFFIX_PATTERN.fullmatch(parts[1])
+                prefix_match_before_stroke = CALLSIGN_PREFIX_PATTERN.fullmatch(parts[0])
+                prefix_match_after_stroke = CALLSIGN_PREFIX_PATTERN.fullmatch(parts[1])
 
                 correct = (body_match_before_stroke is not None and suffix_match is not None) \
                     or (prefix_match_before_stroke is not None and body_match_after_stroke is not None) \
@@ -85,10 +102,10 @@ def checkLocator(locator: str)-> bool:
     # use regular expressions to try to match the correct patterns
 
     if len(locator) == 6:
-        R = re.match('[A-R][A-R][0-9][0-9][A-X][A-X]', locator)
+        R = LOCATOR_6_PATTERN.match(locator)
         valid = R is not None
     elif len(locator) == 8:
-        R = re.match('[A-R][A-R][0-9][0-9][A-X][A-X][0-9][0-9]', locator)
+        R = LOCATOR_8_PATTERN.match(locator)
         valid = R is not None
     else:
         valid = False
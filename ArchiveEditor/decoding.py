@@ -0,0 +1,59 @@
+"""Decoding of the bytes of .edi and .csl files, a line at a time.
+
+    Each line is decoded as UTF-8 if it can be, otherwise as Windows cp1252,
+    otherwise as latin-1 (which decodes any bytes), so a line with an accented
+    character in another encoding is still read, as are the lines after it."""
+
+# Version 1.0, October 2026
+
+# Tried in order for each line, latin-1 never fails
+ENCODINGS = ('utf-8', 'cp1252', 'latin-1')
+
+
+def decode_fields(fields: list)-> list:
+    """Return the byte strings `fields`, all from one line, decoded with the first
+        of ENCODINGS that decodes all of them."""
+
+    try:
+        return [field.decode('utf-8') for field in fields]
+    except UnicodeDecodeError:
+        pass
+
+    for encoding in ENCODINGS[1:]:
+        try:
+            return [field.decode(encoding) for field in fields]
+        except UnicodeDecodeError:
+            pass
+
+
+def decode_line(line: bytes)-> str:
+    """Return the bytes of one line decoded with the first of ENCODINGS that decodes it."""
+
+    return decode_fields([line])[0]
+
+
+def decode_lines(f):
+    """Generator to decode the lines of the binary file `f` a line at a time, so only
+        one line is held, split at '\r\n', '\r' or '\n' as a text file opened with
+        newline='' splits them.
+
+        Yields -> each line, with its line end"""
+
+    for data in f:
+        if data.count(b'\r') > data.endswith(b'\r\n'):
+            # a '\r' other than in the line end, the file is only split at '\n'
+            for line in data.splitlines(keepends=True):
+                yield decode_line(line)
+        else:
+            yield decode_line(data)
+
+
+def decode_text(data: bytes)-> str:
+    """Return the bytes of a whole file decoded a line at a time, keeping the line ends.
+
+        Usually the whole file is UTF-8 and is decoded in one go."""
+
+    try:
+        return data.decode('utf-8')
+    except UnicodeDecodeError:
+        return ''.join([decode_line(line) for line in data.splitlines(keepends=True)])
@@ -0,0 +1,100 @@
+"""Adding the contacts of .edi files to an archive, for the Archive Maker, without any Qt,
+    so that the files can be read at the same time by a pool of processes.
+
+    Each file is read into an EdiContacts, the contacts and dates in the file,
+    which are then added to the archive dictionary in the order the files were chosen,
+    so the archive is the same as if the files were read one after another."""
+
+# Version 1.0, October 2026
+
+from concurrent.futures import ProcessPoolExecutor
+
+from edireader import QSOReader
+from Utilities import format_date
+
+
+class EdiContacts:
+    """The contacts read from one .edi file.
+
+        file_name -> the .edi file
+        contacts -> list of ((callsign, locator, exchange), 'yyyy/mm/dd') for each QSO, in file order
+        found_records -> True if the file has a [QSORecords section
+        error -> the exception that stopped the file being read, after `contacts`, or None
+        """
+
+    __slots__ = ('file_name', 'contacts', 'found_records', 'error')
+
+    def __init__(self, file_name: str, contacts: list, found_records: bool, error: Exception = None):
+
+        self.file_name = file_name
+        self.contacts = contacts
+        self.found_records = found_records
+        self.error = error
+
+
+def read_edi_contacts(file_name: str)-> EdiContacts:
+    """Read the contacts of the .edi file `file_name`, in a worker process or this one."""
+
+    reader = QSOReader(file_name, ('date', 'call', 'exchange', 'locator'))
+    contacts = []
+
+    try:
+        for qso in reader:  # iterate through the QSO records in the file
+            contacts.append(((qso.call, qso.locator, qso.exchange), format_date(qso.date)))
+    except Exception as e:
+        # raised again when the contacts before it have been added, as if read one at a time
+        return EdiContacts(file_name, contacts, reader.found_records, e)
+
+    return EdiContacts(file_name, contacts, reader.found_records)
+
+
+def read_edi_files(file_names: list, processes: int = 1):
+    """Generator to read the contacts of the .edi files `file_names`.
+
+        processes -> number of worker processes, 1 reads the files in this process.
+
+        Yields -> the EdiContacts of each file, in the order of file_names,
+            each as soon as it and the files before it have been read."""
+
+    if processes <= 1 or len(file_names) < 2:
+        for file_name in file_names:
+            yield read_edi_contacts(file_name)
+        return
+
+    with ProcessPoolExecutor(max_workers=min(processes, len(file_names))) as executor:
+        # map returns the files in the order they were submitted
+        yield from executor.map(read_edi_contacts, file_names)
+
+
+def add_edi_contacts(archive_dict: dict, edi_contacts: EdiContacts)-> tuple:
+    """Add the contacts of an .edi file to the archive dictionary.
+
+        A new contact (with a callsign) is added as seen once, a contact already in
+        the archive has the date added and its times seen increased, unless it was
+        already seen on that date.
+
+        Return -> (new, changed) the list of (contact, date) not already in the archive,
+            in file order, and the set of contacts added or changed"""
+
+    new = []
+    changed = set()
+
+    for contact, date in edi_contacts.contacts:
+        if contact not in archive_dict:
+            if contact[0] != '':  # ignore blank callsign entries
+                archive_dict[contact] = [1, date + ';']
+                new.append((contact, date))
+                changed.add(contact)
+        else:
+            when_worked = archive_dict[contact]
+            # don't repeatedly add the same contact on the same date
+            if date not in when_worked[1]:
+                # increment times seen and add date to contact
+                when_worked[0] += 1
+                when_worked[1] += date + ';'
+                changed.add(contact)
+
+    if not edi_contacts.found_records:
+        archive_dict[('', '', '')] = [0, ';']  # Create dummy entry if file does not contain [QSORecords
+
+    return new, changed
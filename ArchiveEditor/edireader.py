@@ -0,0 +1,136 @@
+"""Streaming reader of the QSO records of a REG1TEST (.edi) contest entry file.
+
+    Shared by the Contest Reporter (Utilities.read_entry_file) and the Archive Maker."""
+
+# Version 1.0, October 2026
+# Version 1.1, October 2026 - the file is read as bytes and only the fields kept are decoded,
+#   a line at a time with an encoding fallback (decoding.py)
+
+from decoding import decode_fields
+
+# The fields of a [QSORecords line, in order, e.g.
+# 170606;1904;G4WJS;1;59;001;59;005;;IO91NP;29;;;;
+QSO_FIELDS = ('date', 'time', 'call', 'mode', 'sent_rst', 'sent_serial', 'received_rst', 'received_serial',
+              'exchange', 'locator', 'points', 'new_exchange', 'new_locator', 'new_dxcc', 'duplicate')
+
+# A line is a QSO record if it has at least this many fields (up to the locator)
+MIN_QSO_FIELDS = 10
+
+# Size (bytes) of the blocks of lines read from the file at a time
+BLOCK_SIZE = 1 << 20
+
+
+class QSORecord:
+    """One QSO of an .edi file.
+
+        Only the fields asked for when reading are set, the others are None.
+        Fields missing from the end of a short line are ''.
+        `line` is the text of the line, if asked for."""
+
+    __slots__ = QSO_FIELDS + ('line',)
+
+    def __getattr__(self, name):
+        # only called for slots that have not been set
+        if name in QSORecord.__slots__:
+            return None
+        raise AttributeError(name)
+
+    def __repr__(self):
+
+        return 'QSORecord(' + ', '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__
+                                        if getattr(self, name) is not None) + ')'
+
+
+class QSOReader:
+    """Iterate over the QSO records of the .edi file `file_name`.
+
+        fields -> the names of the QSORecord fields to set (see QSO_FIELDS), and 'line'
+            to keep the text of each line
+
+        The file is read as bytes a block of lines at a time, each line is split only as
+        far as the last field asked for and only one record is held at a time.
+        A block that isn't all UTF-8 is split as bytes and only the fields asked for are
+        decoded, a line at a time, as UTF-8, cp1252 or latin-1 (the first that decodes them
+        all), so a line in another encoding doesn't stop the file being read.
+
+        found_records is True once the [QSORecords section has been found.
+        """
+
+    def __init__(self, file_name: str, fields=QSO_FIELDS):
+
+        unknown = set(fields) - set(QSORecord.__slots__)
+        if unknown:
+            raise ValueError(f'Unknown QSO record fields: {", ".join(sorted(unknown))}')
+
+        self.file_name = file_name
+        self.fields = tuple(fields)
+        self.found_records = False
+
+    def __iter__(self):
+
+        with open(self.file_name, 'rb', buffering=BLOCK_SIZE) as f:
+
+            for line in f:
+                if b'[QSORecords' in line:
+                    # skip until the line contains [QSORecords
+                    self.found_records = True
+                    # keep anything after it that is on another line ended only by '\r'
+                    data = line[line.index(b'[QSORecords'):]
+                    data = data[len(data.splitlines()[0]):]
+                    break
+            else:
+                return
+
+            while True:
+                yield from self.records(data)
+
+                block = f.readlines(BLOCK_SIZE)
+                if not block:
+                    break
+                data = b''.join(block)
+
+    def records(self, data: bytes):
+        """Generator to yield the QSORecords of the lines in the bytes `data`."""
+
+        positions = [(name, QSO_FIELDS.index(name)) for name in self.fields if name != 'line']
+        keep_line = 'line' in self.fields
+
+        # split off one more field than needed, the rest of the line is not split
+        max_split = max([MIN_QSO_FIELDS - 1] + [posn for name, posn in positions]) + 1
+
+        try:
+            # usually the whole block is UTF-8, lines ended by '\n', '\r\n' or '\r' as a text file is read
+            lines = data.decode('utf-8').replace('\r\n', '\n').replace('\r', '\n').split('\n')
+            separator, decode = ';', None
+        except UnicodeDecodeError:
+            # split the lines as bytes and decode only the fields kept
+            lines = data.splitlines()
+            separator, decode = b';', decode_fields
+
+        for line in lines:
+            values = line.split(separator, max_split)
+
+            if len(values) >= MIN_QSO_FIELDS:
+                record = QSORecord()
+
+                if decode:
+                    fields = [values[posn] if posn < len(values) else b'' for name, posn in positions]
+                    fields = decode(fields + [line] if keep_line else fields)
+                    for (name, posn), value in zip(positions, fields):
+                        setattr(record, name, value)
+                    if keep_line:
+                        line = fields[-1]
+                else:
+                    for name, posn in positions:
+                        setattr(record, name, values[posn] if posn < len(values) else '')
+
+                if keep_line:
+                    record.line = line
+
+                yield record
+
+
+def read_qso_records(file_name: str, fields=QSO_FIELDS):
+    """Generator to yield the QSORecords of the .edi file `file_name` with only `fields` set."""
+
+    yield from QSOReader(file_name, fields)
@@ -0,0 +1,121 @@
+"""Bounded edit (Levenshtein) distance between callsigns, used to find
+    near matches with an inserted or dropped character, e.g. G4AUC and G4AAUC,
+    which the place by place `Utilities.similarity` can't see."""
+
+# Version 1.0, October 2026
+
+from collections import defaultdict
+
+# Largest edit distance offered in the user interfaces,
+# the deletion neighbourhoods grow quickly beyond this
+MAX_EDIT_DISTANCE = 3
+
+
+def distance(s1: str, s2: str)-> int:
+    """Return the edit distance between `s1` and `s2`, the number of characters
+        that must be inserted, deleted or changed to turn one into the other.
+
+        Uses Myers' bit-parallel algorithm, one column of the
+        distance table is worked out at a time in a few integer operations."""
+
+    if len(s1) < len(s2):
+        s1, s2 = s2, s1
+
+    length = len(s2)
+    if not length:
+        return len(s1)
+
+    # bit i of peq[c] is set if s2[i] == c
+    peq = defaultdict(int)
+    for posn, c in enumerate(s2):
+        peq[c] |= 1 << posn
+
+    mask = (1 << length) - 1
+    last = 1 << (length - 1)
+
+    pv, mv, score = mask, 0, length  # vertical +1 and -1 differences, last row
+
+    for c in s1:
+        eq = peq.get(c, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | ~(xh | pv)
+        mh = pv & xh
+
+        if ph & last:
+            score += 1
+        elif mh & last:
+            score -= 1
+
+        ph = (ph << 1) | 1
+        mh = mh << 1
+        pv = (mh | ~(xv | ph)) & mask
+        mv = ph & xv & mask
+
+    return score
+
+
+def within(s1: str, s2: str, max_distance: int)-> bool:
+    """Return True if the edit distance between `s1` and `s2` is at most `max_distance`."""
+
+    # the difference in length is a lower bound on the distance
+    if abs(len(s1) - len(s2)) > max_distance:
+        return False
+
+    return distance(s1, s2) <= max_distance
+
+
+def deletions(s: str, max_distance: int)-> set:
+    """Return the strings made by deleting up to `max_distance` characters from `s`, including `s`."""
+
+    found = {s}
+    layer = {s}
+    for i in range(max_distance):
+        layer = {t[:posn] + t[posn + 1:] for t in layer for posn in range(len(t))}
+        found |= layer
+
+    return found
+
+
+class DeletionIndex:
+    """Index of strings that answers "which strings are within `max_distance`
+        edits of this one".
+
+        Each string is stored under its deletion neighbourhood, the strings
+        made by deleting up to max_distance of its characters. Two strings
+        within max_distance edits always have a deletion in common, so only
+        the strings sharing a key with the probe need their distance worked out.
+
+        The keys are built the first time the index is queried.
+        """
+
+    def __init__(self, strings, max_distance: int = 1):
+
+        self.strings = list(strings)
+        self.max_distance = max_distance
+        self.buckets = None  # {deletion: [strings]}
+
+    def build(self)-> dict:
+        """Build (and keep) the deletion neighbourhood keys of all the strings."""
+
+        buckets = defaultdict(list)
+        for s in self.strings:
+            for key in deletions(s, self.max_distance):
+                buckets[key].append(s)
+
+        self.buckets = buckets
+
+        return buckets
+
+    def query(self, probe: str)-> list:
+        """Return the indexed strings within max_distance edits of `probe`, including `probe` itself."""
+
+        buckets = self.buckets
+        if buckets is None:
+            buckets = self.build()
+
+        found = set()
+        for key in deletions(probe, self.max_distance):
+            found.update(buckets.get(key, ()))
+
+        return [s for s in found if within(probe, s, self.max_distance)]
@@ -44,11 +44,13 @@ def LookUpCall(call):
 	        # gets here when 'for' is exhausted
             return ''
 
-def isLocInCountry(call: str, locator: str)-> bool:
+def isLocInCountry(call: str, locator: str, mainprefix: str = None)-> bool:
     """Checks whether the first four
         characters of the location are appropriate
         for the country indicated by the callsign.
 
+        mainprefix -> the result of LookUpCall(call) if already known.
+
         Returns -> False if the locator does not match the callsign
             for a supported country, True otherwise.
         """
@@ -60,7 +62,8 @@ def isLocInCountry(call: str, locator: str)-> bool:
 
     locator = locator.upper()
 
-    mainprefix = LookUpCall(call)
+    if mainprefix is None:
+        mainprefix = LookUpCall(call)
 
     if mainprefix in locatorsquares.sections():
         pr = locatorsquares[mainprefix]
@@ -0,0 +1,106 @@
+"""Bulk versions of Utilities.similarity for comparing many callsigns
+    or locators against a whole archive at once.
+
+    Uses NumPy if it is installed, otherwise falls back to Utilities.similarity."""
+
+# Version 1.0, October 2026
+
+from Utilities import similarity
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Limit on the size (bytes) of the comparison block made for a group of probes
+BLOCK_BYTES = 1 << 24
+
+
+def encode(strings: list, width: int):
+    """Encode the strings as rows of a `width` column uint8 matrix.
+
+        Rows are padded with zero bytes, which never match.
+
+        Return -> the matrix, or None if a string cannot be encoded
+            in one byte per character."""
+
+    if any('\0' in s for s in strings):
+        return None
+
+    try:
+        encoded = [s.encode('latin-1')[:width].ljust(width, b'\0') for s in strings]
+    except UnicodeEncodeError:
+        return None
+
+    return numpy.frombuffer(b''.join(encoded), dtype=numpy.uint8).reshape(len(strings), width)
+
+
+class SimilarityKernel:
+    """The strings of an archive field (callsigns or locators) encoded once
+        so that probes can be compared with every one of them in a few array
+        operations.
+
+        Gives the same counts as `Utilities.similarity(probe, s)`
+        for each string `s`.
+        """
+
+    def __init__(self, strings):
+
+        self.strings = list(strings)
+        self.width = max((len(s) for s in self.strings), default=0)
+
+        self.matrix = None
+        if numpy is not None and self.strings:
+            self.matrix = encode(self.strings, self.width)
+
+        if self.matrix is not None:
+            self.in_use = self.matrix != 0  # characters, not padding
+
+    def similarity_many(self, probes: list):
+        """Return the similarity of each probe with each string.
+
+            Return -> a len(probes) x len(strings) matrix (a list of lists
+                without NumPy) of the number of places that match."""
+
+        if self.matrix is None:
+            return [[similarity(probe, s) for s in self.strings] for probe in probes]
+
+        probe_matrix = encode(probes, self.width)
+        if probe_matrix is None:
+            return [[similarity(probe, s) for s in self.strings] for probe in probes]
+
+        rows, width = self.matrix.shape
+        block = max(1, BLOCK_BYTES // max(1, rows * width))
+
+        counts = numpy.empty((len(probes), rows), dtype=numpy.int32)
+        for start in range(0, len(probes), block):
+            group = probe_matrix[start:start + block, None, :]
+            same = (group == self.matrix[None, :, :]) & self.in_use[None, :, :]
+            counts[start:start + block] = same.sum(axis=2)
+
+        return counts
+
+    def similarity(self, probe: str):
+        """Return the similarity of `probe` with each string."""
+
+        return self.similarity_many([probe])[0]
+
+    def within_many(self, probes: list, threshold: int)-> list:
+        """For each probe return the strings that differ from it in at most `threshold` places.
+
+            Return -> a list (one for each probe) of lists of strings, in the order they were given."""
+
+        counts = self.similarity_many(probes)
+
+        if isinstance(counts, list):
+            return [[s for s, same in zip(self.strings, row) if same >= len(probe) - threshold]
+                    for probe, row in zip(probes, counts)]
+
+        strings = self.strings
+        return [[strings[i] for i in numpy.flatnonzero(row >= len(probe) - threshold)]
+                for probe, row in zip(probes, counts)]
+
+    def within(self, probe: str, threshold: int)-> list:
+        """Return the strings that differ from `probe` in at most `threshold` places."""
+
+        return self.within_many([probe], threshold)[0]
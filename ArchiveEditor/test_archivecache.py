@@ -0,0 +1,113 @@
+"""Test module for archivecache.py using unittest."""
+
+import os
+import unittest
+import Utilities
+import archivecache
+from archiveindex import ArchiveIndex, archive_index
+from archivetesting import ArchiveTestCase
+
+
+class Test_archiveCache(ArchiveTestCase):
+
+    def setUp(self):
+
+        super().setUp()
+
+        self.file_name = self.copy_archive('G4AUCa.csl')
+
+    def read(self, **kwargs):
+
+        archive_dict = {}
+        warnings = Utilities.read_archive_file(self.file_name, archive_dict, **kwargs)
+
+        return list(archive_dict.items()), warnings
+
+    def test_hit_same_as_parse(self):
+
+        parsed = self.read(use_cache=False)
+        self.assertFalse(os.path.exists(archivecache.cache_name(self.file_name)))
+
+        self.assertEqual(self.read(), parsed)  # writes the cache
+        self.assertTrue(os.path.exists(archivecache.cache_name(self.file_name)))
+
+        self.assertEqual(self.read(), parsed)  # from the cache file
+
+    def test_rows_not_shared(self):
+        """Changing the rows loaded from the cache should not change what is loaded next."""
+
+        parsed = self.read()
+        archive_rows = Utilities.load_archive_rows(self.file_name)
+
+        archive_rows.callsigns[0] = 'G4NEW'
+        archive_rows.dates[1] = ''
+
+        self.assertEqual(self.read(), parsed)
+
+    def test_changed_contents_same_size_and_time(self):
+        """The content hash should catch a change that leaves the size and modification time alone."""
+
+        self.read()
+        stat = os.stat(self.file_name)
+
+        with open(self.file_name, 'r+b') as f:
+            data = f.read()
+            f.seek(0)
+            f.write(data.replace(b'G4AUC', b'G4AUD', 1))
+        os.utime(self.file_name, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+        self.assertEqual(self.read(), self.read(use_cache=False))
+        self.assertIn(('G4AUD', 'IO91OJ', ''), dict(self.read()[0]))
+
+    def test_corrupt_cache_rebuilt(self):
+
+        parsed = self.read()
+
+        for contents in (b'', b'junk', archivecache.header() + b'\x00junk'):
+            with self.subTest(contents=contents):
+                with open(archivecache.cache_name(self.file_name), 'wb') as f:
+                    f.write(contents)
+
+                self.assertEqual(self.read(), parsed)
+
+                data, signature = archivecache.read_source(self.file_name)
+                self.assertIsNotNone(archivecache.load(self.file_name, signature))
+
+    def test_index_round_trip(self):
+
+        archive_dict = {}
+        Utilities.read_archive_file(self.file_name, archive_dict)
+        built = archive_index(self.file_name, archive_dict)  # saves the index state
+        loaded = archive_index(self.file_name, archive_dict)
+
+        self.assertEqual(loaded.state(), built.state())
+
+        fresh = ArchiveIndex(archive_dict)
+        for contact in list(archive_dict)[::5] + [('G4AUC', 'IO91OJ', ''), ('G4AAUC', 'IO91', '')]:
+            for similar_locators_checked in (False, True):
+                with self.subTest(contact=contact, similar_locators_checked=similar_locators_checked):
+                    self.assertEqual(loaded.candidates(contact, similar_locators_checked, edit_distance=1),
+                                     fresh.candidates(contact, similar_locators_checked, edit_distance=1))
+
+    def test_index_not_used_for_other_contents(self):
+        """A dictionary that is not what was read from the file gets a freshly built index."""
+
+        archive_dict = {}
+        Utilities.read_archive_file(self.file_name, archive_dict)
+        archive_index(self.file_name, archive_dict)
+
+        archive_dict[('G4NEW', 'IO91OJ', '')] = [1, '2026/10/18;']
+        index = archive_index(self.file_name, archive_dict)
+
+        self.assertIn(('G4NEW', 'IO91OJ', ''), dict(index.candidates(('G4NEW', 'IO91OJ', ''), False)))
+
+    def test_missing_file(self):
+
+        archive_dict = {('G4AUC', 'IO91OJ', ''): [1, '']}
+        index = archive_index(self.path('missing.csl'), archive_dict)
+
+        self.assertEqual(list(dict(index.candidates(('G4AUC', 'IO91OJ', ''), False))), list(archive_dict))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
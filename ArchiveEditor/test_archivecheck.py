@@ -0,0 +1,226 @@
+"""Test module for archivecheck.py using unittest."""
+
+import unittest
+import os
+import json
+import Utilities
+import archivecheck
+from archivetesting import ArchiveTestCase
+
+
+def legacy_report(archive_dict, similar_locators_checked):
+    """The report as Engine.runEngine made it before archivecheck.py."""
+
+    display_string = ''
+
+    def display(*items):
+        nonlocal display_string
+        display_string += ''.join('{} '.format(item) for item in items) + '\n'
+
+    for contact in sorted(archive_dict):
+        timesSeen, dates = archive_dict[contact]
+        display('\n' + '  ' + contact[0] + ',' + contact[1] + ',' + contact[2])
+        if timesSeen == 1:
+            display('      worked once on ' + dates)
+        else:
+            display('      worked ' + str(timesSeen) + ' times on ' + dates)
+        matchesList = Utilities.fuzzy_match(contact, similar_locators_checked, archive_dict)
+        if matchesList:
+            display('    Near Matches:')
+            for match in matchesList:
+                display('    ' + match[0] + ',' + match[1] + ',' + match[2] + ' ' + match[4])
+                if match[3] == 1:
+                    display('       worked once on ' + match[5])
+                else:
+                    display('       worked ' + str(match[3]) + ' times on ' + match[5])
+        report = Utilities.check_locator_is_in_correct_country(contact[0], contact[1])
+        if report:
+            display(report)
+
+    return display_string
+
+
+class Test_checkArchive(unittest.TestCase):
+
+    def setUp(self):
+
+        self.archive_dict = {}
+        Utilities.read_archive_file('G4AUClarge.csl', self.archive_dict, use_cache=False)
+
+    def test_serial_same_as_legacy_report(self):
+
+        for similar_locators_checked in (False, True):
+            with self.subTest(similar_locators_checked=similar_locators_checked):
+                self.assertEqual(''.join(archivecheck.check_archive(self.archive_dict, similar_locators_checked)),
+                                 legacy_report(self.archive_dict, similar_locators_checked))
+
+    def test_process_pool_same_as_serial(self):
+
+        # small chunks, so the archive is enough to share out
+        saved_min_chunk_size, archivecheck.MIN_CHUNK_SIZE = archivecheck.MIN_CHUNK_SIZE, 1
+        try:
+            for similar_locators_checked in (False, True):
+                with self.subTest(similar_locators_checked=similar_locators_checked):
+                    self.assertEqual(
+                        ''.join(archivecheck.check_archive(self.archive_dict, similar_locators_checked, processes=2)),
+                        ''.join(archivecheck.check_archive(self.archive_dict, similar_locators_checked, processes=1)))
+        finally:
+            archivecheck.MIN_CHUNK_SIZE = saved_min_chunk_size
+
+    def test_few_contacts_checked_without_process_pool(self):
+
+        saved_executor = archivecheck.ProcessPoolExecutor
+
+        def no_executor(*args, **kwargs):
+            raise AssertionError('process pool started')
+
+        archivecheck.ProcessPoolExecutor = no_executor
+        try:
+            contacts = sorted(self.archive_dict)[:2]
+            self.assertEqual(list(archivecheck.check_archive(self.archive_dict, True, processes=8, contacts=contacts)),
+                             list(archivecheck.check_archive(self.archive_dict, True, contacts=contacts)))
+        finally:
+            archivecheck.ProcessPoolExecutor = saved_executor
+
+
+class Test_checkArchiveIncremental(ArchiveTestCase):
+
+    def setUp(self):
+
+        super().setUp()
+        self.file_name = self.path('archive.csl')
+
+        self.archive_dict = self.read_archive('G4AUClarge.csl', use_cache=False)
+
+        # count the contacts that are checked rather than taken from the cache
+        self.checked = []
+        self.saved_check_contacts = archivecheck.check_contacts
+
+        def counting_check_contacts(contacts, *args):
+            self.checked.extend(contacts)
+            return self.saved_check_contacts(contacts, *args)
+
+        archivecheck.check_contacts = counting_check_contacts
+
+    def tearDown(self):
+
+        archivecheck.check_contacts = self.saved_check_contacts
+
+    def check(self, similar_locators_checked=True):
+
+        self.checked = []
+        return ''.join(archivecheck.check_archive_incremental(self.file_name, self.archive_dict,
+                                                              similar_locators_checked))
+
+    def full_check(self, similar_locators_checked=True):
+
+        checked, self.checked = self.checked, []
+        report = ''.join(archivecheck.check_archive(self.archive_dict, similar_locators_checked))
+        self.checked = checked
+
+        return report
+
+    def test_first_check_checks_everything(self):
+
+        self.assertEqual(self.check(), self.full_check())
+        self.assertEqual(len(self.checked), len(self.archive_dict))
+        self.assertTrue(os.path.exists(archivecheck.results_cache_name(self.file_name)))
+
+    def test_cache_holds_matches_not_report_text(self):
+
+        self.check()
+
+        with open(archivecheck.results_cache_name(self.file_name), encoding='utf-8') as f:
+            cache = json.load(f)
+
+        self.assertTrue(any(row[5] for row in cache['rows']))
+        self.assertTrue(all(isinstance(match, int) for row in cache['rows'] for match in row[5]))
+
+    def test_unchanged_archive_from_cache(self):
+
+        self.check()
+        self.assertEqual(self.check(), self.full_check())
+        self.assertEqual(self.checked, [])
+
+    def test_changed_rows_rechecked(self):
+
+        self.check()
+
+        self.archive_dict[('2E0NEY', 'IO81VK', '')][1] = '2018/01/02;' + self.archive_dict[('2E0NEY', 'IO81VK', '')][1]
+        del self.archive_dict[('G4CLA', 'IO92JL', '')]
+        self.archive_dict[('G4AUZ', 'IO91OJ', '')] = [1, '2018/01/02;']
+
+        self.assertEqual(self.check(), self.full_check())
+        self.assertIn(('G4AUZ', 'IO91OJ', ''), self.checked)
+        self.assertLess(len(self.checked), len(self.archive_dict) // 2)
+
+    def test_different_options_not_from_cache(self):
+
+        self.check(similar_locators_checked=True)
+        self.assertEqual(self.check(similar_locators_checked=False), self.full_check(similar_locators_checked=False))
+        self.assertEqual(len(self.checked), len(self.archive_dict))
+
+
+class Test_selfJoin(unittest.TestCase):
+
+    archive_dict = {
+        ('G4AUC', 'IO91OJ', ''): [3, '2018/01/02;2017/06/06;2016/05/03;'],
+        ('G4AUC/P', 'IO91OK', ''): [1, '2017/06/06;'],
+        ('G4AUZ/P', 'IO81OJ12', ''): [1, '2017/06/06;'],
+        ('M0XYZ', 'JO01AA', ''): [1, '2017/06/06;'],
+        ('M0XYQ', 'JO01AA10', ''): [1, '2017/06/06;'],
+        ('F6ABC', 'JN18AA', ''): [1, '2017/06/06;'],
+        }
+
+    def test_same_pairs_as_fuzzy_match(self):
+
+        archive_dict = {}
+        Utilities.read_archive_file('G4AUClarge.csl', archive_dict, use_cache=False)
+        archive_dict.update(self.archive_dict)
+
+        for similar_locators_checked in (False, True):
+            for edit_distance in (0, 1):
+                expected = set()
+                for contact in archive_dict:
+                    for match in Utilities.fuzzy_match(contact, similar_locators_checked, archive_dict,
+                                                       edit_distance=edit_distance):
+                        expected.add(frozenset((contact, match[:3])))
+
+                pairs = archivecheck.near_match_pairs(archive_dict, similar_locators_checked,
+                                                      edit_distance=edit_distance)
+                with self.subTest(similar_locators_checked=similar_locators_checked, edit_distance=edit_distance):
+                    self.assertEqual({frozenset(pair) for pair in pairs}, expected)
+
+    def test_each_pair_once(self):
+
+        archive_dict = {}
+        Utilities.read_archive_file('G4AUClarge.csl', archive_dict, use_cache=False)
+
+        order = list(archive_dict)
+        pairs = list(archivecheck.near_match_pairs(archive_dict, True))
+        self.assertEqual(len(pairs), len({frozenset(pair) for pair in pairs}))
+        self.assertTrue(all(order.index(a) < order.index(b) for a, b in pairs))
+
+    def test_clusters(self):
+
+        clusters = archivecheck.near_match_clusters(self.archive_dict, False)
+
+        self.assertEqual(clusters, [
+            [('G4AUC', 'IO91OJ', ''), ('G4AUC/P', 'IO91OK', ''), ('G4AUZ/P', 'IO81OJ12', '')],
+            [('M0XYQ', 'JO01AA10', ''), ('M0XYZ', 'JO01AA', '')],
+            ])
+
+
+class Test_DisjointSet(unittest.TestCase):
+
+    def test_groups(self):
+
+        groups = archivecheck.DisjointSet()
+        for a, b in ((1, 2), (3, 4), (2, 5), (6, 6)):
+            groups.union(a, b)
+
+        self.assertEqual(sorted(sorted(group) for group in groups.groups()), [[1, 2, 5], [3, 4], [6]])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,193 @@
+"""Test module for archivedb.py using unittest."""
+
+import sqlite3
+import unittest
+import Utilities
+import archivedb
+from edireader import QSOReader
+from archivetesting import ArchiveTestCase
+
+
+class Test_archiveDb(ArchiveTestCase):
+
+    def setUp(self):
+
+        super().setUp()
+
+        self.file_name = self.path('archive.csldb')
+
+        self.archive_dict = self.read_archive('G4AUClarge.csl', use_cache=False)
+
+    def read(self, file_name=None):
+
+        archive_dict = {}
+        warnings = Utilities.read_archive_file(file_name or self.file_name, archive_dict)
+
+        return archive_dict, warnings
+
+    def test_is_database(self):
+
+        self.assertTrue(archivedb.is_database('archive.csldb'))
+        self.assertTrue(archivedb.is_database('C:/Archives/Archive.CSLDB'))
+        self.assertFalse(archivedb.is_database('archive.csl'))
+        self.assertFalse(archivedb.is_database('archive.csldb.cache'))
+
+    def test_csl_round_trip(self):
+        """Importing a .csl file and exporting it again should give the file re_write_csl writes."""
+
+        # a copy, so the source tree isn't given a .csl.cache
+        csl_file = self.copy_archive('G4AUClarge.csl')
+
+        self.assertEqual(archivedb.import_csl(csl_file, self.file_name),
+                         Utilities.read_archive_file('G4AUClarge.csl', {}, use_cache=False))
+
+        archive_dict, warnings = self.read()
+        self.assertEqual(list(archive_dict.items()), list(self.archive_dict.items()))
+        self.assertEqual(warnings, '')
+
+        exported = self.path('exported.csl')
+        archivedb.export_csl(self.file_name, exported)
+
+        self.assertSameFile(exported, self.write_archive('rewritten.csl', self.archive_dict))
+
+    def test_awkward_values_kept(self):
+
+        archive_dict = {('G4AUC', 'IO91OJ', 'a,"b"'): [1, '2017/06/06;'],
+                        ('', '', 'TITLE'): [1, ''],
+                        ('G4AUC', 'IO91OJ', ''): ['x', '2017/06/06;2017/06/06;'],  # times seen not a number
+                        ('F/G4AUC', 'IN99', ''): [12, 'not a date;']}
+
+        Utilities.re_write_csl(self.file_name, archive_dict)
+
+        self.assertEqual(list(self.read()[0].items()), list(archive_dict.items()))
+
+    def test_rewrite_changes_only_differences(self):
+
+        Utilities.re_write_csl(self.file_name, self.archive_dict)
+
+        first, second, third = list(self.archive_dict)[:3]
+        self.archive_dict[first] = [9, '2026/10/18;' + self.archive_dict[first][1]]
+        del self.archive_dict[second]
+        self.archive_dict[('G4NEW', 'IO91OJ', '')] = [1, '2026/10/18;']
+
+        connection = sqlite3.connect(self.file_name)
+        third_id = connection.execute('SELECT id FROM contacts WHERE callsign = ? AND locator = ? AND exchange = ?',
+                                      third).fetchone()
+        connection.close()
+
+        Utilities.re_write_csl(self.file_name, self.archive_dict)
+
+        self.assertEqual(list(self.read()[0].items()), list(self.archive_dict.items()))
+
+        connection = sqlite3.connect(self.file_name)
+        self.assertEqual(connection.execute('SELECT id FROM contacts WHERE callsign = ? AND locator = ? '
+                                            'AND exchange = ?', third).fetchone(), third_id)
+        connection.close()
+
+    def test_write_rows_as_write_archive(self):
+        """Should give the archive write_archive would, reading the database it is writing."""
+
+        Utilities.re_write_csl(self.file_name, self.archive_dict)
+
+        first, second, third = list(self.archive_dict)[:3]
+        connection = sqlite3.connect(self.file_name)
+        third_id = connection.execute('SELECT id FROM contacts WHERE callsign = ? AND locator = ? AND exchange = ?',
+                                      third).fetchone()
+        connection.close()
+
+        def rows():
+            for contact, when_worked in archivedb.sorted_contacts(self.file_name):
+                if contact == first:
+                    when_worked = [9, '2026/10/18;' + when_worked[1]]
+                if contact != second:
+                    yield contact, when_worked
+            yield ('G4NEW', 'IO91OJ', ''), [1, '2026/10/18;']
+
+        archivedb.write_rows(self.file_name, rows())
+
+        self.archive_dict[first] = [9, '2026/10/18;' + self.archive_dict[first][1]]
+        del self.archive_dict[second]
+        self.archive_dict[('G4NEW', 'IO91OJ', '')] = [1, '2026/10/18;']
+        self.assertEqual(self.read()[0], self.archive_dict)
+        self.assertEqual(archivedb.find_contacts(self.file_name, worked_from='2026/10/18'),
+                         {first: self.archive_dict[first], ('G4NEW', 'IO91OJ', ''): [1, '2026/10/18;']})
+
+        connection = sqlite3.connect(self.file_name)
+        self.assertEqual(connection.execute('SELECT id FROM contacts WHERE callsign = ? AND locator = ? '
+                                            'AND exchange = ?', third).fetchone(), third_id)
+        connection.close()
+
+    def test_add_contacts_as_archive_maker(self):
+        """Should give the same archive as the Archive Maker adding the contacts to the dictionary."""
+
+        Utilities.re_write_csl(self.file_name, self.archive_dict)
+
+        contacts = [((qso.call, qso.locator, qso.exchange), Utilities.format_date(qso.date))
+                    for qso in QSOReader('testread.EDI', ('date', 'call', 'exchange', 'locator'))]
+        contacts += [(('G4AUC', 'IO91OJ', ''), '2026/10/18'), (('G4AUC', 'IO91OJ', ''), '2026/10/18'),
+                     (('', 'IO91OJ', ''), '2026/10/18'), (('G4NEW', 'IO91OJ', ''), '2026/10/18'),
+                     (('G4NEW', 'IO91OJ', ''), '2026/10/19')]
+
+        expected_new = []
+        for contact, date in contacts:  # as ArchiveMaker.addNewContacts
+            if contact not in self.archive_dict:
+                if contact[0] != '':
+                    self.archive_dict[contact] = [1, date + ';']
+                    expected_new.append((contact, date))
+            elif date not in self.archive_dict[contact][1]:
+                self.archive_dict[contact][0] += 1
+                self.archive_dict[contact][1] += date + ';'
+
+        self.assertEqual(archivedb.add_contacts(self.file_name, contacts), expected_new)
+        self.assertEqual(list(self.read()[0].items()), list(self.archive_dict.items()))
+        self.assertEqual(archivedb.find_contacts(self.file_name, worked_from='2026/10/19'),
+                         {('G4NEW', 'IO91OJ', ''): [2, '2026/10/18;2026/10/19;']})
+
+    def test_find_contacts(self):
+
+        Utilities.re_write_csl(self.file_name, self.archive_dict)
+
+        queries = [
+            (dict(callsign='G4AUC'), lambda c, w: c[0] == 'G4AUC'),
+            (dict(base_callsign='G4AUC'), lambda c, w: Utilities.remove_suffix(c[0]) == 'G4AUC'),
+            (dict(locator='IO91OJ'), lambda c, w: c[1] == 'IO91OJ'),
+            (dict(square='IO91'), lambda c, w: c[1][:4] == 'IO91'),
+            (dict(worked_from='2017/01/01'),
+             lambda c, w: any(d >= '2017/01/01' for d in w[1].split(';') if d)),
+            (dict(square='IO91', worked_from='2009/01/01', worked_to='2009/12/31'),
+             lambda c, w: c[1][:4] == 'IO91' and any('2009/01/01' <= d <= '2009/12/31' for d in w[1].split(';'))),
+            ]
+
+        for arguments, selected in queries:
+            with self.subTest(arguments=arguments):
+                expected = {contact: when_worked for contact, when_worked in self.archive_dict.items()
+                            if selected(contact, when_worked)}
+                found = archivedb.find_contacts(self.file_name, **arguments)
+
+                self.assertTrue(expected)
+                self.assertEqual(list(found.items()), list(expected.items()))
+
+    def test_wal_mode_and_indexes(self):
+
+        archivedb.create(self.file_name)
+
+        connection = sqlite3.connect(self.file_name)
+        self.assertEqual(connection.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+        plan = ' '.join(str(row) for row in connection.execute(
+            'EXPLAIN QUERY PLAN SELECT * FROM contacts WHERE base_callsign = ?', ('G4AUC',)))
+        connection.close()
+
+        self.assertIn('contacts_base_callsign', plan)
+
+    def test_later_version_not_read(self):
+
+        connection = sqlite3.connect(self.file_name)
+        connection.execute('PRAGMA user_version=99')
+        connection.close()
+
+        with self.assertRaises(archivedb.ArchiveDatabaseError):
+            self.read()
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
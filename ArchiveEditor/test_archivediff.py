@@ -0,0 +1,138 @@
+"""Test module for archivediff.py using unittest."""
+
+import os
+import shutil
+import unittest
+import archivedb
+import archivediff
+import archivemerge
+from archivetesting import ArchiveTestCase
+
+
+class Test_archiveDiff(ArchiveTestCase):
+
+    def setUp(self):
+
+        super().setUp()
+
+        self.old = self.read_archive('G4AUClarge.csl', use_cache=False)
+        contacts = list(self.old)
+
+        self.new = {contact: list(when_worked) for contact, when_worked in self.old.items()}
+        for contact in contacts[::7]:
+            del self.new[contact]
+        for contact in contacts[1::11]:
+            if contact in self.new:
+                self.new[contact] = archivemerge.combined([self.new[contact], [1, '2026/10/18;']])[0]
+        self.new[contacts[2]] = [99, self.new[contacts[2]][1]]
+        self.new[('G4NEW', 'IO91OJ', '')] = [1, '2026/10/18;']
+
+        self.old[('G4MOVED', 'IO91OJ', '')] = [1, '2017/06/06;']
+        self.new[('G4MOVED', 'IO91OK', '')] = [1, '2026/10/18;']
+
+        self.old_file = self.write_archive('old.csl', self.old)
+        self.new_file = self.write_archive('new.csl', self.new)
+
+    def test_diff(self):
+
+        contacts = list(self.old)
+        stats = archivediff.diff_archives(self.old_file, self.new_file)
+
+        removed = set(contacts[::7]) | {('G4MOVED', 'IO91OJ', '')}
+        new_dates = set(contacts[1::11]) - removed
+        self.assertEqual((stats.new, stats.removed, stats.new_dates, stats.dates_added, stats.changed),
+                         (2, len(removed), len(new_dates), len(new_dates), 0 if contacts[2] in removed else 1))
+        self.assertEqual(stats.unchanged, len(self.old) - len(removed) - len(new_dates) - stats.changed)
+        self.assertIn(('G4MOVED', ['IO91OJ'], ['IO91OK']), stats.listed)
+        self.assertEqual(stats.warnings, '')
+
+    def test_delta_applied(self):
+        """Applying the delta to the old archive should give the new archive."""
+
+        delta = self.path('changes' + archivediff.DELTA_EXTENSION)
+        archivediff.diff_archives(self.old_file, self.new_file, delta)
+
+        with open(delta) as f:
+            lines = f.readlines()
+        self.assertIn('-,"G4MOVED","IO91OJ","","1","2017/06/06;"\n', lines)
+        self.assertIn('+,"G4NEW","IO91OJ","","1","2026/10/18;"\n', lines)
+        self.assertIn('>,"{}","{}","{}","1","2026/10/18;"\n'.format(*list(self.old)[12]), lines)
+
+        archivediff.apply_delta(delta, self.old_file)
+        self.assertSameFile(self.old_file, self.new_file)
+
+        # no differences left
+        stats = archivediff.diff_archives(self.old_file, self.new_file)
+        self.assertEqual((stats.new, stats.removed, stats.new_dates, stats.changed), (0, 0, 0, 0))
+
+    def test_delta_applied_to_database(self):
+
+        delta = self.path('changes' + archivediff.DELTA_EXTENSION)
+        archivediff.diff_archives(self.old_file, self.new_file, delta)
+
+        database = self.path('old.csldb')
+        archivedb.import_csl(self.old_file, database)
+
+        archivediff.apply_delta(delta, database)
+
+        archive_dict = {}
+        archivedb.read_archive(database, archive_dict)
+        self.assertEqual(archive_dict, self.read_archive(self.new_file, use_cache=False))
+
+    def test_delta_applied_to_other_archive(self):
+
+        delta = self.path('changes' + archivediff.DELTA_EXTENSION)
+        archivediff.diff_archives(self.old_file, self.new_file, delta)
+
+        contacts = list(self.old)
+        other_file = self.write_archive('other.csl', {contacts[0]: [1, '2017/06/06;'], contacts[12]: [1, '2001/01/01;'],
+                                                      ('G4NEW', 'IO91OJ', ''): [1, '2017/06/06;'],
+                                                      ('G4OTHER', 'IO91OJ', ''): [1, '2017/06/06;']})
+
+        archivediff.apply_delta(delta, other_file)
+
+        other = self.read_archive(other_file, use_cache=False)
+        self.assertNotIn(contacts[0], other)  # removed
+        self.assertEqual(other[contacts[12]], [2, '2026/10/18;2001/01/01;'])
+        self.assertEqual(other[('G4NEW', 'IO91OJ', '')], [2, '2026/10/18;2017/06/06;'])
+        self.assertEqual(other[('G4MOVED', 'IO91OK', '')], [1, '2026/10/18;'])
+        self.assertEqual(other[('G4OTHER', 'IO91OJ', '')], [1, '2017/06/06;'])  # not in the delta
+        self.assertEqual(other[contacts[2]], self.new[contacts[2]])  # changed rows replace any there
+
+    def test_diff_merge(self):
+        """The differences a merge would make, without making them."""
+
+        with open(self.new_file, 'rb') as f:
+            before = f.read()
+
+        stats = archivediff.diff_merge([self.new_file, self.old_file], self.new_file)
+
+        with open(self.new_file, 'rb') as f:
+            self.assertEqual(f.read(), before)
+
+        merged = self.path('merged.csl')
+        shutil.copy(self.new_file, merged)
+        archivemerge.merge_archives([merged, self.old_file], merged)
+
+        self.assertEqual(stats.removed, 0)
+        self.assertEqual(stats.new, len(set(self.old) - set(self.new)))
+        expected = archivediff.diff_archives(self.new_file, merged)
+        self.assertEqual(str(stats), str(expected))
+
+        # merging into a new archive, everything is new
+        stats = archivediff.diff_merge([self.old_file, self.new_file], self.path('none.csl'))
+        self.assertEqual(stats.new, len(set(self.old) | set(self.new)))
+        self.assertFalse(os.path.exists(self.path('none.csl')))
+
+    def test_read_delta(self):
+
+        delta = self.path('bad' + archivediff.DELTA_EXTENSION)
+        with open(delta, 'w') as f:
+            f.write('+,"G4AUC","IO91OJ","","1","2017/06/06;"\n*,"G4AUC","IO91OJ","","1","2017/06/06;"\n')
+
+        with self.assertRaises(ValueError):
+            archivediff.read_delta(delta)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
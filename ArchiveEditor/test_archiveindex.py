@@ -0,0 +1,178 @@
+"""Test module for archiveindex.py using unittest."""
+
+import unittest
+import random
+import Utilities
+from archiveindex import ArchiveIndex, MaskIndex, fuzzy_match_many
+
+
+class Test_ArchiveIndex(unittest.TestCase):
+
+    # Awkward cases for the matching rules: suffixes, prefixes,
+    # different lengths, blank fields and mixed 6/8 character locators
+    archive_dict = {
+        ('G4AUC', 'IO91OJ', ''): [3, '2018/01/02;2017/06/06;2016/05/03;'],
+        ('G4AUC', 'IO91OK', ''): [1, '2017/06/06;'],
+        ('G4AUC/P', 'IO91OJ', ''): [1, '2017/06/06;'],
+        ('G4AUZ/P', 'IO81OJ', 'RG'): [1, '2017/06/06;'],
+        ('M0AUC', 'JO01AA', ''): [1, '2017/06/06;'],
+        ('2E0AUC', 'IO91OJ10', ''): [1, '2017/06/06;'],
+        ('F/G4AUC', 'IN99AA', ''): [1, '2017/06/06;'],
+        ('G4AU', 'IO91', ''): [1, '2017/06/06;'],
+        ('G4AUCX', 'IO91OJ12', 'SL'): [1, '2017/06/06;'],
+        ('G0GJV', '', ''): [1, ''],
+        ('', '', 'TITLE'): [1, ''],
+        }
+
+    def check_same_as_full_scan(self, archive_dict, contacts, callsign_threshold=Utilities.CALLSIGN_THRESHOLD,
+                                edit_distance=0):
+
+        index = ArchiveIndex(archive_dict)
+
+        for contact in contacts:
+            for similar_locators_checked in (False, True):
+                with self.subTest(contact=contact, similar_locators_checked=similar_locators_checked):
+                    self.assertEqual(
+                        Utilities.fuzzy_match(contact, similar_locators_checked, archive_dict, index,
+                                              callsign_threshold=callsign_threshold, edit_distance=edit_distance),
+                        Utilities.fuzzy_match(contact, similar_locators_checked, archive_dict,
+                                              callsign_threshold=callsign_threshold, edit_distance=edit_distance))
+
+    def test_awkward_contacts_match_full_scan(self):
+
+        probes = [('G4AUC', 'IO91OJ', ''), ('G4AUZ', 'IO91OJ', ''), ('G4AU', 'IO91OJ', ''),
+                  ('AUC', 'IO91', ''), ('', '', ''), ('G0GJV', 'IO91', ''), ('G4AUC/P', 'IO91OJ12', 'RG')]
+
+        self.check_same_as_full_scan(self.archive_dict, list(self.archive_dict) + probes)
+
+    def test_archive_file_matches_full_scan(self):
+
+        archive_dict = {}
+        Utilities.read_archive_file('G4AUClarge.csl', archive_dict, use_cache=False)
+
+        self.check_same_as_full_scan(archive_dict, list(archive_dict))
+
+    def test_entry_file_matches_full_scan(self):
+
+        archive_dict = {}
+        Utilities.read_archive_file('G4AUCa.csl', archive_dict, use_cache=False)
+        entries = []
+        Utilities.read_entry_file('testread.EDI', entries)
+
+        self.check_same_as_full_scan(archive_dict, entries)
+
+    def test_wider_callsign_thresholds_match_full_scan(self):
+
+        probes = [('G4AUC', 'IO91OJ', ''), ('G3ABC', 'IO91OJ', ''), ('M0AU', 'JO01AA', '')]
+
+        for callsign_threshold in (0, 2, 3, 4):
+            self.check_same_as_full_scan(self.archive_dict, list(self.archive_dict) + probes, callsign_threshold)
+
+    def test_edit_distances_match_full_scan(self):
+
+        archive_dict = {}
+        Utilities.read_archive_file('G4AUClarge.csl', archive_dict, use_cache=False)
+        archive_dict.update(self.archive_dict)
+        probes = [('G4AAUC', 'IO91OJ', ''), ('G4UC', 'JO01AA', ''), ('', '', ''), ('G4', 'IO91', '')]
+
+        for edit_distance in (1, 2):
+            self.check_same_as_full_scan(archive_dict, list(archive_dict)[::10] + probes, edit_distance=edit_distance)
+
+    def test_similar_locators_with_mixed_lengths(self):
+        """6 character locators match the start of 8 character ones, but not the other way round."""
+
+        index = ArchiveIndex(self.archive_dict)
+
+        for locator in ('IO91OJ', 'IO91OK', 'IO91OJ10', 'IO91OJ12', 'IO91', 'IO9', 'I'):
+            with self.subTest(locator=locator):
+                expected = {archive_locator for callsign, archive_locator, exchange in self.archive_dict
+                            if Utilities.similarity(locator, archive_locator) >= len(locator) - 1}
+                self.assertEqual(set(index.similar_locators(locator)), expected)
+
+        self.assertIn('IO91OJ12', index.similar_locators('IO91OK'))
+        self.assertNotIn('IO91OJ', index.similar_locators('IO91OJ12'))
+
+    def test_reverse_candidates(self):
+        """Should find every archive contact that has the contact as a candidate."""
+
+        archive_dict = {}
+        Utilities.read_archive_file('G4AUClarge.csl', archive_dict, use_cache=False)
+        archive_dict.update(self.archive_dict)
+        index = ArchiveIndex(archive_dict)
+
+        probes = list(self.archive_dict) + [('G4AUC', 'IO91OJ1', ''), ('G', 'I', ''), ('2E0NE', 'IO81V', '')]
+
+        for contact in probes:
+            for similar_locators_checked in (False, True):
+                for edit_distance in (0, 1):
+                    with self.subTest(contact=contact, similar_locators_checked=similar_locators_checked,
+                                      edit_distance=edit_distance):
+                        expected = [archive_contact for archive_contact in archive_dict
+                                    if contact in dict(index.candidates(archive_contact, similar_locators_checked,
+                                                                        edit_distance=edit_distance))
+                                    or index.is_candidate(archive_contact, contact, similar_locators_checked,
+                                                          edit_distance=edit_distance)]
+                        self.assertEqual(index.reverse_candidates(contact, similar_locators_checked,
+                                                                  edit_distance=edit_distance), expected)
+
+    def test_candidates_are_in_archive_order(self):
+
+        index = ArchiveIndex(self.archive_dict)
+        order = list(self.archive_dict)
+
+        found = [archive_contact for archive_contact, when_worked
+                 in index.candidates(('G4AUC', 'IO91OJ', ''), True)]
+
+        self.assertEqual(found, sorted(found, key=order.index))
+
+
+class Test_fuzzyMatchMany(unittest.TestCase):
+
+    def test_same_as_fuzzy_match(self):
+
+        archive_dict = {}
+        Utilities.read_archive_file('G4AUCa.csl', archive_dict, use_cache=False)
+        entries = []
+        Utilities.read_entry_file('testread.EDI', entries)
+        entries += entries[:5] + list(Test_ArchiveIndex.archive_dict)
+
+        for callsign_threshold in (1, 3):
+            for similar_locators_checked in (False, True):
+                with self.subTest(callsign_threshold=callsign_threshold,
+                                  similar_locators_checked=similar_locators_checked):
+                    matches = fuzzy_match_many(entries, archive_dict, similar_locators_checked, callsign_threshold)
+
+                    self.assertEqual(list(matches), list(dict.fromkeys(entries)))
+                    for contact in entries:
+                        self.assertEqual(matches[contact],
+                                         Utilities.fuzzy_match(contact, similar_locators_checked, archive_dict,
+                                                               callsign_threshold=callsign_threshold))
+
+    def test_accepts_an_index(self):
+
+        archive_dict = Test_ArchiveIndex.archive_dict
+        index = ArchiveIndex(archive_dict)
+
+        self.assertEqual(fuzzy_match_many(archive_dict, index, True), fuzzy_match_many(archive_dict, archive_dict, True))
+        self.assertEqual(fuzzy_match_many([], index, True), {})
+
+
+class Test_MaskIndex(unittest.TestCase):
+
+    def test_query_same_as_similarity(self):
+        """Query should find exactly the strings within threshold places, as similarity() counts them."""
+
+        rng = random.Random(1)
+        strings = sorted({''.join(rng.choice('AB12') for i in range(rng.randint(0, 7))) for j in range(300)})
+
+        for threshold in (0, 1, 2, 3):
+            index = MaskIndex(strings, threshold)
+            for probe in strings[::7] + ['', 'A', 'ABABABAB']:
+                with self.subTest(threshold=threshold, probe=probe):
+                    expected = {s for s in strings
+                                if Utilities.similarity(probe, s) >= len(probe) - threshold}
+                    self.assertEqual(set(index.query(probe)), expected)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
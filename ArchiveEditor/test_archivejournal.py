@@ -0,0 +1,107 @@
+"""Test module for archivejournal.py using unittest."""
+
+import os
+import unittest
+import Utilities
+import archivejournal
+import archivemerge
+from archivetesting import ArchiveTestCase
+
+
+class Test_archiveJournal(ArchiveTestCase):
+
+    def setUp(self):
+
+        super().setUp()
+
+        self.file_name = self.copy_archive('G4AUCa.csl')
+
+        self.archive_dict = self.read()
+
+    def read(self):
+
+        return self.read_archive(self.file_name)
+
+    def add_contacts(self):
+        """Change one contact and add two, as the Archive Maker would, and journal them."""
+
+        changed = list(self.archive_dict)[3]
+        self.archive_dict[changed][0] += 1
+        self.archive_dict[changed][1] += '2026/10/18;'
+        self.archive_dict[('G4NEW', 'IO91OJ', '')] = [1, '2026/10/18;']
+        self.archive_dict[('G4NEW', 'IO91OK', 'RG')] = [1, '2026/10/18;']
+
+        Utilities.append_journal(self.file_name, self.archive_dict,
+                                 [changed, ('G4NEW', 'IO91OJ', ''), ('G4NEW', 'IO91OK', 'RG')])
+
+    def test_journal_replayed(self):
+
+        with open(self.file_name, 'rb') as f:
+            archive = f.read()
+
+        self.add_contacts()
+
+        with open(self.file_name, 'rb') as f:
+            self.assertEqual(f.read(), archive)  # the archive itself is not written
+        self.assertEqual(list(self.read().items()), list(self.archive_dict.items()))
+
+        # a second append is replayed after the first
+        self.archive_dict[('G4NEW', 'IO91OJ', '')] = [2, '2026/10/18;2026/10/19;']
+        Utilities.append_journal(self.file_name, self.archive_dict, [('G4NEW', 'IO91OJ', '')])
+
+        self.assertEqual(list(self.read().items()), list(self.archive_dict.items()))
+
+    def test_cached_rows_not_changed(self):
+        """Replaying the journal over rows from the .csl.cache should leave the cached rows alone."""
+
+        self.add_contacts()
+        self.read()
+        archivejournal.remove(self.file_name)
+
+        archive_dict = self.read_archive(self.file_name, use_cache=False)
+
+        self.assertEqual(list(self.read().items()), list(archive_dict.items()))
+
+    def test_part_line_ignored_and_removed(self):
+
+        self.add_contacts()
+        with open(archivejournal.journal_name(self.file_name), 'ab') as f:
+            f.write(b'"G4PART","IO9')  # an append interrupted part way
+
+        self.assertEqual(list(self.read().items()), list(self.archive_dict.items()))
+
+        self.archive_dict[('G4AFTER', 'IO91OJ', '')] = [1, '2026/10/18;']
+        Utilities.append_journal(self.file_name, self.archive_dict, [('G4AFTER', 'IO91OJ', '')])
+
+        self.assertEqual(list(self.read().items()), list(self.archive_dict.items()))
+        self.assertNotIn(b'G4PART', open(archivejournal.journal_name(self.file_name), 'rb').read())
+
+    def test_compact(self):
+        """Compacting should give the file re_write_csl writes and remove the journal."""
+
+        self.add_contacts()
+        Utilities.compact_journal(self.file_name)
+
+        self.assertFalse(os.path.exists(archivejournal.journal_name(self.file_name)))
+
+        self.assertSameFile(self.file_name, self.write_archive('expected.csl', self.archive_dict))
+
+    def test_re_write_removes_journal(self):
+
+        self.add_contacts()
+        Utilities.re_write_csl(self.file_name, self.read())
+
+        self.assertFalse(os.path.exists(archivejournal.journal_name(self.file_name)))
+        self.assertEqual(set(self.read()), set(self.archive_dict))  # the dates are sorted
+
+    def test_nothing_to_append(self):
+        """No journal is made when no contacts changed, so the archive can still be streamed."""
+
+        Utilities.append_journal(self.file_name, self.archive_dict, [])
+
+        self.assertFalse(os.path.exists(archivejournal.journal_name(self.file_name)))
+        self.assertTrue(archivemerge.is_streamable(self.file_name))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,195 @@
+"""Test module for archivemerge.py using unittest."""
+
+import os
+import shutil
+import unittest
+import Utilities
+import archivedb
+import archivejournal
+import archivemerge
+from archivetesting import ArchiveTestCase
+
+
+class Test_archiveMerge(ArchiveTestCase):
+
+    def setUp(self):
+
+        super().setUp()
+
+        self.archive_dict = self.read_archive('G4AUClarge.csl', use_cache=False)
+        items = list(self.archive_dict.items())
+
+        # overlapping archives, as club members' archives would be
+        self.file_names, self.parts = [], []
+        for i, part in enumerate((items[::2], items[::3], items[1::5] + [(('G4NEW', 'IO91OJ', ''), [1, '2026/10/18;'])])):
+            self.file_names.append(self.write_archive(f'member{i}.csl',
+                                                      {contact: list(when_worked) for contact, when_worked in part}))
+            self.parts.append({contact for contact, when_worked in part})
+
+    def dict_merge(self, file_names, output):
+        """Merge the archives into a dictionary, each date of a contact in more than one once,
+            and write it."""
+
+        merged = {}
+        for file_name in file_names:
+            for contact, when_worked in self.read_archive(file_name, use_cache=False).items():
+                merged.setdefault(contact, []).append(when_worked)
+
+        archive_dict = {}
+        for contact, when_worked_list in merged.items():
+            if len(when_worked_list) == 1:
+                archive_dict[contact] = when_worked_list[0]
+            else:
+                dates = set().union(*(dates.split(';') for times_seen, dates in when_worked_list)) - {''}
+                archive_dict[contact] = [len(dates), ';'.join(dates) + ';']
+
+        Utilities.re_write_csl(output, archive_dict)
+
+    def test_as_dict_merge(self):
+
+        for count in (2, 3):
+            with self.subTest(archives=count):
+                self.assertEqual(archivemerge.merge_archives(self.file_names[:count], self.path('merged.csl')).warnings, '')
+                self.dict_merge(self.file_names[:count], self.path('expected.csl'))
+
+                self.assertSameFile(self.path('merged.csl'), self.path('expected.csl'))
+
+    def test_merge_into_input(self):
+
+        expected = self.path('expected.csl')
+        self.dict_merge([self.file_names[0], self.file_names[2]], expected)
+        into = self.read_archive(self.file_names[0], use_cache=False)
+
+        added = []
+        archivemerge.merge_archives([self.file_names[0], self.file_names[2]], self.file_names[0], added=added.append)
+
+        self.assertSameFile(self.file_names[0], expected)
+        self.assertIn(('G4NEW', 'IO91OJ', ''), added)
+        self.assertEqual(added, sorted(added))
+        self.assertFalse(any(contact in into for contact in added))
+
+    def test_empty_archive_changes_nothing(self):
+        """Contacts in only one archive are written as they are, even repeated dates and times seen."""
+
+        archive = self.copy_archive('G4AUClarge.csl')
+        empty = self.path('empty.csl')
+        open(empty, 'w').close()
+
+        stats = archivemerge.merge_archives([archive, empty], archive)
+
+        self.assertSameFile(archive, 'G4AUClarge.csl')
+        self.assertEqual(stats.recounted, 0)
+
+    def test_not_streamable(self):
+        """Unsorted files, files with a journal and databases are merged the same."""
+
+        unsorted = self.path('unsorted.csl')
+        with open(self.file_names[1], encoding='utf-8') as f:
+            lines = f.readlines()
+        with open(unsorted, 'w', encoding='utf-8') as f:
+            f.write('Callsign\n')
+            f.writelines(reversed(lines))
+
+        journalled = self.path('journalled.csl')
+        shutil.copy(self.file_names[2], journalled)
+        Utilities.append_journal(journalled, {('G4JNL', 'IO91OJ', ''): [1, '2026/10/18;']},
+                                 [('G4JNL', 'IO91OJ', '')])
+
+        database = self.path('member0.csldb')
+        archivedb.import_csl(self.file_names[0], database)
+
+        self.assertTrue(archivemerge.is_streamable(self.file_names[1]))
+        self.assertFalse(archivemerge.is_streamable(unsorted))
+        self.assertFalse(archivemerge.is_streamable(journalled))
+
+        added = []
+        stats = archivemerge.merge_archives([self.file_names[0], unsorted, journalled], self.path('merged.csl'),
+                                            added=added.append)
+        self.dict_merge([self.file_names[0], unsorted, journalled], self.path('expected.csl'))
+
+        self.assertSameFile(self.path('merged.csl'), self.path('expected.csl'))
+        self.assertEqual(added, sorted(set(added)))  # none twice after starting again
+        self.assertEqual(len(added), stats.contacts)
+
+        archivemerge.merge_archives([database, unsorted, journalled], self.path('merged.csl'))
+        self.assertSameFile(self.path('merged.csl'), self.path('expected.csl'))
+        self.assertFalse(os.path.exists(archivejournal.journal_name(self.path('merged.csl'))))
+
+    def test_warnings(self):
+
+        bad = self.path('bad.csl')
+        with open(bad, 'w', encoding='utf-8') as f:
+            f.write('"G4AUC","IO91OJ","",1,"2017/06/06;"\n"G4AUD","XX99","",1,"2017/06/06;"\n')
+
+        warnings = archivemerge.merge_archives([self.file_names[0], bad], self.path('merged.csl')).warnings
+
+        self.assertTrue(warnings.startswith(bad + ':\n'))
+        self.assertEqual(warnings[len(bad) + 2:], Utilities.read_archive_file(bad, {}, use_cache=False))
+
+    def test_shared_history(self):
+        """Dates in more than one archive are merged once, and the times worked counted from them.
+            A contact in one archive is left as it is."""
+
+        first = self.write_archive('first.csl', {('G4AUC', 'IO91OJ', ''): [2, '2017/06/06;2016/06/07;'],
+                                                 ('G4BAD', 'IO91OJ', ''): [3, '06/06/2017'],
+                                                 ('G4FIRST', 'IO91OJ', ''): [1, '2017/06/06;']})
+        second = self.write_archive('second.csl', {('G4AUC', 'IO91OJ', ''): [3, '2018/06/05;2017/06/06;2016/06/07;'],
+                                                   ('G4BAD', 'IO91OJ', ''): [1, '2017/06/06;'],
+                                                   ('G4TWICE', 'IO91OJ', ''): [2, '2017/06/06;2017/06/06;']})
+
+        stats = archivemerge.merge_archives([first, second], self.path('merged.csl'))
+
+        merged = self.read_archive(self.path('merged.csl'), use_cache=False)
+        self.assertEqual(merged, {('G4AUC', 'IO91OJ', ''): [3, '2018/06/05;2017/06/06;2016/06/07;'],
+                                  ('G4BAD', 'IO91OJ', ''): [4, '2017/06/06;06/06/2017;'],
+                                  ('G4FIRST', 'IO91OJ', ''): [1, '2017/06/06;'],
+                                  ('G4TWICE', 'IO91OJ', ''): [2, '2017/06/06;2017/06/06;']})
+
+        self.assertEqual((stats.contacts, stats.duplicate_dates, stats.recounted), (4, 2, 1))
+        self.assertEqual([(source.contacts, source.only_here, source.dates, source.new_dates)
+                          for source in stats.sources], [(3, 1, 4, 2), (3, 1, 6, 4)])
+
+    def test_source_stats(self):
+
+        stats = archivemerge.merge_archives(self.file_names, self.path('merged.csl'))
+
+        self.assertEqual(stats.contacts, len(set().union(*self.parts)))
+        self.archive_dict[('G4NEW', 'IO91OJ', '')] = [1, '2026/10/18;']
+        for posn, part in enumerate(self.parts):
+            only_here = part.difference(*self.parts[:posn], *self.parts[posn + 1:])
+            with self.subTest(source=posn):
+                self.assertEqual(stats.sources[posn].contacts, len(part))
+                self.assertEqual(stats.sources[posn].only_here, len(only_here))
+                # contacts in more than one archive have the same dates in each
+                self.assertEqual(stats.sources[posn].new_dates,
+                                 sum(self.archive_dict[contact][1].count(';') for contact in only_here))
+        self.assertIn('3 archives merged', str(stats))
+
+    def test_database_output(self):
+
+        database = self.path('merged.csldb')
+        archivemerge.merge_archives(self.file_names, database)
+
+        self.dict_merge(self.file_names, self.path('expected.csl'))
+
+        self.assertEqual(self.read_archive(database), self.read_archive(self.path('expected.csl'), use_cache=False))
+
+    def test_database_merged_into_itself(self):
+
+        database = self.path('member0.csldb')
+        archivedb.import_csl(self.file_names[0], database)
+        into = self.read_archive(database)
+
+        added = []
+        archivemerge.merge_archives([database, self.file_names[2]], database, added=added.append)
+
+        self.dict_merge([self.file_names[0], self.file_names[2]], self.path('expected.csl'))
+
+        self.assertEqual(self.read_archive(database), self.read_archive(self.path('expected.csl'), use_cache=False))
+        self.assertIn(('G4NEW', 'IO91OJ', ''), added)
+        self.assertEqual(added, sorted(added))
+        self.assertFalse(any(contact in into for contact in added))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
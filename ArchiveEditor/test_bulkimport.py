@@ -0,0 +1,152 @@
+"""Test module for bulkimport.py using unittest."""
+
+import io
+import os
+import unittest
+from contextlib import redirect_stderr
+from bulkimport import bulk_import, find_edi_files, checkpoint_name, BulkImportError, main
+from ediimport import read_edi_contacts, add_edi_contacts
+from archivetesting import ArchiveTestCase
+
+
+class Test_bulkImport(ArchiveTestCase):
+
+    def setUp(self):
+
+        super().setUp()
+
+        with open('testread.EDI', 'rb') as f:
+            edi = f.read()
+
+        # logs in nested directories, with either case of extension, and a file that isn't a log
+        self.logs = self.path('logs')
+        for posn, (sub_directory, name, data) in enumerate((
+                ('2017', 'a.edi', edi),
+                ('2017', 'b.EDI', edi.replace(b'170606;', b'170613;')),
+                (os.path.join('2018', 'may'), 'c.Edi', edi.replace(b'G4WJS', b'G4NEW').replace(b'170606;', b'170613;')),
+                ('2018', 'empty.edi', b'[REG1TEST;1]\r\nPCall=G4AUC\r\n'),
+                ('2018', 'notes.txt', b'not a log'),
+                ('2019', 'd.edi', edi.replace(b'170606;', b'190606;')))):
+            os.makedirs(os.path.join(self.logs, sub_directory), exist_ok=True)
+            with open(os.path.join(self.logs, sub_directory, name), 'wb') as f:
+                f.write(data)
+
+        self.file_name = self.path('archive.csl')
+
+    def expected(self, file_names):
+        """Return the archive file written after adding the files one after another."""
+
+        archive_dict = {}
+        for file_name in file_names:
+            add_edi_contacts(archive_dict, read_edi_contacts(file_name))
+
+        with open(self.write_archive('expected.csl', archive_dict), 'rb') as f:
+            return f.read()
+
+    def read(self):
+
+        with open(self.file_name, 'rb') as f:
+            return f.read()
+
+    def test_find_edi_files(self):
+
+        file_names = find_edi_files([self.logs])
+
+        self.assertEqual([os.path.relpath(name, self.logs) for name in file_names],
+                         [os.path.join('2017', 'a.edi'), os.path.join('2017', 'b.EDI'),
+                          os.path.join('2018', 'empty.edi'), os.path.join('2018', 'may', 'c.Edi'),
+                          os.path.join('2019', 'd.edi')])
+
+    def test_same_as_sequential(self):
+
+        for processes in (1, 2):
+            with self.subTest(processes=processes):
+                if os.path.exists(self.file_name):
+                    os.remove(self.file_name)
+
+                stats = bulk_import(self.file_name, [self.logs], processes)
+
+                self.assertEqual(self.read(), self.expected(find_edi_files([self.logs])))
+                self.assertEqual(stats.files, 5)
+                self.assertGreater(stats.qsos, 0)
+                self.assertEqual(stats.errors, [])
+                self.assertFalse(os.path.exists(checkpoint_name(self.file_name)))
+
+    def test_adds_to_existing_archive(self):
+
+        self.copy_archive('G4AUCa.csl')
+        archive_dict = self.read_archive(self.file_name, use_cache=False)
+
+        bulk_import(self.file_name, [self.logs])
+
+        for file_name in find_edi_files([self.logs]):
+            add_edi_contacts(archive_dict, read_edi_contacts(file_name))
+        self.assertSameFile(self.file_name, self.write_archive('expected.csl', archive_dict))
+
+    def test_resume(self):
+        """An import interrupted after a checkpoint should carry on to the same archive."""
+
+        def interrupt(stats):
+            if stats.files == 3:
+                raise KeyboardInterrupt
+
+        with self.assertRaises(KeyboardInterrupt):
+            bulk_import(self.file_name, [self.logs], checkpoint_files=2, progress=interrupt)
+
+        self.assertFalse(os.path.exists(self.file_name))
+        self.assertTrue(os.path.exists(checkpoint_name(self.file_name)))
+
+        resumed = []
+        stats = bulk_import(self.file_name, [self.logs], resume=True, checkpoint_files=2,
+                            progress=lambda stats: resumed.append(stats.files))
+
+        self.assertEqual(resumed, [3, 4, 5])  # the first 2 files are in the checkpoint
+        self.assertEqual(stats.files, 5)
+        self.assertEqual(self.read(), self.expected(find_edi_files([self.logs])))
+        self.assertFalse(os.path.exists(checkpoint_name(self.file_name)))
+
+    def test_resume_changed_files(self):
+
+        with self.assertRaises(BulkImportError):
+            bulk_import(self.file_name, [self.logs], resume=True)  # no checkpoint
+
+        def interrupt(stats):
+            if stats.files == 3:
+                raise KeyboardInterrupt
+
+        with self.assertRaises(KeyboardInterrupt):
+            bulk_import(self.file_name, [self.logs], checkpoint_files=2, progress=interrupt)
+
+        os.remove(os.path.join(self.logs, '2017', 'a.edi'))
+
+        with self.assertRaises(BulkImportError):
+            bulk_import(self.file_name, [self.logs], resume=True)
+
+    def test_unreadable_file_reported(self):
+
+        with open(os.path.join(self.logs, '2018', 'bad.edi'), 'wb') as f:
+            f.write(b'[REG1TEST;1]\r\n[QSORecords;1]\r\nxx0606;1200;G4BAD;1;59;001;59;002;;IO91;0;;;;\r\n')
+
+        stats = bulk_import(self.file_name, [self.logs])
+
+        self.assertEqual(stats.files, 6)
+        self.assertEqual(len(stats.errors), 1)
+        self.assertTrue(stats.errors[0][0].endswith('bad.edi'))
+
+    def test_checkpoint_at_least_one(self):
+
+        for value in ('0', '-1', 'x'):
+            with self.subTest(value=value), redirect_stderr(io.StringIO()) as error:
+                with self.assertRaises(SystemExit) as cm:
+                    main([self.file_name, self.logs, '--checkpoint', value])
+                self.assertEqual(cm.exception.code, 2)
+                self.assertIn('--checkpoint', error.getvalue())
+
+        with self.assertRaises(ValueError):
+            bulk_import(self.file_name, [self.logs], checkpoint_files=0)
+
+        self.assertFalse(os.path.exists(self.file_name))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
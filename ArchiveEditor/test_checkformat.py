@@ -1,4 +1,6 @@
 import unittest
+import random
+import csv
 import checkformat
 
 class Test_checklocator_test(unittest.TestCase):
@@ -192,6 +194,43 @@ class Test_checkline_test(unittest.TestCase):
                 with self.assertRaises(checkformat.CheckFormatError, msg=d) as cm:
                     checkformat.checkLine(d)
 
+class Test_plainLinePattern(unittest.TestCase):
+    """PLAIN_LINE_PATTERN must only match lines that checkLine passes, and split them as csv does."""
+
+    def test_plain_lines_match(self):
+
+        for d in Test_checkline_test.correct_lines[:4]:
+            with self.subTest(d=d):
+                self.assertIsNotNone(checkformat.PLAIN_LINE_PATTERN.fullmatch(d), d)
+
+    def test_matching_lines_are_correct(self):
+
+        rng = random.Random(0)
+        choices = (
+            ['G4AUC', '2E0NEY', 'G4AUC/P', 'F/G4AUC', 'G4AUC/F', 'G4AUC/MM', '31F/G4AUC', 'G4AUC/P/M', 'G4',
+             'G4AUC/,', ' G4AUC', 'G"4AUC', '4G4AUC', ''],
+            ['IO91OJ', 'IO91OJ12', 'IO91OJ1', 'IO91OZ', 'ZZ91OJ', 'io91oj', 'IO91OJ ', ''],
+            ['', 'RG', 'R G', ' RG', 'R,G', 'R"G'],
+            ['1', '12', '0', '-1', '+1', '1.0', ' 1', 'x', ''],
+            ['2017/06/06;', '2017/06/06;1999/12/31;', '2017/06/06', '3017/06/06;', '2017/6/6;', '2,17/06/06;', ''],
+        )
+
+        matched = 0
+        for i in range(20000):
+            fields = [rng.choice(values) for values in choices]
+            fields = [f'"{f}"' if rng.random() < 0.5 else f for f in fields]
+            line = ','.join(fields)
+
+            match = checkformat.PLAIN_LINE_PATTERN.fullmatch(line)
+            if match:
+                matched += 1
+                with self.subTest(line=line):
+                    self.assertTrue(checkformat.checkLine(line))
+                    self.assertEqual([match[2], match[4], match[6], match[8], match[10]],
+                                     [f.strip() for f in next(csv.reader([line]))])
+
+        self.assertGreater(matched, 0)
+
 
 if __name__ == '__main__':
     unittest.main(verbosity=2)
@@ -0,0 +1,48 @@
+"""Test module for decoding.py using unittest."""
+
+import unittest
+import io
+from decoding import decode_fields, decode_line, decode_text, decode_lines
+
+
+class Test_decoding(unittest.TestCase):
+
+    def test_decode_fields(self):
+
+        values = (
+            ([b'G4AUC', b'IO91OJ'], ['G4AUC', 'IO91OJ']),  # ASCII
+            ([b'F/G4AUC', 'Café'.encode('utf-8')], ['F/G4AUC', 'Café']),  # UTF-8
+            ([b'F/G4AUC', 'Café'.encode('cp1252')], ['F/G4AUC', 'Café']),  # cp1252
+            (['Ã©'.encode('cp1252'), 'é€'.encode('cp1252')], ['Ã©', 'é€']),  # one encoding for the whole line
+            ([b'\x81\xe9'], ['\x81é']),  # not cp1252, so latin-1
+            ([], []),
+        )
+
+        for fields, decoded in values:
+            with self.subTest(fields=fields):
+                self.assertEqual(decode_fields(fields), decoded)
+
+    def test_decode_line(self):
+
+        self.assertEqual(decode_line('Zürich'.encode('cp1252')), 'Zürich')
+
+    def test_decode_text_keeps_line_ends(self):
+
+        data = b'"G4AUC","IO91OJ"\r\n' + 'é,"Zürich"\r\n'.encode('cp1252') + 'ü\rö\n'.encode('utf-8')
+
+        self.assertEqual(decode_text(data), '"G4AUC","IO91OJ"\r\né,"Zürich"\r\nü\rö\n')
+        self.assertEqual(decode_text('Café\n'.encode('utf-8')), 'Café\n')
+        self.assertEqual(decode_text(b''), '')
+
+    def test_decode_lines(self):
+        """Split as a text file opened with newline='' would split them."""
+
+        for data in (b'"G4AUC","IO91OJ"\r\n' + 'é,"Zürich"\r\n'.encode('cp1252') + 'ü\rö\n'.encode('utf-8'),
+                     b'a\rb\r\r\nc\n\nd', b'a\rb', b'a\r', b''):
+            with self.subTest(data=data):
+                self.assertEqual(list(decode_lines(io.BytesIO(data))),
+                                 list(io.StringIO(decode_text(data), newline='')))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
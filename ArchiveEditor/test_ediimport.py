@@ -0,0 +1,96 @@
+"""Test module for ediimport.py using unittest."""
+
+import unittest
+import Utilities
+from edireader import QSOReader
+from ediimport import read_edi_contacts, read_edi_files, add_edi_contacts
+from archivetesting import ArchiveTestCase
+
+
+def add_sequentially(archive_dict, file_name):
+    """Add the contacts of an .edi file as the Archive Maker did, reading it one QSO at a time."""
+
+    new = []
+    reader = QSOReader(file_name, ('date', 'call', 'exchange', 'locator'))
+    try:
+        for qso in reader:
+            contact = (qso.call, qso.locator, qso.exchange)
+            date = Utilities.format_date(qso.date)
+
+            if contact not in archive_dict:
+                if contact[0] != '':
+                    archive_dict[contact] = [1, date + ';']
+                    new.append((contact, date))
+            else:
+                if date not in archive_dict[contact][1]:
+                    archive_dict[contact][0] += 1
+                    archive_dict[contact][1] += date + ';'
+    finally:
+        if not reader.found_records:
+            archive_dict[('', '', '')] = [0, ';']
+
+    return new
+
+
+class Test_ediImport(ArchiveTestCase):
+
+    def setUp(self):
+
+        super().setUp()
+
+        with open('testread.EDI', 'rb') as f:
+            edi = f.read()
+
+        # the same log on other dates, a log with no QSOs and one with a contact not in the archive
+        self.file_names = []
+        for posn, data in enumerate((edi, edi.replace(b'170606;', b'170613;'), b'[REG1TEST;1]\r\nPCall=G4AUC\r\n',
+                                     edi.replace(b'G4WJS', b'G4NEW').replace(b'170606;', b'170613;'), edi)):
+            file_name = self.path(f'log{posn}.edi')
+            with open(file_name, 'wb') as f:
+                f.write(data)
+            self.file_names.append(file_name)
+
+    def test_same_as_sequential(self):
+        """Adding the files read by a pool of processes should give the same archive and listing."""
+
+        expected_dict = self.read_archive('G4AUCa.csl', use_cache=False)
+        archive_dict = {contact: list(when_worked) for contact, when_worked in expected_dict.items()}
+
+        expected_new = [add_sequentially(expected_dict, file_name) for file_name in self.file_names]
+
+        for processes in (1, 3):
+            with self.subTest(processes=processes):
+                test_dict = {contact: list(when_worked) for contact, when_worked in archive_dict.items()}
+                new = []
+                for edi_contacts, file_name in zip(read_edi_files(self.file_names, processes), self.file_names):
+                    self.assertEqual(edi_contacts.file_name, file_name)
+                    new.append(add_edi_contacts(test_dict, edi_contacts)[0])
+
+                self.assertEqual(new, expected_new)
+                self.assertEqual(list(test_dict.items()), list(expected_dict.items()))
+
+    def test_changed_contacts(self):
+
+        archive_dict = {}
+        add_edi_contacts(archive_dict, read_edi_contacts(self.file_names[0]))
+        before = {contact: list(when_worked) for contact, when_worked in archive_dict.items()}
+
+        new, changed = add_edi_contacts(archive_dict, read_edi_contacts(self.file_names[3]))
+
+        self.assertEqual(changed, {contact for contact in archive_dict if archive_dict[contact] != before.get(contact)})
+        self.assertEqual([contact for contact, date in new], [('G4NEW', 'IO91NP', '')])
+
+    def test_error_after_contacts(self):
+
+        edi_contacts = read_edi_contacts(self.path('missing.edi'))
+
+        self.assertIsInstance(edi_contacts.error, FileNotFoundError)
+        self.assertFalse(edi_contacts.found_records)
+
+        archive_dict = {}
+        add_edi_contacts(archive_dict, edi_contacts)
+        self.assertEqual(archive_dict, {('', '', ''): [0, ';']})  # as the Archive Maker did
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
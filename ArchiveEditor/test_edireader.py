@@ -0,0 +1,114 @@
+"""Test module for edireader.py using unittest."""
+
+import unittest
+import os
+import tempfile
+from edireader import QSOReader, QSORecord, read_qso_records, QSO_FIELDS
+
+
+class Test_QSOReader(unittest.TestCase):
+
+    def write_edi(self, text):
+
+        fd, file_name = tempfile.mkstemp(suffix='.edi')
+        with os.fdopen(fd, 'w') as f:
+            f.write(text)
+        self.addCleanup(os.remove, file_name)
+
+        return file_name
+
+    def test_all_fields(self):
+
+        qso = next(iter(QSOReader('testread.EDI')))
+
+        self.assertEqual([getattr(qso, name) for name in QSO_FIELDS],
+                         ['170606', '1904', 'G4WJS', '1', '59', '001', '59', '005', '', 'IO91NP', '29', '', '', '', ''])
+        self.assertIsNone(qso.line)
+
+    def test_only_requested_fields(self):
+
+        qsos = list(read_qso_records('testread.EDI', ('call', 'locator', 'line')))
+
+        self.assertEqual(len(qsos), 18)
+        self.assertEqual((qsos[0].call, qsos[0].locator, qsos[0].date, qsos[0].exchange),
+                         ('G4WJS', 'IO91NP', None, None))
+        self.assertEqual(qsos[0].line, '170606;1904;G4WJS;1;59;001;59;005;;IO91NP;29;;;;')
+
+    def test_records_are_slotted(self):
+
+        self.assertFalse(hasattr(QSORecord(), '__dict__'))
+        with self.assertRaises(AttributeError):
+            QSORecord().callsign
+
+    def test_unknown_field(self):
+
+        with self.assertRaises(ValueError):
+            QSOReader('testread.EDI', ('callsign',))
+
+    def test_found_records(self):
+
+        reader = QSOReader(self.write_edi('[REG1TEST;1]\nPCall=G4AUC\n'))
+        self.assertEqual(list(reader), [])
+        self.assertFalse(reader.found_records)
+
+        reader = QSOReader(self.write_edi('[REG1TEST;1]\n[QSORecords;0]\n'))
+        self.assertEqual(list(reader), [])
+        self.assertTrue(reader.found_records)
+
+    def test_short_and_long_lines(self):
+
+        file_name = self.write_edi('[QSORecords;3]\n'
+                                   '170606;1904;G4WJS;1;59;001;59;005;;IO91NP\n'  # 10 fields, no newline in locator
+                                   '170606;1905;G4AUC;1;59\n'  # not a QSO record
+                                   '170606;1906;G0GJV;1;59;002;59;006;RG;IO91OK;29;;;;;EXTRA;;\n')
+
+        qsos = list(QSOReader(file_name, ('call', 'exchange', 'locator', 'duplicate')))
+
+        self.assertEqual([(qso.call, qso.exchange, qso.locator, qso.duplicate) for qso in qsos],
+                         [('G4WJS', '', 'IO91NP', ''), ('G0GJV', 'RG', 'IO91OK', '')])
+
+    def write_edi_bytes(self, data):
+
+        fd, file_name = tempfile.mkstemp(suffix='.edi')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        self.addCleanup(os.remove, file_name)
+
+        return file_name
+
+    def test_lines_in_other_encodings(self):
+        """A line that isn't UTF-8 shouldn't stop the rest of the file being read."""
+
+        file_name = self.write_edi_bytes(
+            b'[REG1TEST;1]\r\n' + 'PClub=Café\r\n'.encode('cp1252') + b'[QSORecords;4]\r\n'
+            + '170606;1904;G4WJS;1;59;001;59;005;;IO91NP;29;;;;Zürich\r\n'.encode('cp1252')
+            + '170606;1905;F/G4AUC;1;59;002;59;006;É;JN18AA;29;;;;\r\n'.encode('utf-8')
+            + b'170606;1906;G0GJV;1;59;003;59;007;;IO91OK;29;;;;\x81\r\n'
+            + b'170606;1907;G3YSX;1;59;004;59;008;;IO91WG;29;;;;\r\n')
+
+        qsos = list(QSOReader(file_name, ('call', 'exchange', 'locator', 'line')))
+
+        self.assertEqual([(qso.call, qso.exchange, qso.locator) for qso in qsos],
+                         [('G4WJS', '', 'IO91NP'), ('F/G4AUC', 'É', 'JN18AA'), ('G0GJV', '', 'IO91OK'),
+                          ('G3YSX', '', 'IO91WG')])
+        self.assertTrue(qsos[0].line.endswith('Zürich'))
+        self.assertTrue(qsos[2].line.endswith('\x81'))
+
+        # the fields kept are decoded the same when the line isn't kept
+        self.assertEqual([qso.exchange for qso in QSOReader(file_name, ('exchange',))], ['', 'É', '', ''])
+
+    def test_line_ends(self):
+
+        records = ['170606;1904;G4WJS;1;59;001;59;005;;IO91NP;29;;;;', '170606;1905;G0GJV;1;59;002;59;006;;IO91OK;29;;;;']
+
+        for line_end in ('\n', '\r\n', '\r'):
+            with self.subTest(line_end=repr(line_end)):
+                # with a line that isn't UTF-8 at the end
+                file_name = self.write_edi_bytes(line_end.join(['[REG1TEST;1]', '[QSORecords;2]'] + records + [''])
+                                                 .encode() + b'\x81' + line_end.encode())
+
+                self.assertEqual([qso.line for qso in QSOReader(file_name, ('line',))], records)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
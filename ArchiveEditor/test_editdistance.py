@@ -0,0 +1,83 @@
+"""Test module for editdistance.py using unittest."""
+
+import unittest
+import random
+import editdistance
+
+
+def table_distance(s1, s2):
+    """Edit distance worked out with the whole distance table, to check against."""
+
+    previous = list(range(len(s2) + 1))
+    for i, c1 in enumerate(s1, 1):
+        current = [i]
+        for j, c2 in enumerate(s2, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (c1 != c2)))
+        previous = current
+
+    return previous[-1]
+
+
+class Test_distance(unittest.TestCase):
+
+    values = (
+        ('G4AUC', 'G4AUC', 0),
+        ('G4AUC', 'G4AAUC', 1),  # inserted
+        ('G4AUC', 'G4UC', 1),  # dropped
+        ('G4AUC', 'G4AUZ', 1),  # changed
+        ('G4AUC', 'G4UAC', 2),  # swapped
+        ('G4AUC', '', 5),
+        ('', '', 0),
+    )
+
+    def test_distance_values(self):
+
+        for s1, s2, expected in self.values:
+            with self.subTest(s1=s1, s2=s2):
+                self.assertEqual(editdistance.distance(s1, s2), expected)
+                self.assertEqual(editdistance.distance(s2, s1), expected)
+
+    def test_same_as_distance_table(self):
+
+        rng = random.Random(0)
+        for i in range(2000):
+            s1 = ''.join(rng.choice('AB12/') for j in range(rng.randint(0, 12)))
+            s2 = ''.join(rng.choice('AB12/') for j in range(rng.randint(0, 12)))
+            with self.subTest(s1=s1, s2=s2):
+                self.assertEqual(editdistance.distance(s1, s2), table_distance(s1, s2))
+
+    def test_within(self):
+
+        self.assertTrue(editdistance.within('G4AUC', 'G4AAUC', 1))
+        self.assertFalse(editdistance.within('G4AUC', 'G4UAC', 1))
+        self.assertFalse(editdistance.within('G4AUC', 'G4AUC/P', 1))
+        self.assertTrue(editdistance.within('G4AUC', 'G4AUC/P', 2))
+
+
+class Test_deletions(unittest.TestCase):
+
+    def test_deletions(self):
+
+        self.assertEqual(editdistance.deletions('ABC', 0), {'ABC'})
+        self.assertEqual(editdistance.deletions('ABC', 1), {'ABC', 'BC', 'AC', 'AB'})
+        self.assertEqual(editdistance.deletions('AB', 3), {'AB', 'A', 'B', ''})
+
+
+class Test_DeletionIndex(unittest.TestCase):
+
+    def test_query_same_as_distance(self):
+        """Query should find exactly the strings within max_distance edits."""
+
+        rng = random.Random(1)
+        strings = sorted({''.join(rng.choice('AB12') for i in range(rng.randint(0, 7))) for j in range(300)})
+
+        for max_distance in (0, 1, 2, 3):
+            index = editdistance.DeletionIndex(strings, max_distance)
+            for probe in strings[::7] + ['', 'A', 'ABABABAB']:
+                with self.subTest(max_distance=max_distance, probe=probe):
+                    expected = {s for s in strings if table_distance(probe, s) <= max_distance}
+                    self.assertEqual(set(index.query(probe)), expected)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,65 @@
+"""Test module for similaritykernel.py using unittest."""
+
+import unittest
+import random
+import Utilities
+import similaritykernel
+
+
+class Test_SimilarityKernel(unittest.TestCase):
+
+    strings = ['G4AUC', 'G4AUZ/P', 'G4AU', '2E0NEY', '', 'IO91OJ', 'IO91OJ10', 'F/G4AUC', 'GØXYZ']
+    probes = ['G4AUC', 'G4AUCX', 'IO91OK', 'IO91OJ12', '', 'G', 'GØXYZ']
+
+    def check_same_as_similarity(self):
+
+        kernel = similaritykernel.SimilarityKernel(self.strings)
+
+        counts = kernel.similarity_many(self.probes)
+
+        for probe, row in zip(self.probes, counts):
+            with self.subTest(probe=probe):
+                self.assertEqual([int(c) for c in row], [Utilities.similarity(probe, s) for s in self.strings])
+
+        for threshold in (0, 1, 2):
+            for probe in self.probes:
+                with self.subTest(probe=probe, threshold=threshold):
+                    self.assertEqual(kernel.within(probe, threshold),
+                                     [s for s in self.strings
+                                      if Utilities.similarity(probe, s) >= len(probe) - threshold])
+
+    @unittest.skipIf(similaritykernel.numpy is None, 'NumPy is not installed')
+    def test_numpy_same_as_similarity(self):
+
+        self.check_same_as_similarity()
+
+    def test_without_numpy_same_as_similarity(self):
+
+        saved = similaritykernel.numpy
+        similaritykernel.numpy = None
+        try:
+            self.check_same_as_similarity()
+        finally:
+            similaritykernel.numpy = saved
+
+    @unittest.skipIf(similaritykernel.numpy is None, 'NumPy is not installed')
+    def test_probes_in_blocks(self):
+        """More probes than fit in one comparison block."""
+
+        rng = random.Random(2)
+        strings = [''.join(rng.choice('G4AUC') for i in range(rng.randint(3, 7))) for j in range(200)]
+        probes = strings[:50]
+
+        saved = similaritykernel.BLOCK_BYTES
+        similaritykernel.BLOCK_BYTES = 3000
+        try:
+            counts = similaritykernel.SimilarityKernel(strings).similarity_many(probes)
+        finally:
+            similaritykernel.BLOCK_BYTES = saved
+
+        self.assertEqual([[int(c) for c in row] for row in counts],
+                         [[Utilities.similarity(p, s) for s in strings] for p in probes])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -1,7 +1,10 @@
 import unittest
+import os
+import tempfile
 import Utilities
 from itertools import zip_longest, repeat
 from pprint import pprint
+from archivetesting import ArchiveTestCase
 
 # Use:
 # exec(open('test_utilities.py', 'r').read())
@@ -24,6 +27,107 @@ class Test_sortDates(unittest.TestCase):
                 self.assertEqual(Utilities.sort_dates(v[0]), v[1], v)
 
 
+class Test_compilePipeline(unittest.TestCase):
+
+    def test_same_as_pipeline(self):
+
+        funcs = (Utilities.strip_row_fields, lambda row: row + ['x'], len)
+        process = Utilities.compile_pipeline(*funcs)
+
+        for row in ([' a ', 'b'], [], ['c']):
+            with self.subTest(row=row):
+                self.assertEqual(process(row), Utilities.pipeline(row, *funcs))
+
+        self.assertEqual(Utilities.compile_pipeline()(['a']), ['a'])
+
+    def test_copy_opt_in(self):
+
+        def change(row):
+            row.append('changed')
+            return row
+
+        row = ['a']
+        Utilities.compile_pipeline(change, copier=list)(row)
+        self.assertEqual(row, ['a'])
+
+        Utilities.compile_pipeline(change)(row)
+        self.assertEqual(row, ['a', 'changed'])
+
+    def test_generator_stages_fused(self):
+
+        def evens(items):
+            for item in items:
+                if item % 2 == 0:
+                    yield item
+
+        def pairs(items):
+            items = iter(items)
+            yield from zip(items, items)
+
+        process = Utilities.compile_pipeline(sorted, evens, lambda x: x * 10, str, pairs, ''.join)
+
+        self.assertEqual(list(process([6, 1, 4, 2, 3, 8])), ['2040', '6080'])
+
+    def test_csl_rows(self):
+
+        rows = [['Title'], [' G4AUC ', 'IO91OJ', '', '2', '2017/06/06;'], ['G0ABC', 'IO91'], ['G0ABC', 'IO91', 'x', 'y', '', 'z']]
+        self.assertEqual(list(Utilities.csl_rows(rows)),
+                         [['G4AUC', 'IO91OJ', '', 2, '2017/06/06;'], ['G0ABC', 'IO91', '', 1, ''],
+                          ['G0ABC', 'IO91', 'x', 'y', '', 'z']])
+        self.assertEqual(rows[1][0], ' G4AUC ')  # the rows read aren't changed
+
+
+class Test_reWriteCsl(ArchiveTestCase):
+
+    def setUp(self):
+
+        super().setUp()
+        self.file_name = self.path('archive.csl')
+
+        self.archive_dict = {}
+        Utilities.read_archive_file('G4AUClarge.csl', self.archive_dict, use_cache=False)
+        self.archive_dict[('G4AUC', 'IO91OJ', 'RG')] = [3, '2017/06/06;2018/01/02;2017/06/06;']
+        self.archive_dict[('', 'IO91OJ', '')] = [1, '2017/06/06;']
+        for posn, dates in enumerate(('', ';', ';;', '2018/02/24', '2018/02/24;;', ';2018/02/24;', 'x;')):
+            self.archive_dict[(f'G{posn}DAT', 'IO91OJ', '')] = [1, dates]
+
+    def test_same_as_row_by_row(self):
+
+        Utilities.re_write_csl(self.file_name, self.archive_dict)
+
+        expected = ''
+        for callsign, locator, exchange in sorted(self.archive_dict):
+            times_seen, dates = self.archive_dict[(callsign, locator, exchange)]
+            if callsign or exchange:
+                expected += f'"{callsign}","{locator}","{exchange}","{times_seen}","{Utilities.sort_dates(dates)}"\n'
+
+        with open(self.file_name) as f:
+            self.assertEqual(f.read(), expected)
+        self.assertEqual(os.listdir(self.directory), ['archive.csl'])
+
+    def test_failed_write_leaves_archive(self):
+
+        Utilities.re_write_csl(self.file_name, self.archive_dict)
+        with open(self.file_name, 'rb') as f:
+            before = f.read()
+
+        self.archive_dict[('ZZ9ZZZ', 'IO91OJ', '')] = ['x', '2017/06/06;']  # can't be written as a number
+        with self.assertRaises(ValueError):
+            Utilities.re_write_csl(self.file_name, self.archive_dict)
+
+        with open(self.file_name, 'rb') as f:
+            self.assertEqual(f.read(), before)
+        self.assertEqual(os.listdir(self.directory), ['archive.csl'])
+
+    def test_keeps_permissions(self):
+
+        Utilities.re_write_csl(self.file_name, self.archive_dict)
+        os.chmod(self.file_name, 0o640)
+        Utilities.re_write_csl(self.file_name, self.archive_dict)
+
+        self.assertEqual(os.stat(self.file_name).st_mode & 0o777, 0o640)
+
+
 class Test_formatDate(unittest.TestCase):
 
     values = (
@@ -132,6 +236,81 @@ class Test_getPrefix(unittest.TestCase):
             with self.subTest(v=v):
                 self.assertEqual(Utilities.get_prefix(v[0]), v[1], v)
 
+class Test_callsignParts(unittest.TestCase):
+
+    values = (
+        # callsign, base, body, prefix, suffix, portable, main_prefix
+        ('G4AUC', 'G4AUC', 'AUC', 'G', '', '', 'G'),
+        ('G4AUC/P', 'G4AUC', 'AUC/P', 'G', 'P', 'P', 'G'),
+        ('2E0NEY/MM', '2E0NEY', 'NEY/MM', '2E', 'MM', 'MM', 'G'),
+        ('G4AUC/VE3', 'G4AUC', 'AUC/VE3', 'G', 'VE3', '', 'G'),
+        ('F/G4AUC/P', 'F/G4AUC', 'AUC/P', 'F/G', 'P', 'P', 'F'),
+        ('', '', '', '', '', '', ''),
+    )
+
+    def test_callsignParts_values(self):
+
+        for callsign, base, body, prefix, suffix, portable, main_prefix in self.values:
+            with self.subTest(callsign=callsign):
+                parts = Utilities.callsign_parts(callsign)
+                self.assertEqual((parts.callsign, parts.base, parts.body, parts.prefix, parts.suffix, parts.portable),
+                                 (callsign, base, body, prefix, suffix, portable))
+                self.assertEqual(parts.main_prefix, main_prefix)
+
+    def test_callsignParts_interned(self):
+
+        self.assertIs(Utilities.callsign_parts('G4AUC'), Utilities.callsign_parts('G4AUC'))
+
+    def test_callsignParts_has_slots(self):
+
+        self.assertFalse(hasattr(Utilities.callsign_parts('G4AUC'), '__dict__'))
+
+
+class Test_matchLabels(unittest.TestCase):
+
+    values = (
+        # contact callsign, archive callsign, edit distance, labels
+        ('G4AUC', 'G4AAUC', 0, []),
+        ('G4AUC', 'G4AAUC', 1, ['(edit distance)']),
+        ('G4AAUC', 'G4AUC', 1, ['(edit distance)']),
+        ('G4AUC', 'G4UAC', 1, []),
+        ('G4AUC', 'G4UAC', 2, ['(edit distance)']),
+        ('G4AUC', 'G4AUZ', 1, ['(similar callsign)']),  # already similar
+        ('G4AUC', 'G4AUC/P', 2, ['(different suffix)']),  # already a different suffix
+        ('G4AUC', 'G4AUC', 1, ['(different locator)']),
+        ('', 'G4A', 3, []),  # no callsign
+    )
+
+    def test_edit_distance_labels(self):
+
+        for callsign, archive_callsign, edit_distance, labels in self.values:
+            with self.subTest(callsign=callsign, archive_callsign=archive_callsign, edit_distance=edit_distance):
+                self.assertEqual(Utilities.match_labels((callsign, 'IO91OJ', ''), (archive_callsign, 'JO01AA', ''),
+                                                        False, edit_distance=edit_distance), labels)
+
+
+class Test_nearMatchPair(unittest.TestCase):
+
+    callsigns = ('', 'G4A', 'G4AUC', 'G4AUZ', 'G4AAUC', 'G4UAC', 'G4AUC/P', 'G4AUCXY', 'M0AUC', 'M/G4AUC', 'G4AU')
+    locators = ('', 'IO91', 'IO91OJ', 'IO91OK', 'IO91OJ12', 'IO81OJ', 'JO01AA')
+
+    def test_same_as_match_labels_both_ways(self):
+
+        contacts = [(callsign, locator, '') for callsign in self.callsigns for locator in self.locators]
+
+        for similar_locators_checked in (False, True):
+            for edit_distance in (0, 1, 2):
+                for contact in contacts:
+                    for other in contacts:
+                        expected = bool(Utilities.match_labels(contact, other, similar_locators_checked,
+                                                               edit_distance=edit_distance) or
+                                        Utilities.match_labels(other, contact, similar_locators_checked,
+                                                               edit_distance=edit_distance))
+                        self.assertEqual(Utilities.near_match_pair(contact, other, similar_locators_checked,
+                                                                   edit_distance=edit_distance), expected,
+                                         (contact, other, similar_locators_checked, edit_distance))
+
+
 class Test_readArchiveFile(unittest.TestCase):
 
     correct_dict = {
@@ -167,13 +346,93 @@ The line: "G3MEH","IO910S","",1,"2017/03/07;" is not correctly formatted:
     def test_readArchiveFile_produces_correct_dict(self):
 
         archiveDict = {}
-        warnings = Utilities.read_archive_file(r'readtest.csl', archiveDict)
+        warnings = Utilities.read_archive_file(r'readtest.csl', archiveDict, use_cache=False)
         print('\nWarnings')
         print(warnings)
         print(archiveDict)
         self.assertEqual(archiveDict, self.correct_dict)
         self.assertEqual(warnings, self.correct_warnings)
 
+class Test_readArchiveFileBulk(unittest.TestCase):
+    """The bulk loader should give the same results as the csv module loader."""
+
+    texts = (
+        'Title\n"G4AUC","IO91OJ","",1,"2017/06/06;"\n',
+        '"G4AUC","IO91OJ","",1,"2017/06/06;"\r\n"G0GJV","IO91OK","RG",2,"2017/06/06;2016/05/03;"\r\n',
+        'G4AUC,IO91OJ,,1,2017/06/06;\rG0GJV,IO91OK,,x,2017/06/06;',  # old Mac line ends, no last line end
+        '"G4AUC","IO91OJ","a,b",1,"2017/06/06;"\n',  # comma in a quoted field
+        '"G4AUC","IO91OJ","say ""hi""",1,"2017/06/06;"\n',  # quotes in a quoted field
+        '"G4AUC","IO91OJ","two\nlines",1,"2017/06/06;"\n"G0GJV",IO91OK\n',  # field over two lines
+        'G4"AU,IO91OJ\n "G4AUC" ,IO91OJ,,1\n\n   \nG4AUC\n',  # stray quotes, blank lines, short rows
+        '"G4AUC","IO91OJ","",1,"2017/06/06;","extra","fields"\nG4AUC,IO91OJ,,-1,\n',
+        '',
+    )
+
+    def write_csl(self, text):
+
+        fd, file_name = tempfile.mkstemp(suffix='.csl')
+        with os.fdopen(fd, 'w', newline='') as f:
+            f.write(text)
+        self.addCleanup(os.remove, file_name)
+
+        return file_name
+
+    def test_same_as_csv_loader(self):
+
+        file_names = ['readtest.csl', 'G4AUClarge.csl', 'test.csl'] + [self.write_csl(text) for text in self.texts]
+
+        for file_name in file_names:
+            with self.subTest(file_name=file_name, text=open(file_name, newline='').read()[:80]):
+                bulk_dict, rows_dict = {}, {}
+                bulk_warnings = Utilities.read_archive_file(file_name, bulk_dict, use_cache=False)
+                rows_warnings = Utilities.read_archive_rows(file_name, rows_dict)
+
+                self.assertEqual(list(bulk_dict.items()), list(rows_dict.items()))
+                self.assertEqual(bulk_warnings, rows_warnings)
+
+    def test_line_numbers(self):
+
+        file_name = self.write_csl('"G4AUC","IO91OJ","two\nlines",1,"2017/06/06;"\n'
+                                   '"G0S0A","IO91OJ","",1,"2017/06/06;"\n')
+
+        warnings = Utilities.read_archive_file(file_name, {}, line_numbers=True, use_cache=False)
+
+        self.assertTrue(warnings.startswith('Line 3: The line: "G0S0A"'), warnings)
+
+
+class Test_readArchiveFileEncodings(unittest.TestCase):
+    """A line in another encoding shouldn't stop the rest of the archive being read."""
+
+    def test_lines_in_other_encodings(self):
+
+        data = ('"G4AUC","IO91OJ","",1,"2017/06/06;"\n'.encode('utf-8')
+                + '"F/G4AUC","JN18AA","Zürich",1,"2017/06/06;"\n'.encode('cp1252')
+                + '"G0GJV","IO91OK","Café",1,"2017/06/06;"\n'.encode('utf-8')
+                + '"G3YSX","IO91WG","",1,"2017/06/06;"\n'.encode('cp1252'))
+
+        expected = {('G4AUC', 'IO91OJ', ''): [1, '2017/06/06;'],
+                    ('F/G4AUC', 'JN18AA', 'Zürich'): [1, '2017/06/06;'],
+                    ('G0GJV', 'IO91OK', 'Café'): [1, '2017/06/06;'],
+                    ('G3YSX', 'IO91WG', ''): [1, '2017/06/06;']}
+
+        # and with mixed line ends, read by the csv module
+        for data in (data, data.replace(b'\n', b'\r\n', 1)):
+            fd, file_name = tempfile.mkstemp(suffix='.csl')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            self.addCleanup(os.remove, file_name)
+
+            for read in (Utilities.read_archive_file, Utilities.read_archive_rows):
+                with self.subTest(data=data, read=read):
+                    archive_dict = {}
+                    if read is Utilities.read_archive_file:
+                        read(file_name, archive_dict, use_cache=False)
+                    else:
+                        read(file_name, archive_dict)
+
+                    self.assertEqual(archive_dict, expected)
+
+
 class Test_readEdiFile(unittest.TestCase):
 
     correct_entries = [